@@ -0,0 +1,389 @@
+#   Program FlashCards
+#
+#   Copyright 2020 Ertugrul Harman
+#
+#       E-mail  : harmancode@gmail.com
+#       Twitter : https://twitter.com/harmancode
+#       Web     : https://harman.page
+#
+#   This file is part of Flashcards.
+#
+#   Flashcards is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import gzip
+import os
+import sqlite3
+from datetime import datetime
+from typing import Optional, Tuple
+
+from BackupResult import BackupResult
+
+
+class BackupManager:
+    # Backups are kept in this directory next to the database file, unless another directory is given.
+    DIRECTORY_NAME = "backups"
+    # Time part of the name of a backup file. It follows the name of the database file without extension and a dash,
+    # e.g. Flashcards-2024-01-31_18-30-00. A number follows it if another backup has been created in the same second.
+    FILE_NAME_FORMAT = "%Y-%m-%d_%H-%M-%S"
+    FILE_EXTENSION = ".db.gz"
+    DEFAULT_KEEP_COUNT = 10
+
+    # Amount of database pages copied by one step of the SQLite online backup. The database is locked only while a
+    # step runs, so writes of the Program are not held up by a long copy.
+    PAGES_PER_STEP = 1024
+    # Size of the pieces that are compressed and decompressed at a time
+    COPY_CHUNK_SIZE = 1024 * 1024
+    COMPRESSION_LEVEL = 6
+
+    # Phases reported to progress callbacks
+    COPYING = "Copying"
+    VERIFYING = "Verifying"
+    COMPRESSING = "Compressing"
+    DECOMPRESSING = "Decompressing"
+    RESTORING = "Restoring"
+
+    # Tables that a database of the Program has
+    REQUIRED_TABLES = ("deck", "flashcard")
+
+    class Cancelled(Exception):
+        """
+        Raised from the progress callback of an online backup to stop it, because the progress callback of the backup
+        API can not return a value.
+        """
+
+    def __init__(self, database_manager, directory=None, keep_count=DEFAULT_KEEP_COUNT):
+        """
+        BackupManager writes compressed snapshots of the database with the SQLite online backup API, and restores the
+        database from them. Unlike a copy of the database file, a snapshot is consistent even if the Program is
+        writing to the database while it is taken. Only the newest keep_count snapshots are kept.
+        Its methods do not interact with the user, and they can be run on a background thread; they do not use the
+        connections of the database manager except to restore.
+        :param DatabaseManager database_manager: DatabaseManager of the database
+        :param Optional[str] directory: Directory of the backup files. BackupManager.DIRECTORY_NAME next to the
+        database file if it is None.
+        :param int keep_count: Amount of backup files that are kept. Older ones are deleted after every backup.
+        """
+        self.database_manager = database_manager
+        self.db_path = database_manager.db_path
+        if directory is None:
+            directory = os.path.join(os.path.dirname(os.path.abspath(self.db_path)), BackupManager.DIRECTORY_NAME)
+        self.directory = directory
+        self.keep_count = max(1, int(keep_count))
+        # Backups of different databases can share a directory. Only the backups with this prefix are listed and
+        # rotated.
+        self.file_name_prefix = os.path.splitext(os.path.basename(self.db_path))[0] + "-"
+
+    def backup_paths(self) -> [str]:
+        """
+        :return: Paths of the backup files of the database in self.directory, newest first
+        :rtype: [str]
+        """
+        if not os.path.isdir(self.directory):
+            return []
+        backups = []
+        for name in os.listdir(self.directory):
+            creation_order = self.creation_order(name)
+            if creation_order is not None:
+                backups.append((creation_order, name))
+        backups.sort(reverse=True)
+        return [os.path.join(self.directory, name) for creation_order, name in backups]
+
+    def is_backup_name(self, name) -> bool:
+        """
+        :param str name: Name of a file
+        :return: True if it is the name of a backup of the database, as given by new_backup_path(). Backups of a
+        database whose name begins with the name of this one, e.g. Flashcards-old.db, are not matched.
+        :rtype: bool
+        """
+        return self.creation_order(name) is not None
+
+    def creation_order(self, name) -> Optional[Tuple[datetime, int]]:
+        """
+        Parse the name of a backup file. The names themselves do not sort in creation order, because the number of a
+        backup created in the same second as another, e.g. in Flashcards-2024-01-31_18-30-00-1.db.gz, sorts before
+        the extension of the first one.
+        :param str name: Name of a file
+        :return: Time and number of the backup, which sort in the order the backups have been created. None if it is
+        not the name of a backup of the database.
+        :rtype: Optional[(datetime, int)]
+        """
+        if not name.startswith(self.file_name_prefix) or not name.endswith(BackupManager.FILE_EXTENSION):
+            return None
+        time_part = name[len(self.file_name_prefix):-len(BackupManager.FILE_EXTENSION)]
+        number = "0"
+        # The time is followed by a number if another backup has been created in the same second.
+        if time_part.count("-") == BackupManager.FILE_NAME_FORMAT.count("-") + 1:
+            time_part, _, number = time_part.rpartition("-")
+            if not number.isdigit():
+                return None
+        try:
+            return datetime.strptime(time_part, BackupManager.FILE_NAME_FORMAT), int(number)
+        except ValueError:
+            return None
+
+    def new_backup_path(self) -> str:
+        """
+        :return: Path of a new backup file named after the database file and the current time. An existing file is
+        never returned.
+        :rtype: str
+        """
+        name = self.file_name_prefix + datetime.now().strftime(BackupManager.FILE_NAME_FORMAT)
+        path = os.path.join(self.directory, name + BackupManager.FILE_EXTENSION)
+        number = 1
+        while os.path.exists(path):
+            path = os.path.join(self.directory, "{}-{}{}".format(name, number, BackupManager.FILE_EXTENSION))
+            number += 1
+        return path
+
+    def create_backup(self, progress_callback=None, rotate=True) -> BackupResult:
+        """
+        Take a snapshot of the database, compress it, and delete the oldest backups if there are more than
+        self.keep_count.
+        The database is copied to a temporary file in PAGES_PER_STEP page steps from a read transaction of its own
+        connection, so the snapshot is consistent while the Program keeps using the database. The copy is checked
+        with PRAGMA quick_check before it is compressed. The backup file appears under its final name only when it is
+        complete.
+        Reviews waiting in the write-behind queue of the database manager are not included; call
+        database_manager.flush_pending_writes() first to include them.
+        :param progress_callback: Called as progress_callback(phase, done, total) during every phase of the backup,
+        where phase is one of the phase constants of BackupManager. Backup is cancelled if it returns False.
+        :type progress_callback: Optional[Callable[[str, int, int], bool]]
+        :param bool rotate: False to keep the old backups, e.g. the one that is being restored
+        :return: Path and sizes of the backup. It is True in boolean context if backup is successful.
+        :rtype: BackupResult
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        result = BackupResult(BackupResult.BACKUP, self.new_backup_path())
+        snapshot_path = result.filepath + ".snapshot"
+        compressed_path = result.filepath + ".part"
+        try:
+            result.page_count = self.copy_database(self.db_path, snapshot_path, progress_callback, snapshot=True,
+                                                   phase=BackupManager.COPYING)
+            result.database_size = os.path.getsize(snapshot_path)
+            self.report(progress_callback, BackupManager.VERIFYING, 0, 1)
+            error = self.check_database(snapshot_path, integrity_check="quick_check")
+            if error is not None:
+                raise sqlite3.DatabaseError(error)
+            self.compress(snapshot_path, compressed_path, progress_callback)
+            os.replace(compressed_path, result.filepath)
+            result.backup_size = os.path.getsize(result.filepath)
+            result.succeeded = True
+            if rotate:
+                result.removed_paths = self.rotate()
+        except BackupManager.Cancelled:
+            result.cancelled = True
+        except (sqlite3.Error, OSError) as error:
+            print("Exception create_backup(): ", error)
+            result.error = str(error)
+        finally:
+            for path in (snapshot_path, compressed_path):
+                if os.path.exists(path):
+                    os.remove(path)
+        return result
+
+    def restore_backup(self, backup_path, progress_callback=None, check_only=False) -> BackupResult:
+        """
+        Replace the database with the contents of a backup file.
+        The backup is decompressed next to the database and verified first: PRAGMA integrity_check must pass, the
+        tables of the Program must exist, and its schema must not be newer than this version of the Program. Then
+        the current database is backed up, so that the restore can be undone, and the pages of the backup are copied
+        into the database with the online backup API. The schema of an older backup is upgraded afterwards, and the
+        database manager reloads the decks.
+        It must not run while other threads use the database manager.
+        :param str backup_path: Path of a backup file created by create_backup()
+        :param progress_callback: See create_backup()
+        :type progress_callback: Optional[Callable[[str, int, int], bool]]
+        :param bool check_only: True to verify the backup file without restoring it
+        :return: It is True in boolean context if the backup has been verified, and restored unless check_only is
+        True.
+        :rtype: BackupResult
+        """
+        result = BackupResult(BackupResult.VERIFY if check_only else BackupResult.RESTORE, backup_path)
+        restored_path = self.db_path + ".restoring"
+        try:
+            self.decompress(backup_path, restored_path, progress_callback)
+            self.report(progress_callback, BackupManager.VERIFYING, 0, 1)
+            error = self.check_database(restored_path, integrity_check="integrity_check")
+            if error is not None:
+                result.error = error
+                return result
+            result.database_size = os.path.getsize(restored_path)
+            if check_only:
+                result.succeeded = True
+                return result
+
+            self.database_manager.flush_pending_writes()
+            # Old backups are not rotated here, so that neither the restored backup nor this one is deleted. They
+            # are rotated by the next backup.
+            previous_database_backup = self.create_backup(progress_callback, rotate=False)
+            if not previous_database_backup:
+                result.cancelled = previous_database_backup.cancelled
+                result.error = previous_database_backup.error
+                return result
+            result.previous_database_backup = previous_database_backup.filepath
+
+            # The pooled connections are closed while the pages are replaced. They are opened again on demand. The
+            # pages are replaced in one write transaction, so the database is left as it was if the copy is cancelled
+            # or it fails.
+            self.database_manager.close_db()
+            self.database_manager.connection_manager.close_all()
+            try:
+                result.page_count = self.copy_database(restored_path, self.db_path, progress_callback, snapshot=False,
+                                                       phase=BackupManager.RESTORING)
+            finally:
+                self.database_manager.reload_database()
+            result.succeeded = True
+        except BackupManager.Cancelled:
+            result.cancelled = True
+        except (sqlite3.Error, OSError, EOFError) as error:
+            print("Exception restore_backup(): ", error)
+            result.error = str(error)
+        finally:
+            if os.path.exists(restored_path):
+                os.remove(restored_path)
+        return result
+
+    def copy_database(self, source_path, target_path, progress_callback, snapshot, phase) -> int:
+        """
+        Copy a database into another with the SQLite online backup API, PAGES_PER_STEP pages at a time.
+        :param str source_path: Path of the database that is copied
+        :param str target_path: Path of the database that is overwritten. It is created if it does not exist.
+        :param progress_callback: See create_backup(). The copy can not be cancelled by its report of the last step.
+        :param bool snapshot: True to copy from a read transaction held during the whole copy, so that writes of other
+        connections during the copy neither restart it nor end up in the copy. The copy is then a standalone database
+        file without write-ahead log.
+        :param str phase: Phase reported to progress_callback
+        :return: Amount of copied pages
+        :rtype: int
+        """
+        page_counts = [0]
+
+        def report_progress(status, remaining, total) -> None:
+            page_counts[0] = total
+            if remaining == 0:
+                # The last step has already committed the copy, so it can not be cancelled any more.
+                if progress_callback is not None:
+                    progress_callback(phase, total, total)
+            else:
+                BackupManager.report(progress_callback, phase, total - remaining, total)
+
+        source = sqlite3.connect(source_path, isolation_level=None)
+        target = sqlite3.connect(target_path, isolation_level=None)
+        try:
+            if snapshot:
+                source.execute("BEGIN")
+                source.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()
+            source.backup(target, pages=BackupManager.PAGES_PER_STEP, progress=report_progress)
+            if snapshot:
+                source.execute("COMMIT")
+                target.execute("PRAGMA journal_mode = DELETE")
+        finally:
+            target.close()
+            source.close()
+        return page_counts[0]
+
+    def check_database(self, path, integrity_check) -> str:
+        """
+        Verify that a file is an intact database of the Program that this version of the Program can open.
+        :param str path: Path of the database file
+        :param str integrity_check: "quick_check" or "integrity_check". See the PRAGMA statements of SQLite.
+        :return: Description of the problem, or None if there is not any
+        :rtype: Optional[str]
+        """
+        connection = sqlite3.connect("file:{}?mode=ro".format(path), uri=True)
+        try:
+            # PRAGMA statements do not accept parameters. integrity_check is one of two constant names.
+            messages = [row[0] for row in connection.execute("PRAGMA {}".format(integrity_check)).fetchall()]
+            if messages != ["ok"]:
+                return "The backup is damaged: {}".format("; ".join(messages[:10]))
+            tables = {row[0] for row in connection.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+            for table in BackupManager.REQUIRED_TABLES:
+                if table not in tables:
+                    return "The backup is not a Flashcards database. It does not have the {} table.".format(table)
+            version = connection.execute("PRAGMA user_version").fetchone()[0]
+            latest_version = self.database_manager.schema_migrator.latest_version()
+            if version > latest_version:
+                return "The backup has been created by a newer version of Flashcards (database version {}, " \
+                       "this version reads up to {}).".format(version, latest_version)
+        except sqlite3.DatabaseError as error:
+            return "The backup is not a database: {}".format(error)
+        finally:
+            connection.close()
+        return None
+
+    def compress(self, source_path, target_path, progress_callback) -> None:
+        """
+        :param str source_path: Path of the file that is compressed
+        :param str target_path: Path of the gzip file that is written
+        :param progress_callback: See create_backup()
+        """
+        total = os.path.getsize(source_path)
+        with open(source_path, "rb") as source, \
+                gzip.open(target_path, "wb", compresslevel=BackupManager.COMPRESSION_LEVEL) as target:
+            self.copy_file(source, target, BackupManager.COMPRESSING, lambda: source.tell(), total,
+                           progress_callback)
+
+    def decompress(self, source_path, target_path, progress_callback) -> None:
+        """
+        :param str source_path: Path of the gzip file that is read
+        :param str target_path: Path of the file that is written
+        :param progress_callback: See create_backup()
+        """
+        total = os.path.getsize(source_path)
+        with open(source_path, "rb") as compressed_file, gzip.open(compressed_file, "rb") as source, \
+                open(target_path, "wb") as target:
+            self.copy_file(source, target, BackupManager.DECOMPRESSING, lambda: compressed_file.tell(), total,
+                           progress_callback)
+
+    def copy_file(self, source, target, phase, position, total, progress_callback) -> None:
+        """
+        Copy a file object into another in COPY_CHUNK_SIZE pieces, and report the progress after every piece.
+        :param source: File object that is read
+        :param target: File object that is written
+        :param str phase: Phase reported to progress_callback
+        :param Callable[[], int] position: Returns how far the copy has proceeded, in bytes of total
+        :param int total: Size of the copy in bytes
+        :param progress_callback: See create_backup()
+        """
+        while True:
+            data = source.read(BackupManager.COPY_CHUNK_SIZE)
+            if len(data) == 0:
+                break
+            target.write(data)
+            self.report(progress_callback, phase, position(), total)
+
+    @staticmethod
+    def report(progress_callback, phase, done, total) -> None:
+        """
+        Call the progress callback, if there is one.
+        :raises BackupManager.Cancelled: If the progress callback returns False
+        """
+        if progress_callback is not None and progress_callback(phase, done, total) is False:
+            raise BackupManager.Cancelled()
+
+    def rotate(self) -> [str]:
+        """
+        Delete the oldest backup files, so that only self.keep_count of them remain.
+        :return: Paths of the deleted files
+        :rtype: [str]
+        """
+        removed_paths = []
+        for path in self.backup_paths()[self.keep_count:]:
+            try:
+                os.remove(path)
+                removed_paths.append(path)
+            except OSError as error:
+                print("Error in deleting old backup: ", error)
+        return removed_paths
@@ -0,0 +1,100 @@
+#   Program FlashCards
+#
+#   Copyright 2020 Ertugrul Harman
+#
+#       E-mail  : harmancode@gmail.com
+#       Twitter : https://twitter.com/harmancode
+#       Web     : https://harman.page
+#
+#   This file is part of Flashcards.
+#
+#   Flashcards is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+
+class BackupResult:
+    BACKUP = "Backup"
+    RESTORE = "Restore"
+    VERIFY = "Verify"
+
+    def __init__(self, operation, filepath):
+        """
+        BackupResult describes what happened while BackupManager created or restored a backup of the database. It does
+        not show anything to the user; the caller decides how to report it.
+        A result is True in boolean context when the operation has succeeded.
+        :param str operation: BackupResult.BACKUP, BackupResult.RESTORE, or BackupResult.VERIFY for a restore that only
+        checks the backup
+        :param str filepath: Path of the backup file
+        """
+        self.operation = operation
+        self.filepath = filepath
+
+        # True if the backup has been written and verified, or if it has been verified, and restored unless the
+        # operation is BackupResult.VERIFY
+        self.succeeded = False
+
+        # True if the operation has been cancelled by the progress callback
+        self.cancelled = False
+
+        # Amount of database pages copied
+        self.page_count = 0
+
+        # Size of the database in bytes, and size of the compressed backup file in bytes
+        self.database_size = 0
+        self.backup_size = 0
+
+        # Older backup files that have been deleted, because there were more backups than kept
+        self.removed_paths: [str] = []
+
+        # Backup of the database as it was before it was restored. None for backups, or if restore failed before it.
+        self.previous_database_backup = None
+
+        # Description of the error that made the operation fail, if there is any
+        self.error = None
+
+    def summary(self) -> str:
+        """
+        :return: One line description of the result
+        :rtype: str
+        """
+        if self.operation == BackupResult.BACKUP:
+            if self.succeeded:
+                text = "Backed up the database ({} bytes) to {} ({} bytes).".format(self.database_size,
+                                                                                  self.filepath, self.backup_size)
+            elif self.cancelled:
+                text = "Backup to {} has been cancelled.".format(self.filepath)
+            else:
+                text = "Backup to {} has failed.".format(self.filepath)
+            if len(self.removed_paths) > 0:
+                text += " {} older backups deleted.".format(len(self.removed_paths))
+        elif self.operation == BackupResult.VERIFY:
+            if self.succeeded:
+                text = "{} is intact and it can be restored.".format(self.filepath)
+            else:
+                text = "Verification of {} has failed.".format(self.filepath)
+        else:
+            if self.succeeded:
+                text = "Restored the database from {}.".format(self.filepath)
+            elif self.cancelled:
+                text = "Restore from {} has been cancelled.".format(self.filepath)
+            else:
+                text = "Restore from {} has failed.".format(self.filepath)
+            if self.previous_database_backup is not None:
+                text += " The previous database has been backed up to {}.".format(self.previous_database_backup)
+        if self.error is not None:
+            text += " {}".format(self.error)
+        return text
+
+    def __bool__(self) -> bool:
+        return self.succeeded
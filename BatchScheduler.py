@@ -0,0 +1,221 @@
+#   Program FlashCards
+#
+#   Copyright 2020 Ertugrul Harman
+#
+#       E-mail  : harmancode@gmail.com
+#       Twitter : https://twitter.com/harmancode
+#       Web     : https://harman.page
+#
+#   This file is part of Flashcards.
+#
+#   Flashcards is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import datetime
+
+from Flashcard import Flashcard
+
+try:
+    import numpy
+except ImportError:
+    # NumPy is optional. BatchScheduler falls back to plain Python without it.
+    numpy = None
+
+
+class BatchScheduler:
+    # NumPy calculates due days with float arithmetic. Due moments closer than this many days to a midnight are
+    # calculated again with datetime, because datetime rounds intervals to microseconds and may put them on the other
+    # side of the midnight. Float errors are many orders of magnitude smaller for any interval up to the year 9999.
+    DAY_BOUNDARY_MARGIN = 1e-6
+
+    def __init__(self, use_numpy=None):
+        """
+        BatchScheduler applies the SM-2 algorithm of Flashcard.set_inter_repetition_interval() and
+        Flashcard.set_due_date() to many flashcards at once. With NumPy, the new values of all flashcards are calculated
+        in one vectorized pass. Without it, a plain Python loop is used. Both give exactly the same results as the
+        Flashcard methods; benchmark/sm2_differential.py checks it, and tests/test_batch_scheduler.py runs its quick
+        check.
+        :param Optional[bool] use_numpy: True or False to force the implementation. If it is None, NumPy is used when
+        it is installed.
+        """
+        if use_numpy is None:
+            use_numpy = numpy is not None
+        if use_numpy and numpy is None:
+            raise ImportError("NumPy is not installed")
+        self.use_numpy = use_numpy
+
+    def schedule(self, repetition_numbers, intervals, easiness_factors, grades) -> ([int], [float], [float]):
+        """
+        Calculate the SM-2 values of flashcards after they have been answered with the given grades.
+        The arguments are sequences of the same length, one item per flashcard.
+        :param [int] repetition_numbers: repetition_number values of the flashcards
+        :param [float] intervals: inter_repetition_interval values of the flashcards, in days
+        :param [float] easiness_factors: easiness_factor values of the flashcards
+        :param [int] grades: Grades of the answers, between 0 (hardest) and 4 (easiest)
+        :return: New (repetition_numbers, intervals, easiness_factors) as lists
+        :rtype: ([int], [float], [float])
+        """
+        if self.use_numpy:
+            return self._schedule_with_numpy(repetition_numbers, intervals, easiness_factors, grades)
+        return self._schedule_with_python(repetition_numbers, intervals, easiness_factors, grades)
+
+    def _schedule_with_python(self, repetition_numbers, intervals, easiness_factors, grades):
+        """
+        Plain Python implementation of self.schedule(). The operations are the same, in the same order, as in
+        Flashcard.set_inter_repetition_interval().
+        """
+        new_repetition_numbers = []
+        new_intervals = []
+        new_easiness_factors = []
+        for repetition_number, interval, easiness_factor, grade in zip(repetition_numbers, intervals,
+                                                                       easiness_factors, grades):
+            if repetition_number == 0:
+                interval = 1
+            elif repetition_number == 1:
+                interval = 6
+            elif repetition_number > 1:
+                interval = interval * easiness_factor
+            repetition_number += 1
+            easiness_factor = easiness_factor + (0.1 - (4 - grade) * (0.08 + (4 - grade) * 0.02))
+            if grade < 2:
+                repetition_number = 0
+                interval = 1
+            if easiness_factor < 1.3:
+                easiness_factor = 1.3
+            new_repetition_numbers.append(repetition_number)
+            new_intervals.append(interval)
+            new_easiness_factors.append(easiness_factor)
+        return new_repetition_numbers, new_intervals, new_easiness_factors
+
+    def _schedule_with_numpy(self, repetition_numbers, intervals, easiness_factors, grades):
+        """
+        NumPy implementation of self.schedule(). Element-wise float64 operations are done in the same order as in
+        Flashcard.set_inter_repetition_interval(), so the results are identical. Intervals that the scalar method sets
+        to 1 or 6, or leaves unchanged, are returned with the same type it would give them.
+        """
+        repetition_array = numpy.asarray(repetition_numbers, dtype=numpy.int64)
+        interval_array = numpy.asarray(intervals, dtype=numpy.float64)
+        easiness_array = numpy.asarray(easiness_factors, dtype=numpy.float64)
+        grade_array = numpy.asarray(grades, dtype=numpy.int64)
+
+        failed = grade_array < 2
+        first = (repetition_array == 0) | failed
+        second = (repetition_array == 1) & ~failed
+        later = (repetition_array > 1) & ~failed
+
+        # The intervals are built in an object array, so every one has the Python type that the scalar method gives
+        # it: int for 1 and 6, float for the product, and the original value where it is left unchanged.
+        new_intervals = numpy.where(later, interval_array * easiness_array, numpy.asarray(intervals, dtype=object))
+        new_intervals = numpy.where(second, 6, new_intervals)
+        new_intervals = numpy.where(first, 1, new_intervals)
+
+        new_repetitions = numpy.where(failed, 0, repetition_array + 1)
+
+        difficulty = 4 - grade_array
+        new_easiness = easiness_array + (0.1 - difficulty * (0.08 + difficulty * 0.02))
+        new_easiness = numpy.where(new_easiness < 1.3, 1.3, new_easiness)
+
+        return new_repetitions.tolist(), new_intervals.tolist(), new_easiness.tolist()
+
+    def due_days(self, intervals, now=None) -> [int]:
+        """
+        Calculate due dates as day numbers the same way as Flashcard.set_due_date(), for all flashcards at the same
+        moment. Whole-day intervals are added to today's day number with integer arithmetic. Fractional intervals can
+        move the due date to the next day depending on the time of day, so they are calculated with datetime, once per
+        distinct interval. With NumPy, all of them are calculated in one vectorized pass; see _due_days_with_numpy().
+        :param [float] intervals: New inter_repetition_interval values of the flashcards, in days
+        :param Optional[datetime.datetime] now: Moment of the answers. Current local time if it is None.
+        :return: Due dates as day numbers. See Flashcard.day_number().
+        :rtype: [int]
+        """
+        if now is None:
+            now = datetime.datetime.now()
+        if self.use_numpy:
+            return self._due_days_with_numpy(intervals, now)
+        today_day = Flashcard.day_number(now)
+        due_days = dict()
+        return [BatchScheduler._due_day(interval, now, today_day, due_days) for interval in intervals]
+
+    @staticmethod
+    def _due_day(interval, now, today_day, due_days) -> int:
+        """
+        Calculate one due date of self.due_days() in plain Python.
+        :param due_days: Due days of the fractional intervals that have been calculated, by interval
+        :type due_days: {float: int}
+        """
+        if isinstance(interval, int):
+            return Flashcard.shared_day_number(today_day + interval)
+        due_day = due_days.get(interval)
+        if due_day is None:
+            due_day = Flashcard.day_number(now + datetime.timedelta(interval))
+            due_days[interval] = due_day
+        return due_day
+
+    def _due_days_with_numpy(self, intervals, now) -> [int]:
+        """
+        NumPy implementation of self.due_days(). The due moment of every flashcard is calculated in days as a float,
+        and its day number is the whole part. Due moments near a midnight, and due dates that datetime can not
+        represent, are calculated with _due_day() instead, so the results are identical.
+        """
+        today_day = Flashcard.day_number(now)
+        midnight = datetime.datetime.combine(now.date(), datetime.time())
+        days = (now - midnight) / datetime.timedelta(days=1) + numpy.asarray(intervals, dtype=numpy.float64)
+        whole_days = numpy.floor(days)
+        day_fractions = days - whole_days
+        last_day = datetime.date.max.toordinal() - Flashcard.EPOCH_DATE.toordinal()
+        exact = (day_fractions >= BatchScheduler.DAY_BOUNDARY_MARGIN) & \
+                (day_fractions <= 1 - BatchScheduler.DAY_BOUNDARY_MARGIN) & \
+                (whole_days < last_day - today_day)
+
+        due_days = numpy.where(exact, whole_days, 0).astype(numpy.int64) + today_day
+        # Flashcards with the same due day share one int object, as with Flashcard.day_number().
+        distinct_days, day_indexes = numpy.unique(due_days, return_inverse=True)
+        shared_days = numpy.array([Flashcard.shared_day_number(day) for day in distinct_days.tolist()], dtype=object)
+        result = shared_days[day_indexes.ravel()].tolist()
+
+        fractional_due_days = dict()
+        for index in numpy.flatnonzero(~exact).tolist():
+            result[index] = BatchScheduler._due_day(intervals[index], now, today_day, fractional_due_days)
+        return result
+
+    def schedule_flashcards(self, flashcards, grades, now=None) -> [tuple]:
+        """
+        Process answers to many flashcards at once, like Flashcard.process_answer() does for one flashcard. The
+        Flashcard objects are updated, and rows for DatabaseManager.update_flashcard_schedules() are returned.
+        :param [Flashcard] flashcards: Answered flashcards
+        :param [int] grades: Grades of the answers, between 0 (hardest) and 4 (easiest), one per flashcard
+        :param Optional[datetime.datetime] now: Moment of the answers. Current local time if it is None.
+        :return: (last_study_date, due_day, inter_repetition_interval, easiness_factor, repetition_number,
+        flashcard_id) tuples
+        :rtype: [tuple]
+        """
+        if now is None:
+            now = datetime.datetime.now()
+        repetition_numbers, intervals, easiness_factors = self.schedule(
+            [flashcard.repetition_number for flashcard in flashcards],
+            [flashcard.inter_repetition_interval for flashcard in flashcards],
+            [flashcard.easiness_factor for flashcard in flashcards],
+            grades)
+        due_days = self.due_days(intervals, now)
+
+        rows = []
+        for index, flashcard in enumerate(flashcards):
+            flashcard.last_study_date = now
+            flashcard.repetition_number = repetition_numbers[index]
+            flashcard.inter_repetition_interval = intervals[index]
+            flashcard.easiness_factor = easiness_factors[index]
+            flashcard.due_day = due_days[index]
+            rows.append((now, due_days[index], intervals[index], easiness_factors[index],
+                         repetition_numbers[index], flashcard.flashcard_id))
+        return rows
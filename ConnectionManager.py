@@ -0,0 +1,235 @@
+#   Program FlashCards
+#
+#   Copyright 2020 Ertugrul Harman
+#
+#       E-mail  : harmancode@gmail.com
+#       Twitter : https://twitter.com/harmancode
+#       Web     : https://harman.page
+#
+#   This file is part of Flashcards.
+#
+#   Flashcards is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+from Instrumentation import InstrumentedConnection
+
+
+class ConnectionManager:
+    # Commit at the end of every outermost transaction scope.
+    COMMIT_IMMEDIATE = "immediate"
+    # Keep the transaction open and commit after every COMMIT_BATCH_SIZE scopes, or when commit() is called.
+    COMMIT_BATCHED = "batched"
+
+    DEFAULT_POOL_SIZE = 4
+    DEFAULT_COMMIT_BATCH_SIZE = 100
+
+    def __init__(self, db_path, pool_size=DEFAULT_POOL_SIZE, commit_policy=COMMIT_IMMEDIATE,
+                 commit_batch_size=DEFAULT_COMMIT_BATCH_SIZE, journal_mode=None, instrumentation=None):
+        """
+        ConnectionManager keeps a small pool of long-lived sqlite3 connections, so that database operations do not pay
+        for connecting, and closing the database every time. A connection is bound to a thread while that thread is
+        inside a transaction scope, and it goes back to the pool when the outermost scope ends.
+        :param str db_path: Path of the SQLite database file
+        :param int pool_size: Maximum amount of connections that can be open at the same time
+        :param str commit_policy: ConnectionManager.COMMIT_IMMEDIATE or ConnectionManager.COMMIT_BATCHED
+        :param int commit_batch_size: How many transaction scopes are committed together when commit_policy is
+        ConnectionManager.COMMIT_BATCHED
+        :param Optional[str] journal_mode: SQLite journal mode set on every new connection, e.g. "WAL". The default
+        journal mode of the database is kept if it is None.
+        :param Optional[Instrumentation] instrumentation: If it is given, every SQL statement executed on the
+        connections is timed by it.
+        """
+        if commit_policy not in (ConnectionManager.COMMIT_IMMEDIATE, ConnectionManager.COMMIT_BATCHED):
+            raise ValueError("Unknown commit policy: {}".format(commit_policy))
+
+        self.db_path = db_path
+        self.pool_size = max(1, int(pool_size))
+        self.commit_policy = commit_policy
+        self.commit_batch_size = max(1, int(commit_batch_size))
+        self.journal_mode = journal_mode
+        self.instrumentation = instrumentation
+
+        # Idle connections that are ready to be handed out to any thread.
+        self._idle_connections: [sqlite3.Connection] = []
+
+        # Every connection this manager has opened, idle or in use.
+        self._all_connections: [sqlite3.Connection] = []
+
+        # Amount of transaction scopes that have been closed without commit, per connection.
+        self._uncommitted_scopes = dict()
+
+        # Guards the pool. Threads wait on it when every connection is in use.
+        self._pool_condition = threading.Condition(threading.Lock())
+
+        # Holds the connection and the scope depth of the current thread.
+        self._local = threading.local()
+
+        # Incremented by close_all(), so that threads drop connections that have been closed in the meantime.
+        self._generation = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        """
+        Open a new connection to the database.
+        Connections are opened in autocommit mode (isolation_level=None), and transactions are started explicitly by
+        self.transaction(). check_same_thread is disabled because a pooled connection can be used by different
+        threads, one thread at a time.
+        :return: New sqlite3 connection
+        :rtype: sqlite3.Connection
+        """
+        connection = sqlite3.connect(self.db_path,
+                                     detect_types=sqlite3.PARSE_DECLTYPES | sqlite3.PARSE_COLNAMES,
+                                     isolation_level=None,
+                                     check_same_thread=False,
+                                     factory=sqlite3.Connection if self.instrumentation is None
+                                     else InstrumentedConnection)
+        if self.instrumentation is not None:
+            connection.instrumentation = self.instrumentation
+        if self.journal_mode is not None:
+            # PRAGMA statements do not accept parameters.
+            connection.execute("PRAGMA journal_mode = {}".format(self.journal_mode))
+        return connection
+
+    def acquire(self) -> sqlite3.Connection:
+        """
+        Return the connection of the current thread. If the thread does not hold a connection yet, take one from the
+        pool, or open a new one if the pool is not full. Block until a connection is released otherwise.
+        Every acquire() call must be matched by a release() call.
+        :return: Connection bound to the current thread
+        :rtype: sqlite3.Connection
+        """
+        connection = getattr(self._local, "connection", None)
+        if connection is not None and self._local.generation != self._generation:
+            connection = None
+        if connection is None:
+            with self._pool_condition:
+                while len(self._idle_connections) == 0 and len(self._all_connections) >= self.pool_size:
+                    self._pool_condition.wait()
+                if len(self._idle_connections) > 0:
+                    connection = self._idle_connections.pop()
+                else:
+                    connection = self._connect()
+                    self._all_connections.append(connection)
+                    self._uncommitted_scopes[connection] = 0
+            self._local.connection = connection
+            self._local.depth = 0
+            self._local.generation = self._generation
+        self._local.depth += 1
+        return connection
+
+    def release(self) -> None:
+        """
+        Leave a scope opened by acquire(). When the outermost scope is left, the connection goes back to the pool,
+        unless it still holds an uncommitted transaction (see ConnectionManager.COMMIT_BATCHED).
+        """
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            return
+        self._local.depth -= 1
+        if self._local.depth <= 0:
+            if self._local.generation != self._generation:
+                # The connection has been closed by close_all() in the meantime. Do not put it back to the pool.
+                self._local.connection = None
+                self._local.depth = 0
+            elif not connection.in_transaction:
+                self._local.connection = None
+                self._local.depth = 0
+                with self._pool_condition:
+                    self._idle_connections.append(connection)
+                    self._pool_condition.notify()
+            else:
+                self._local.depth = 0
+
+    @contextmanager
+    def transaction(self, immediate=False):
+        """
+        Context manager that provides a cursor inside a transaction. Nested scopes join the outermost transaction.
+        When the outermost scope ends, the transaction is committed according to self.commit_policy. If an exception
+        is raised, the whole transaction is rolled back and the exception is re-raised.
+        Usage:
+            with connection_manager.transaction() as cursor:
+                cursor.execute(...)
+        :param bool immediate: True to take the write lock at the beginning of the transaction (BEGIN IMMEDIATE).
+        Use it when the transaction reads data that its own writes depend on.
+        :return: Cursor of the connection bound to the current thread
+        :rtype: sqlite3.Cursor
+        """
+        connection = self.acquire()
+        is_outermost = self._local.depth == 1
+        cursor = None
+        try:
+            if not connection.in_transaction:
+                connection.execute("BEGIN IMMEDIATE" if immediate else "BEGIN")
+            cursor = connection.cursor()
+            yield cursor
+        except BaseException:
+            if connection.in_transaction:
+                connection.rollback()
+            self._uncommitted_scopes[connection] = 0
+            raise
+        else:
+            if is_outermost:
+                self._end_scope(connection)
+        finally:
+            if cursor is not None:
+                cursor.close()
+            self.release()
+
+    def _end_scope(self, connection) -> None:
+        """
+        Commit the transaction of the connection if the commit policy requires it.
+        :param sqlite3.Connection connection: Connection whose outermost transaction scope has just ended
+        """
+        if self.commit_policy == ConnectionManager.COMMIT_IMMEDIATE:
+            connection.commit()
+            self._uncommitted_scopes[connection] = 0
+        else:
+            self._uncommitted_scopes[connection] += 1
+            if self._uncommitted_scopes[connection] >= self.commit_batch_size:
+                connection.commit()
+                self._uncommitted_scopes[connection] = 0
+
+    def commit(self) -> None:
+        """
+        Commit the pending transaction of the current thread, if there is any, and return its connection to the pool.
+        """
+        connection = getattr(self._local, "connection", None)
+        if connection is not None and connection.in_transaction and self._local.depth == 0:
+            connection.commit()
+            self._uncommitted_scopes[connection] = 0
+            self.acquire()
+            self.release()
+
+    def close_all(self) -> None:
+        """
+        Commit pending transactions and close every connection opened by this manager. The manager can still be used
+        afterwards; it will open new connections as needed.
+        """
+        with self._pool_condition:
+            for connection in self._all_connections:
+                try:
+                    if connection.in_transaction:
+                        connection.commit()
+                    connection.close()
+                except sqlite3.ProgrammingError as programming_error:
+                    print("Database connection is probably already closed: ", programming_error)
+                except sqlite3.Error as error:
+                    print("Error in closing database connection: ", error)
+            self._all_connections = []
+            self._idle_connections = []
+            self._uncommitted_scopes = dict()
+            self._generation += 1
+            self._pool_condition.notify_all()
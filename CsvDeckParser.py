@@ -0,0 +1,189 @@
+#   Program FlashCards
+#
+#   Copyright 2020 Ertugrul Harman
+#
+#       E-mail  : harmancode@gmail.com
+#       Twitter : https://twitter.com/harmancode
+#       Web     : https://harman.page
+#
+#   This file is part of Flashcards.
+#
+#   Flashcards is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import csv  # Documentation: https://docs.python.org/3/library/csv.html
+from datetime import datetime
+from typing import Optional
+
+from Flashcard import Flashcard
+from ImportResult import ImportResult
+
+
+class CsvDeckParser:
+    # Version of the files that contain question and answer only. Other applications can read them as key-value pairs.
+    FILE_VERSION = 1
+    # Version of the files whose flashcard rows also contain last study date, due date, inter-repetition interval,
+    # easiness factor, and repetition number after question and answer, so that the deck is exported without loss.
+    SCHEDULED_FILE_VERSION = 2
+    # Amount of columns of a flashcard row in a file of SCHEDULED_FILE_VERSION
+    SCHEDULED_ROW_LENGTH = 7
+
+    def __init__(self, result):
+        """
+        CsvDeckParser reads the rows of a csv file of a deck one at a time, and turns them into flashcard rows that
+        DatabaseManager.add_flashcards_bulk() accepts. Special rows (decktitle, fileversion, program) are
+        remembered, and rows that are not flashcards are recorded in the result.
+        It does not use the database, so files can be parsed in other processes. See parse_file().
+        :param ImportResult result: Result of the import. Rejected rows and duplicate questions are counted in it.
+        """
+        self.result = result
+
+        # Title of the deck, as read from the decktitle row so far
+        self.decktitle = ""
+
+        # Version of the file, as read from the fileversion row so far
+        self.file_version = CsvDeckParser.FILE_VERSION
+
+        # Amount of flashcard rows returned by parse_row()
+        self.count = 0
+
+        # Questions that have been read so far. Used to skip duplicate questions.
+        self.questions = set()
+
+    def parse_row(self, row, line_number) -> Optional[tuple]:
+        """
+        Read one row of the file.
+        If a question appears more than once in the file, only its first occurrence is returned, unless the file has
+        been exported with the scheduling values (fileversion 2). Rows of such files are returned as they are, with
+        the schedule of each flashcard.
+        :param [str] row: Fields of the row, as read by csv.reader
+        :param int line_number: Line number of the row in the file
+        :return: (question, answer) tuple, or (question, answer, last_study_date, due_day, inter_repetition_interval,
+        easiness_factor, repetition_number) tuple if the row has a schedule. None if the row is not a flashcard.
+        :rtype: Optional[tuple]
+        """
+        # print(row)
+        if len(row) == 0:
+            # Skip empty lines
+            return None
+        if len(row) < 2:
+            self.result.reject_row(line_number, row)
+            return None
+
+        key = row[0]
+        value = row[1]
+
+        # Check if key is special
+        if key == 'decktitle':
+            self.decktitle = value
+        elif key == 'fileversion':
+            self.file_version = CsvDeckParser.file_version_from_string(value)
+        elif key == 'program':
+            # There is not any process defined yet for this data.
+            pass
+        elif self.file_version >= CsvDeckParser.SCHEDULED_FILE_VERSION:
+            # The file has been exported by this program, duplicate questions included. Flashcards that have
+            # scheduling values keep them.
+            if len(row) >= CsvDeckParser.SCHEDULED_ROW_LENGTH:
+                try:
+                    flashcard_row = (key, value) + CsvDeckParser.schedule_from_row(row)
+                except ValueError:
+                    self.result.reject_row(line_number, row)
+                    return None
+            else:
+                flashcard_row = (key, value)
+            self.count += 1
+            return flashcard_row
+        elif key not in self.questions:
+            # Key is not special, process it as an ordinary row
+            self.questions.add(key)
+            self.count += 1
+            return key, value
+        else:
+            self.result.duplicate_count += 1
+        return None
+
+    @staticmethod
+    def parse_file(filepath, maximum_amount_of_flashcards) -> (str, [tuple], ImportResult):
+        """
+        Read a whole csv file of a deck. It is run in the worker processes of
+        ImportExportManager.import_csv_directory(), so it only returns plain data.
+        :param str filepath: Path of the file
+        :param int maximum_amount_of_flashcards: Files with more flashcards than this are not imported
+        :return: Title of the deck, flashcard rows as returned by parse_row(), and result of the parsing. If the file
+        can not be imported, the rows are empty and the result has a warning or an error.
+        :rtype: (str, [tuple], ImportResult)
+        """
+        result = ImportResult(filepath)
+        parser = CsvDeckParser(result)
+        rows = []
+        try:
+            with open(filepath, newline='', encoding='utf-8') as csvfile:
+                reader = csv.reader(csvfile)
+                for row in reader:
+                    flashcard_row = parser.parse_row(row, reader.line_num)
+                    if flashcard_row is not None:
+                        rows.append(flashcard_row)
+                        if parser.count > maximum_amount_of_flashcards:
+                            break
+        except Exception as error:
+            print("Exception parse_file(): ", error)
+            result.error = str(error)
+            return parser.decktitle, [], result
+
+        if parser.count <= 0:
+            result.add_warning("No flashcards found",
+                               "There is not any recognizable flashcards found in this file.")
+            rows = []
+        elif parser.count > maximum_amount_of_flashcards:
+            result.add_warning("Too many flashcards",
+                               "This file contains more flashcards that a deck may contain. A deck may not contain "
+                               "more than {} flashcards".format(maximum_amount_of_flashcards))
+            rows = []
+        return parser.decktitle, rows, result
+
+    @staticmethod
+    def file_version_from_string(value) -> int:
+        """
+        :param str value: Value of the fileversion row of an imported file
+        :return: Version of the file. CsvDeckParser.FILE_VERSION if the value is not a number.
+        :rtype: int
+        """
+        try:
+            return int(value)
+        except ValueError:
+            return CsvDeckParser.FILE_VERSION
+
+    @staticmethod
+    def schedule_from_row(row) -> tuple:
+        """
+        Read the scheduling values of a flashcard row of a file of CsvDeckParser.SCHEDULED_FILE_VERSION.
+        :param [str] row: question, answer, last study date (empty if never studied), due date as YYYY-MM-DD,
+        inter-repetition interval, easiness factor, and repetition number
+        :return: (last_study_date, due_day, inter_repetition_interval, easiness_factor, repetition_number)
+        :rtype: tuple
+        :raises ValueError: If any of the values can not be read
+        """
+        last_study_date = None
+        if row[2] != "":
+            last_study_date = datetime.fromisoformat(row[2])
+        inter_repetition_interval = float(row[4])
+        # Intervals are whole days until the easiness factor is applied to them. Keep them as int in that case.
+        if inter_repetition_interval.is_integer():
+            inter_repetition_interval = int(inter_repetition_interval)
+        return (last_study_date,
+                Flashcard.day_number_from_string(row[3]),
+                inter_repetition_interval,
+                float(row[5]),
+                int(row[6]))
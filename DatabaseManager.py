@@ -23,133 +23,243 @@
 
 
 import sqlite3
-import os
+from collections import namedtuple
 from datetime import datetime
+from typing import Optional
 
+from ConnectionManager import ConnectionManager
 from Deck import Deck
 from Flashcard import Flashcard
+from FlashcardTextCache import FlashcardTextCache
+from Instrumentation import Instrumentation
+from ReviewWriter import ReviewWriter
+from SchemaMigrator import SchemaMigrator
+
+# Amount of due flashcards and of all flashcards of a deck. Returned by DatabaseManager.deck_summaries().
+DeckSummary = namedtuple("DeckSummary", ["deck_id", "due_count", "total_count"])
+
+# Counts of the whole database. Returned by DatabaseManager.collection_statistics().
+CollectionStatistics = namedtuple("CollectionStatistics", ["deck_count", "flashcard_count", "due_count",
+                                                           "due_within_a_week_count", "studied_count",
+                                                           "database_size"])
+
+# Reviews of one day. Returned by DatabaseManager.daily_review_statistics(). Averages are None without reviews.
+ReviewDay = namedtuple("ReviewDay", ["day", "review_count", "failed_count", "average_grade",
+                                     "average_response_milliseconds"])
+
+# One row of the review_log table. Returned by DatabaseManager.reviews_between().
+ReviewLogEntry = namedtuple("ReviewLogEntry", ["flashcard_id", "reviewed_at", "grade", "previous_interval",
+                                               "new_interval", "previous_easiness_factor", "new_easiness_factor",
+                                               "response_milliseconds"])
 
 
 class DatabaseManager:
     DB_PATH = "Flashcards.db"
 
-    def __init__(self):
+    # Columns of the flashcard table, in the order expected by flashcard_from_row()
+    FLASHCARD_COLUMNS = "flashcard_id, deck_id, question, answer, last_study_date, due_day, " \
+                        "inter_repetition_interval, easiness_factor, repetition_number"
+    FLASHCARD_COLUMNS_WITHOUT_TEXT = "flashcard_id, deck_id, NULL, NULL, last_study_date, due_day, " \
+                                     "inter_repetition_interval, easiness_factor, repetition_number"
+    # FLASHCARD_COLUMNS with the table name, for queries that join the flashcard table with flashcard_fts
+    QUALIFIED_FLASHCARD_COLUMNS = ", ".join("flashcard." + column.strip() for column in FLASHCARD_COLUMNS.split(","))
 
-        # Initialize a single sqlite3 connection. One and only one initialization.
-        self.db_connection: sqlite3.Connection = None
+    # Columns of the flashcard table that are exported, without and with the SM-2 scheduling values
+    EXPORT_COLUMNS = "question, answer"
+    SCHEDULED_EXPORT_COLUMNS = "question, answer, last_study_date, due_day, inter_repetition_interval, " \
+                               "easiness_factor, repetition_number"
+    # New flashcards are inserted in bulk through a temporary staging table of the connection. See
+    # insert_flashcards().
+    STAGED_FLASHCARD_TABLE_SQL = ''' CREATE TEMP TABLE IF NOT EXISTS staged_flashcard (
+                                        flashcard_id INTEGER PRIMARY KEY,
+                                        deck_id INTEGER,
+                                        question TEXT,
+                                        answer TEXT,
+                                        last_study_date timestamp,
+                                        due_day INTEGER,
+                                        inter_repetition_interval INTEGER,
+                                        easiness_factor REAL,
+                                        repetition_number INTEGER) '''
+    STAGE_FLASHCARD_SQL = "INSERT INTO temp.staged_flashcard VALUES(?,?,?,?,?,?,?,?,?)"
+
+    # Amount of rows fetched at a time by iterate_flashcard_rows()
+    EXPORT_BATCH_SIZE = 1000
+
+    # Default page size of search()
+    SEARCH_PAGE_SIZE = 50
+    # Weight of the question relative to the answer in the relevance of search results
+    SEARCH_QUESTION_WEIGHT = 2.0
+
+    # Reviews are kept one by one in the review_log table for this many days. Older ones are rolled up into daily
+    # totals by roll_up_review_log().
+    REVIEW_LOG_RETENTION_DAYS = 365
+
+    # Day number of the reviewed_at column of review_log. julianday('1970-01-01') is 2440587.5
+    REVIEW_DAY_SQL = "CAST(julianday(substr(reviewed_at, 1, 10)) - 2440587.5 AS INTEGER)"
+
+    def __init__(self, db_path=None, commit_policy=ConnectionManager.COMMIT_IMMEDIATE, defer_flashcard_text=False,
+                 instrumentation=None):
+        """
+        DatabaseManager is the model of the Program. It keeps the decks in memory, and reads and writes them from and
+        to the database.
+        :param Optional[str] db_path: Path of the database file. DatabaseManager.DB_PATH is used when it is None.
+        :param str commit_policy: Commit policy of the connection pool. See ConnectionManager.
+        :param bool defer_flashcard_text: True to keep only ids and scheduling values of loaded flashcards in memory.
+        Their question and answer are then fetched on demand through self.flashcard_text_cache.
+        :param Optional[Instrumentation] instrumentation: Records the latency of the public methods and of the SQL
+        statements. If it is None, it is created when the FLASHCARDS_INSTRUMENTATION environment variable is set.
+        See Instrumentation.from_environment().
+        """
+
+        self.db_path = db_path if db_path is not None else DatabaseManager.DB_PATH
 
-        # Initialize a single sqlite3 connection cursor. One and only one initialization.
+        # Opt-in timing of methods and SQL statements. Methods are wrapped before any of them is called.
+        if instrumentation is None:
+            instrumentation = Instrumentation.from_environment(self.db_path)
+        self.instrumentation = instrumentation
+        if self.instrumentation is not None:
+            self.instrumentation.instrument(self)
+
+        # Long-lived connections to the database. All database operations run through its transaction scopes.
+        # Write-ahead logging lets the Program read while ReviewWriter commits on its own thread.
+        self.connection_manager = ConnectionManager(self.db_path, commit_policy=commit_policy, journal_mode="WAL",
+                                                    instrumentation=self.instrumentation)
+
+        # Connection and cursor handed out by the open_db() compatibility shim. They are None when it is not in use.
+        self.db_connection: sqlite3.Connection = None
         self.cursor: sqlite3.Cursor = None
 
-        # Check if database exists. If it does not, create.
+        # Flag to check if db is open or not
+        self.is_database_open = False
+
+        # Creates the tables of a new database, and upgrades the schema of an existing database.
+        self.schema_migrator = SchemaMigrator(self.connection_manager)
+
+        # Check if database exists. If it does not, create. Bring its schema up to date in both cases.
         self.provide_db()
 
+        # True if the database has the full-text index of flashcards. Checked on first use by has_full_text_index().
+        self.full_text_index = None
+
+        # Question and answer of flashcards that are loaded without their text
+        self.defer_flashcard_text = defer_flashcard_text
+        self.flashcard_text_cache = FlashcardTextCache(self.connection_manager)
+
+        # Writes the results of study sessions in the background. Its thread is started by the first queued review.
+        # Reviews left in its journal by a crash are written to the database now.
+        self.review_writer = ReviewWriter(self.connection_manager, self.db_path + ".reviews-journal")
+        self.review_writer.replay_journal()
+
         # List of decks. It will be used everywhere in the Program for consistency.
         self.decks: [Deck.Deck] = []
 
         # Current deck. It will be used everywhere in the Program for consistency.
         self.deck: Deck.Deck = None
 
-        # Flag to check if db is open or not
-        self.is_database_open = False
-
         # Load all decks when Program starts
         self.load_all_decks()
 
     def open_db(self) -> None:
         """
-        Set connection and cursor attributes for database access.
+        Compatibility shim. Set connection and cursor attributes for database access by taking a connection from
+        self.connection_manager. New code should use "with self.connection_manager.transaction() as cursor:" instead.
+        Every open_db() call must be followed by a close_db() call.
         """
-        try:
-            self.db_connection = sqlite3.connect(DatabaseManager.DB_PATH,
-                                                 detect_types=sqlite3.PARSE_DECLTYPES | sqlite3.PARSE_COLNAMES)
-            self.cursor = self.db_connection.cursor()
-            self.is_database_open = True
-            # print("SQLite connection established.")
-        except sqlite3.Error as error:
-            print("Error while opening database: ", error)
+        if not self.is_database_open:
+            try:
+                self.db_connection = self.connection_manager.acquire()
+                if not self.db_connection.in_transaction:
+                    self.db_connection.execute("BEGIN")
+                self.cursor = self.db_connection.cursor()
+                self.is_database_open = True
+            except sqlite3.Error as error:
+                print("Error while opening database: ", error)
 
     def close_db(self) -> None:
         """
-        Commit changes to the database, close the cursor, and the connection.
+        Compatibility shim. Commit changes to the database, close the cursor, and give the connection back to
+        self.connection_manager. The connection itself stays open for later use.
         """
         if self.is_database_open:
             try:
                 self.db_connection.commit()
                 self.cursor.close()
-                self.db_connection.close()
-                self.is_database_open = False
             except sqlite3.ProgrammingError as programming_error:
                 print("Database is probably already closed: ", programming_error)
-            except sqlite3.error as error:
+            except sqlite3.Error as error:
                 print("Error in closing database: ", error)
-            # print("SQLite connection closed.")
+            finally:
+                self.connection_manager.release()
+                self.db_connection = None
+                self.is_database_open = False
 
-    def provide_db(self) -> None:
+    def close(self, roll_up=False) -> None:
         """
-        Check if database exists. If it does not, create.
+        Commit pending changes, and close all connections to the database. Called when the Program quits.
+        :param bool roll_up: True to roll up old reviews first, see roll_up_review_log(). It writes to the database, so
+        it is done when the Program window is closed, but not after the commands of cli.py that only read.
         """
-        should_create_tables = False
-        if not os.path.exists(DatabaseManager.DB_PATH):
-            # TODO: Find a better way to check if this is a valid database.
-            should_create_tables = True
-        try:
-            self.open_db()
-            # self.print_db_version()
-            if should_create_tables:
-                self.create_tables()
-            self.close_db()
-        except sqlite3.Error as error:
-            print("Error while connecting to sqlite", error)
-        finally:
-            if self.db_connection:
-                self.db_connection.close()
-            # print("SQLite connection closed.")
+        self.review_writer.close()
+        write_error = self.review_writer.take_write_error()
+        if write_error is not None:
+            # The reviews stay in the journal, and they are written the next time the database is opened.
+            print("Error in closing the review writer: ", write_error)
+        if roll_up:
+            try:
+                self.roll_up_review_log()
+            except sqlite3.Error as error:
+                print("Error in rolling up the review log: ", error)
+        self.close_db()
+        self.connection_manager.close_all()
+        if self.instrumentation is not None:
+            self.instrumentation.close()
 
-    def create_tables(self) -> None:
+    def flush_pending_writes(self) -> None:
         """
-        Create SQLite tables in database
+        Block until every review queued by queue_flashcard_review() has been committed to the database. Called when a
+        study session ends, and before flashcards are read from the database. It does not fail if some reviews could
+        not be written; see take_review_write_error().
         """
-        try:
-            cursor = self.db_connection.cursor()
+        self.review_writer.flush()
 
-            cursor.execute("""
-            CREATE TABLE IF NOT EXISTS deck (
-            deck_id INTEGER PRIMARY KEY, 
-            title TEXT NOT NULL, 
-            last_study_datetime timestamp ) 
-            """)
+    def take_review_write_error(self) -> Optional[str]:
+        """
+        :return: Description of the reviews that could not be written to the database, once per failure, or None
+        :rtype: Optional[str]
+        """
+        return self.review_writer.take_write_error()
 
-            cursor.execute("""
-            CREATE TABLE IF NOT EXISTS flashcard (
-            flashcard_id INTEGER PRIMARY KEY, 
-            deck_id INTEGER NOT NULL, 
-            question TEXT NOT NULL, 
-            answer TEXT NOT NULL,
-            last_study_date timestamp, 
-            due_date_string TEXT,
-            inter_repetition_interval INTEGER,
-            easiness_factor REAL,
-            repetition_number INTEGER, 
-            FOREIGN KEY (deck_id) REFERENCES deck (deck_id) )
-            """)
-
-            # print("SQLite tables have been created.")
+    def reload_database(self) -> None:
+        """
+        Forget everything that has been read from the database, and load the decks again. Called after the contents of
+        the database file have been replaced, e.g. by BackupManager.restore_backup(). The schema is upgraded first, in
+        case the new contents come from an older version of the Program.
+        """
+        self.provide_db()
+        self.full_text_index = None
+        self.flashcard_text_cache.clear()
+        self.deck = None
+        self.load_all_decks()
 
+    def provide_db(self) -> None:
+        """
+        Create the database if it does not exist, and upgrade its schema to the latest version.
+        """
+        try:
+            # self.print_db_version()
+            self.schema_migrator.migrate()
         except sqlite3.Error as error:
-            print("Error while creating tables", error)
+            print("Error while connecting to sqlite", error)
 
     def print_db_version(self) -> None:
         """
         Print database version for debugging.
         """
-        if self.cursor is not None:
-            sqlite_select_query = "select sqlite_version();"
-            self.cursor.execute(sqlite_select_query)
-            record = self.cursor.fetchall()
-            print("SQLite Database Version is: ", record)
-        else:
-            print("DEBUG: print_db_version failed because self.cursor is None.")
+        sqlite_select_query = "select sqlite_version();"
+        with self.connection_manager.transaction() as cursor:
+            cursor.execute(sqlite_select_query)
+            record = cursor.fetchall()
+        print("SQLite Database Version is: ", record)
 
     def add_new_deck_to_db(self, deck_title, last_study_datetime=None) -> int:
         """
@@ -161,17 +271,17 @@ class DatabaseManager:
         :return: Will be used as deck.deck_id
         :rtype: int
         """
-        self.open_db()
         deck_row_tuple = (deck_title, last_study_datetime)
         # deck_id will be added by SQLite automatically because it is defined as INTEGER PRIMARY KEY.
         # For more info: https://www.sqlite.org/autoinc.html
         sql = ''' INSERT INTO deck(title, last_study_datetime)
                       VALUES(?, ?) '''
-        self.cursor.execute(sql, deck_row_tuple)
-        self.close_db()
-        return self.cursor.lastrowid
+        with self.connection_manager.transaction() as cursor:
+            cursor.execute(sql, deck_row_tuple)
+            deck_id = cursor.lastrowid
+        return deck_id
 
-    def add_new_flashcard_to_db(self, deck_id, question, answer, last_study_date, due_date_string) -> int:
+    def add_new_flashcard_to_db(self, deck_id, question, answer, last_study_date, due_day) -> int:
         """
         Adds a new flashcard data to the database.
         :param deck_id: Flashcard's parent deck's deck.id
@@ -182,100 +292,231 @@ class DatabaseManager:
         :type answer: str
         :param last_study_date: Will be used as flashcard's last_study_date property
         :type last_study_date: datetime
-        :param due_date_string: When this flashcard will be due. As strftime('%Y-%m-%d').
-        :type due_date_string: str
+        :param due_day: When this flashcard will be due. As day number, see Flashcard.day_number().
+        :type due_day: int
         :return: flashcard's flashcard_id
         :rtype: int
         """
-        self.open_db()
         inter_repetition_interval = 0
         easiness_factor = 0
         repetition_number = 0
-        flashcard_row_tuple = (deck_id, question, answer, last_study_date, due_date_string, inter_repetition_interval,
+        flashcard_row_tuple = (deck_id, question, answer, last_study_date, due_day, inter_repetition_interval,
                                easiness_factor, repetition_number)
-        sql = ''' INSERT INTO flashcard(deck_id, question, answer, last_study_date, due_date_string, 
+        sql = ''' INSERT INTO flashcard(deck_id, question, answer, last_study_date, due_day, 
                                 inter_repetition_interval, easiness_factor, repetition_number)
                       VALUES(?,?,?,?,?,?,?,?) '''
-        self.cursor.execute(sql, flashcard_row_tuple)
-        self.close_db()
+        with self.connection_manager.transaction() as cursor:
+            cursor.execute(sql, flashcard_row_tuple)
+            flashcard_id = cursor.lastrowid
 
         # self.print_all_flashcards()
 
-        return self.cursor.lastrowid
+        return flashcard_id
+
+    def add_flashcards_bulk(self, deck_id, rows, due_day=None) -> [int]:
+        """
+        Adds many new flashcards to a deck in the database in a single transaction.
+        The flashcard_ids are assigned explicitly inside the transaction, which holds the write lock from its
+        beginning, so that they can be returned without a round trip per row.
+        :param deck_id: Flashcards' parent deck's deck.id
+        :type deck_id: int
+        :param rows: (question, answer) tuples of new flashcards, or (question, answer, last_study_date, due_day,
+        inter_repetition_interval, easiness_factor, repetition_number) tuples of flashcards that keep their schedule
+        :type rows: [tuple]
+        :param due_day: When the flashcards without a schedule will be due. As day number, see Flashcard.day_number().
+        Today if it is None.
+        :type due_day: Optional[int]
+        :return: flashcard_ids of the new flashcards, in the order of rows
+        :rtype: [int]
+        """
+        if due_day is None:
+            due_day = Flashcard.today_day_number()
+        rows = list(rows)
+        with self.connection_manager.transaction(immediate=True) as cursor:
+            last_flashcard_id = cursor.execute("SELECT IFNULL(MAX(flashcard_id), 0) FROM flashcard").fetchone()[0]
+            flashcard_ids = list(range(last_flashcard_id + 1, last_flashcard_id + 1 + len(rows)))
+            DatabaseManager.insert_flashcards(cursor,
+                                              DatabaseManager.flashcard_parameters(flashcard_ids, deck_id, rows, due_day))
+        return flashcard_ids
+
+    def add_decks_bulk(self, decks, due_day=None) -> [(int, str)]:
+        """
+        Adds many new decks with their flashcards to the database in a single transaction. Every deck is added in a
+        savepoint of its own, so a deck that can not be added does not keep the others from being added.
+        :param decks: (title, rows) tuples, where rows are flashcard rows as accepted by add_flashcards_bulk()
+        :type decks: [(str, [tuple])]
+        :param due_day: When the flashcards without a schedule will be due. As day number. Today if it is None.
+        :type due_day: Optional[int]
+        :return: (deck_id, None) tuple for every added deck, and (None, error) tuple for every deck that could not be
+        added, in the order of decks
+        :rtype: [(Optional[int], Optional[str])]
+        """
+        if due_day is None:
+            due_day = Flashcard.today_day_number()
+        results = []
+        with self.connection_manager.transaction(immediate=True) as cursor:
+            last_flashcard_id = cursor.execute("SELECT IFNULL(MAX(flashcard_id), 0) FROM flashcard").fetchone()[0]
+            for title, rows in decks:
+                cursor.execute("SAVEPOINT add_deck")
+                try:
+                    cursor.execute("INSERT INTO deck(title, last_study_datetime) VALUES(?, ?)", (title, None))
+                    deck_id = cursor.lastrowid
+                    flashcard_ids = range(last_flashcard_id + 1, last_flashcard_id + 1 + len(rows))
+                    DatabaseManager.insert_flashcards(cursor, DatabaseManager.flashcard_parameters(flashcard_ids, deck_id,
+                                                                                                   rows, due_day))
+                    cursor.execute("RELEASE add_deck")
+                    last_flashcard_id += len(rows)
+                    results.append((deck_id, None))
+                except sqlite3.Error as error:
+                    print("Error in add_decks_bulk(): ", error)
+                    cursor.execute("ROLLBACK TO add_deck")
+                    cursor.execute("RELEASE add_deck")
+                    results.append((None, str(error)))
+        return results
+
+    @staticmethod
+    def insert_flashcards(cursor, parameters) -> None:
+        """
+        Insert many new flashcards with a single INSERT statement.
+        The rows are staged in a temporary table with executemany() first. Every statement that writes the full-text
+        index makes it flush its pending changes, so inserting the rows one statement at a time would write the index
+        once per flashcard through its insert trigger. Staging makes imports several times faster.
+        :param sqlite3.Cursor cursor: Cursor of an open transaction
+        :param parameters: Values of all columns of the flashcard table for every new flashcard, in the order of the
+        columns. See flashcard_parameters().
+        :type parameters: Iterable[tuple]
+        """
+        cursor.execute(DatabaseManager.STAGED_FLASHCARD_TABLE_SQL)
+        cursor.executemany(DatabaseManager.STAGE_FLASHCARD_SQL, parameters)
+        cursor.execute("""
+                       INSERT INTO flashcard(flashcard_id, deck_id, question, answer, last_study_date, due_day,
+                                             inter_repetition_interval, easiness_factor, repetition_number)
+                       SELECT flashcard_id, deck_id, question, answer, last_study_date, due_day,
+                              inter_repetition_interval, easiness_factor, repetition_number
+                       FROM temp.staged_flashcard
+                       ORDER BY flashcard_id
+                       """)
+        cursor.execute("DELETE FROM temp.staged_flashcard")
+
+    @staticmethod
+    def flashcard_parameters(flashcard_ids, deck_id, rows, due_day):
+        """
+        :param flashcard_ids: flashcard_ids of the new flashcards, in the order of rows
+        :type flashcard_ids: Iterable[int]
+        :param int deck_id: deck_id of their Deck
+        :param rows: Flashcard rows as accepted by add_flashcards_bulk()
+        :type rows: [tuple]
+        :param int due_day: Due date of the flashcards without a schedule as day number
+        :return: Values of all columns of the flashcard table for every row, in the order of the columns
+        :rtype: Iterator[tuple]
+        """
+        # Scheduling values of the rows that consist of question and answer only
+        new_schedule = (None, due_day, 0, 0, 0)
+        for flashcard_id, row in zip(flashcard_ids, rows):
+            yield (flashcard_id, deck_id) + tuple(row) + new_schedule[len(row) - 2:]
 
     def load_all_decks(self) -> None:
         """
         Load all decks from database during initialization, so that Program can use this data.
+        Only a summary of each deck is loaded, with the amount of its flashcards and due flashcards, in one aggregate
+        query. Flashcards of a deck are loaded the first time they are accessed. See Deck.flashcards.
         """
         # print()
         # print("load_all_decks:")
-        self.open_db()
-        self.cursor.execute("SELECT * FROM deck")
-        temp_decks = self.cursor.fetchall()
+        self.flush_pending_writes()
+        parameter = (Flashcard.today_day_number(),)
+        with self.connection_manager.transaction() as cursor:
+            cursor.execute("""
+                           SELECT deck.deck_id, deck.title, deck.last_study_datetime,
+                                  COUNT(flashcard.flashcard_id),
+                                  IFNULL(SUM(flashcard.due_day <= ?), 0)
+                           FROM deck
+                           LEFT JOIN flashcard ON flashcard.deck_id = deck.deck_id
+                           GROUP BY deck.deck_id
+                           ORDER BY deck.deck_id
+                           """, parameter)
+            temp_decks = cursor.fetchall()
         self.decks = []
         for deck in temp_decks:
             deck_id = deck[0]
             deck_title = deck[1]
             last_study_datetime = deck[2]
             # print("Loaded deck ID:", deck_id, "title:", deck_title, "Last study:", deck[2])
-            deck = Deck(deck_id, deck_title, last_study_datetime)
+            deck = Deck(deck_id, deck_title, last_study_datetime, database_manager=self,
+                        flashcard_count=deck[3], due_flashcard_count=deck[4])
             self.decks.append(deck)
-            self.load_flashcards(deck)
-        self.close_db()
-        if len(self.decks) > 0:
-            self.load_deck(0)
+        self.set_first_deck_as_the_current_deck_if_possible()
         # print()
 
+    def deck_summaries(self) -> {int: DeckSummary}:
+        """
+        Count due flashcards and all flashcards of every deck with a single GROUP BY query. The query is answered from
+        the (deck_id, due_day) index without reading the flashcard rows.
+        Decks without flashcards are not included in the result.
+        :return: DeckSummary objects keyed by deck_id
+        :rtype: {int: DeckSummary}
+        """
+        self.flush_pending_writes()
+        parameter = (Flashcard.today_day_number(),)
+        with self.connection_manager.transaction() as cursor:
+            results = cursor.execute("""
+                                     SELECT deck_id, SUM(due_day <= ?), COUNT(*)
+                                     FROM flashcard
+                                     GROUP BY deck_id
+                                     """, parameter).fetchall()
+        summaries = dict()
+        for deck_id, due_count, total_count in results:
+            summaries[deck_id] = DeckSummary(deck_id, due_count, total_count)
+        return summaries
+
     def load_deck(self, deck_index: int) -> None:
         """
-        Load all flashcards of the deck.
+        Make the deck the current deck. Its flashcards are loaded from the database the first time deck.flashcards
+        is accessed, and they are kept afterwards, since they are updated in memory as they are studied.
         :param deck_index: deck's index in self.decks list
         :type deck_index: int
         """
         self.deck = self.decks[deck_index]
-        self.load_flashcards(self.deck)
 
     def load_flashcards(self, deck: Deck) -> None:
         """
         Load flashcards of the given deck from the database, and add them to the self.flashcards list of each deck
-        that is a member of self.decks list.
+        that is a member of self.decks list. Due flashcards of the deck that have already been loaded are reused, so
+        that there is only one Flashcard object per flashcard.
         :param deck: Parent of the flashcards to be loaded
         :type deck: Deck object
         """
         # self.print_all_flashcards()
-        self.open_db()
-        deck.flashcards = []
+        self.flush_pending_writes()
+        loaded_flashcards = {flashcard.flashcard_id: flashcard for flashcard in deck.due_flashcards}
         parameter = (deck.deck_id,)
-        results = self.cursor.execute("SELECT * FROM flashcard WHERE deck_id == ?", parameter)
+        with self.connection_manager.transaction() as cursor:
+            results = cursor.execute("SELECT {} FROM flashcard WHERE deck_id == ? ORDER BY flashcard_id".format(
+                                     self.resident_flashcard_columns()), parameter).fetchall()
         # print("Deck title: ", deck.title, "Last study: ", deck.last_study_datetime)
         # print("Loaded flashcards: \n", results)
+        # Every flashcard in the database is loaded. Deck.MAXIMUM_AMOUNT_OF_FLASHCARDS limits only adding new ones,
+        # so a deck that is larger than the current limit is never truncated.
+        flashcards = []
         for result in results:
             # print(result)
-            flashcard_id = result[0]
-            deck_id = result[1]
-            question = result[2]
-            answer = result[3]
-            last_study_date = result[4]
-            due_date_string = result[5]
-            inter_repetition_interval = result[6]
-            easiness_factor = result[7]
-            repetition_number = result[8]
-            # print("load_flashcards Flashcard id:", flashcard_id, " deck id:", deck_id, " question:", question, " answer:", answer,
-            #       " laststudy:", last_study_date, " due_date_string:", due_date_string, " inter_repetition_interval:",
-            #       inter_repetition_interval, " easiness_factor:", easiness_factor, " repetition_number:",
-            #       repetition_number)
-            flashcard = Flashcard(flashcard_id=flashcard_id,
-                                  deck_id=deck_id,
-                                  question=question,
-                                  answer=answer,
-                                  last_study_date=last_study_date,
-                                  due_date_string=due_date_string,
-                                  inter_repetition_interval=inter_repetition_interval,
-                                  easiness_factor=easiness_factor,
-                                  repetition_number=repetition_number)
-            # print()
-            deck.append_to_flashcards(flashcard)
-        self.close_db()
+            flashcard = loaded_flashcards.get(result[0])
+            if flashcard is None:
+                flashcard = self.flashcard_from_row(result)
+            flashcards.append(flashcard)
+        deck.flashcards = flashcards
+
+    def resident_flashcard_columns(self) -> str:
+        """
+        Columns of the flashcard table that are selected when flashcards are loaded to stay in memory. If
+        self.defer_flashcard_text is True, question and answer are selected as NULL, and they are fetched through
+        self.flashcard_text_cache when they are used.
+        :return: Column list of a SELECT statement, in the order expected by self.flashcard_from_row()
+        :rtype: str
+        """
+        if self.defer_flashcard_text:
+            return DatabaseManager.FLASHCARD_COLUMNS_WITHOUT_TEXT
+        return DatabaseManager.FLASHCARD_COLUMNS
 
     def today_as_string(self):
         """
@@ -289,51 +530,301 @@ class DatabaseManager:
     def load_due_flashcards(self, deck: Deck) -> None:
         """
         Fetch all due flashcards and only due flashcards of the given Deck object from the database
-        by comparing due_date_string column in the database with the due_date_string attribute of
-        Flashcard objects. A string comparison will be performed.
+        by comparing due_day column in the database with today's day number.
+        If flashcards of the deck are already in memory, due flashcards are picked from them instead of loading
+        copies from the database.
         :param deck: Deck object
         :type deck: Deck
         """
-        self.open_db()
+        self.flush_pending_writes()
+        today_day = Flashcard.today_day_number()
+        if deck.is_loaded():
+            deck.due_flashcards = [flashcard for flashcard in deck.flashcards if flashcard.due_day <= today_day]
+            return
         deck.due_flashcards = []
-        today_string = self.today_as_string()
-        parameter = (deck.deck_id, today_string)
-        # Due date is stored as str in the db. We make a string comparison to find due flashcards.
-        results = self.cursor.execute("""
-                                    SELECT * 
+        parameter = (deck.deck_id, today_day)
+        # Due date is stored as day number in the db. We make an integer comparison to find due flashcards.
+        with self.connection_manager.transaction() as cursor:
+            results = cursor.execute("""
+                                    SELECT {} 
                                     FROM flashcard 
                                     WHERE deck_id == ? AND
-                                    due_date_string <= ?
-                                        """, parameter)
+                                    due_day <= ?
+                                    ORDER BY flashcard_id
+                                        """.format(self.resident_flashcard_columns()), parameter).fetchall()
         # print("Deck title: ", deck.title, "Last study: ", deck.last_study_datetime)
         # print("Loaded flashcards: \n", results)
         for result in results:
-            # print(result)
-            flashcard_id = result[0]
-            deck_id = result[1]
-            question = result[2]
-            answer = result[3]
-            last_study_date = result[4]
-            due_date_string = result[5]
-            inter_repetition_interval = result[6]
-            easiness_factor = result[7]
-            repetition_number = result[8]
-            # print("Due Flashcard id:", flashcard_id, " deck id:", deck_id, " question:", question, " answer:", answer,
-            #       " laststudy:", last_study_date, " last_study_date type:", type(last_study_date), " duedate:",
-            #       due_date_string, " due_date_string type:", type(due_date_string), " inter_repetition_interval:",
-            #       inter_repetition_interval, " easiness_factor:", easiness_factor, " repetition_number:",
-            #       repetition_number)
-            flashcard = Flashcard(flashcard_id=flashcard_id,
-                                  deck_id=deck_id,
-                                  question=question,
-                                  answer=answer,
-                                  last_study_date=last_study_date,
-                                  due_date_string=due_date_string,
-                                  inter_repetition_interval=inter_repetition_interval,
-                                  easiness_factor=easiness_factor,
-                                  repetition_number=repetition_number)
-            deck.due_flashcards.append(flashcard)
-        self.close_db()
+            deck.due_flashcards.append(self.flashcard_from_row(result))
+
+    def count_flashcards(self, deck_id) -> int:
+        """
+        Count the flashcards of a deck in the database without loading them.
+        :param int deck_id: deck_id of the Deck
+        :return: Amount of flashcards of the deck
+        :rtype: int
+        """
+        with self.connection_manager.transaction() as cursor:
+            result = cursor.execute("SELECT COUNT(*) FROM flashcard WHERE deck_id = ?", (deck_id,)).fetchone()
+        return result[0]
+
+    def load_flashcards_after(self, deck_id, flashcard_id, limit) -> [Flashcard]:
+        """
+        Load one page of the flashcards of a deck, ordered by flashcard_id like self.load_flashcards(), starting
+        after a known flashcard. The page is found in the deck index by key, so its cost does not depend on how deep
+        in the deck it is. Used by DeckPager. The returned Flashcard objects are not added to the deck.
+        The scheduling attributes of the returned objects may be behind the reviews that are still in the write-behind
+        queue; only question and answer should be relied on.
+        :param int deck_id: deck_id of the Deck
+        :param int flashcard_id: flashcard_id of the flashcard before the page, or 0 for the first page
+        :param int limit: Maximum amount of flashcards in the page
+        :return: Flashcards of the page
+        :rtype: [Flashcard]
+        """
+        with self.connection_manager.transaction() as cursor:
+            results = cursor.execute("""
+                                    SELECT {}
+                                    FROM flashcard
+                                    WHERE deck_id = ? AND flashcard_id > ?
+                                    ORDER BY flashcard_id
+                                    LIMIT ?
+                                        """.format(DatabaseManager.FLASHCARD_COLUMNS),
+                                     (deck_id, flashcard_id, limit)).fetchall()
+        return [self.flashcard_from_row(result) for result in results]
+
+    def load_flashcards_before(self, deck_id, flashcard_id, limit) -> [Flashcard]:
+        """
+        Like self.load_flashcards_after(), for the page that ends before a known flashcard.
+        :param int deck_id: deck_id of the Deck
+        :param int flashcard_id: flashcard_id of the flashcard after the page
+        :param int limit: Maximum amount of flashcards in the page
+        :return: Flashcards of the page, ordered by flashcard_id
+        :rtype: [Flashcard]
+        """
+        with self.connection_manager.transaction() as cursor:
+            results = cursor.execute("""
+                                    SELECT {}
+                                    FROM flashcard
+                                    WHERE deck_id = ? AND flashcard_id < ?
+                                    ORDER BY flashcard_id DESC
+                                    LIMIT ?
+                                        """.format(DatabaseManager.FLASHCARD_COLUMNS),
+                                     (deck_id, flashcard_id, limit)).fetchall()
+        results.reverse()
+        return [self.flashcard_from_row(result) for result in results]
+
+    def flashcard_id_at_position(self, deck_id, position) -> Optional[int]:
+        """
+        Find the flashcard at an index of the deck, in the order of self.load_flashcards_after(). Only the deck index
+        is read, not the flashcard rows, so it is fast even deep in a large deck.
+        :param int deck_id: deck_id of the Deck
+        :param int position: Index of the flashcard in the deck
+        :return: flashcard_id of the flashcard, or None if the deck does not have that many flashcards
+        :rtype: Optional[int]
+        """
+        with self.connection_manager.transaction() as cursor:
+            result = cursor.execute("""
+                                    SELECT flashcard_id
+                                    FROM flashcard
+                                    WHERE deck_id = ?
+                                    ORDER BY flashcard_id
+                                    LIMIT 1 OFFSET ?
+                                    """, (deck_id, position)).fetchone()
+        return None if result is None else result[0]
+
+    def load_flashcard(self, flashcard_id) -> Optional[Flashcard]:
+        """
+        Load a single flashcard by its flashcard_id. The returned Flashcard object is not added to its deck.
+        :param int flashcard_id: flashcard_id of the Flashcard
+        :return: Flashcard, or None if there is not any flashcard with that flashcard_id
+        :rtype: Optional[Flashcard]
+        """
+        with self.connection_manager.transaction() as cursor:
+            result = cursor.execute("SELECT {} FROM flashcard WHERE flashcard_id = ?".format(
+                                    DatabaseManager.FLASHCARD_COLUMNS), (flashcard_id,)).fetchone()
+        return None if result is None else self.flashcard_from_row(result)
+
+    def iterate_flashcard_rows(self, deck_id, include_schedule=False, batch_size=EXPORT_BATCH_SIZE):
+        """
+        Read the flashcards of a deck from the database as a stream, ordered by flashcard_id. Rows are fetched from
+        one cursor batch_size at a time with fetchmany(), so memory use does not grow with the size of the deck, and
+        the deck does not have to be loaded. The rows come from a single read transaction, so they are consistent
+        even if the deck is changed while they are being read.
+        Reviews waiting in the write-behind queue are written first, so that the scheduling values are up to date.
+        :param int deck_id: deck_id of the Deck
+        :param bool include_schedule: True to read the columns of DatabaseManager.SCHEDULED_EXPORT_COLUMNS, False to
+        read question and answer only
+        :param int batch_size: Amount of rows fetched at a time
+        :return: Generator of lists of at most batch_size row tuples
+        :rtype: Iterator[[tuple]]
+        """
+        self.flush_pending_writes()
+        columns = DatabaseManager.SCHEDULED_EXPORT_COLUMNS if include_schedule else DatabaseManager.EXPORT_COLUMNS
+        with self.connection_manager.transaction() as cursor:
+            cursor.execute("SELECT {} FROM flashcard WHERE deck_id = ? ORDER BY flashcard_id".format(columns),
+                           (deck_id,))
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if len(rows) == 0:
+                    break
+                yield rows
+
+    def count_duplicate_questions(self, deck_id) -> int:
+        """
+        :param int deck_id: deck_id of the Deck
+        :return: Amount of flashcards of the deck whose question is the same as the question of another flashcard of
+        the deck that comes before it
+        :rtype: int
+        """
+        with self.connection_manager.transaction() as cursor:
+            result = cursor.execute("SELECT COUNT(*) - COUNT(DISTINCT question) FROM flashcard WHERE deck_id = ?",
+                                    (deck_id,)).fetchone()
+        return result[0]
+
+    def flashcard_position(self, deck_id, flashcard_id) -> int:
+        """
+        Find the index of a flashcard in the deck, in the order of self.load_flashcards_after().
+        :param int deck_id: deck_id of the Deck
+        :param int flashcard_id: flashcard_id of the Flashcard
+        :return: Amount of flashcards of the deck that come before the flashcard
+        :rtype: int
+        """
+        with self.connection_manager.transaction() as cursor:
+            result = cursor.execute("SELECT COUNT(*) FROM flashcard WHERE deck_id = ? AND flashcard_id < ?",
+                                    (deck_id, flashcard_id)).fetchone()
+        return result[0]
+
+    def has_full_text_index(self) -> bool:
+        """
+        :return: True if the database has the flashcard_fts full-text index. It is missing if SQLite has been
+        compiled without FTS5. See SchemaMigrator.add_full_text_search_index().
+        :rtype: bool
+        """
+        if self.full_text_index is None:
+            with self.connection_manager.transaction() as cursor:
+                result = cursor.execute("SELECT COUNT(*) FROM sqlite_master WHERE name = 'flashcard_fts'").fetchone()
+            self.full_text_index = result[0] > 0
+        return self.full_text_index
+
+    @staticmethod
+    def search_terms(query) -> [str]:
+        """
+        :param str query: Search text typed by the user
+        :return: Words of the query
+        :rtype: [str]
+        """
+        return query.split()
+
+    @staticmethod
+    def full_text_query(terms) -> str:
+        """
+        Create an FTS5 MATCH expression that finds flashcards containing all terms. The last term, which the user may
+        still be typing, also matches words that start with it, if it has at least two characters. Prefix queries of
+        the other terms would only make the search slower. Terms are quoted, so characters that have a meaning in
+        the FTS5 query syntax are searched as they are.
+        :param [str] terms: Words of the query
+        :return: FTS5 query
+        :rtype: str
+        """
+        quoted_terms = ['"{}"'.format(term.replace('"', '""')) for term in terms]
+        if len(terms[-1]) >= 2:
+            quoted_terms[-1] += "*"
+        return " ".join(quoted_terms)
+
+    def search_conditions(self, terms, deck_id) -> (str, str, tuple):
+        """
+        Create the FROM and WHERE clauses of a search, using the full-text index if the database has it, and LIKE
+        otherwise.
+        :param [str] terms: Words of the query. It must not be empty.
+        :param Optional[int] deck_id: deck_id of the Deck to search in. All decks are searched if it is None.
+        :return: (FROM clause, WHERE clause, parameters)
+        :rtype: (str, str, tuple)
+        """
+        if self.has_full_text_index():
+            # CROSS JOIN keeps the full-text index as the outer loop. Otherwise, with a deck_id condition, SQLite may
+            # scan the deck and run the MATCH once for every flashcard of it.
+            from_clause = "flashcard_fts CROSS JOIN flashcard ON flashcard.flashcard_id = flashcard_fts.rowid"
+            where_clause = "flashcard_fts MATCH ?"
+            parameters = (DatabaseManager.full_text_query(terms),)
+        else:
+            from_clause = "flashcard"
+            conditions = []
+            parameters = ()
+            for term in terms:
+                pattern = "%" + term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+                conditions.append("(question LIKE ? ESCAPE '\\' OR answer LIKE ? ESCAPE '\\')")
+                parameters += (pattern, pattern)
+            where_clause = " AND ".join(conditions)
+        if deck_id is not None:
+            where_clause += " AND flashcard.deck_id = ?"
+            parameters += (int(deck_id),)
+        return from_clause, where_clause, parameters
+
+    def search(self, query, deck_id=None, limit=SEARCH_PAGE_SIZE, offset=0) -> [Flashcard]:
+        """
+        Find flashcards whose question or answer contain all words of the query. See full_text_query(). With the
+        full-text index, results are ranked by relevance (bm25), and a word in the question counts more than a word
+        in the answer. Without it, every word is searched with LIKE anywhere in the texts, and results are in
+        flashcard_id order.
+        The returned Flashcard objects are not added to their decks. Like in self.load_flashcards_after(), only their
+        question and answer should be relied on.
+        :param str query: Search text typed by the user
+        :param Optional[int] deck_id: deck_id of the Deck to search in. All decks are searched if it is None.
+        :param int limit: Maximum amount of results, i.e. page size
+        :param int offset: Amount of results to skip, i.e. page number times page size
+        :return: One page of the results, best match first
+        :rtype: [Flashcard]
+        """
+        terms = DatabaseManager.search_terms(query)
+        if len(terms) == 0:
+            return []
+        from_clause, where_clause, parameters = self.search_conditions(terms, deck_id)
+        if self.has_full_text_index():
+            order_clause = "bm25(flashcard_fts, {}, 1.0)".format(DatabaseManager.SEARCH_QUESTION_WEIGHT)
+        else:
+            order_clause = "flashcard.flashcard_id"
+        sql = "SELECT {} FROM {} WHERE {} ORDER BY {} LIMIT ? OFFSET ?".format(
+            DatabaseManager.QUALIFIED_FLASHCARD_COLUMNS, from_clause, where_clause, order_clause)
+        with self.connection_manager.transaction() as cursor:
+            results = cursor.execute(sql, parameters + (int(limit), int(offset))).fetchall()
+        return [self.flashcard_from_row(result) for result in results]
+
+    def count_search_results(self, query, deck_id=None) -> int:
+        """
+        :param str query: Search text typed by the user
+        :param Optional[int] deck_id: deck_id of the Deck to search in. All decks are searched if it is None.
+        :return: Amount of flashcards that self.search() finds for the query
+        :rtype: int
+        """
+        terms = DatabaseManager.search_terms(query)
+        if len(terms) == 0:
+            return 0
+        from_clause, where_clause, parameters = self.search_conditions(terms, deck_id)
+        with self.connection_manager.transaction() as cursor:
+            result = cursor.execute("SELECT COUNT(*) FROM {} WHERE {}".format(from_clause, where_clause),
+                                    parameters).fetchone()
+        return result[0]
+
+    def flashcard_from_row(self, row) -> Flashcard:
+        """
+        Create a Flashcard object from a row of the flashcard table selected with DatabaseManager.FLASHCARD_COLUMNS,
+        DatabaseManager.FLASHCARD_COLUMNS_WITHOUT_TEXT or DatabaseManager.QUALIFIED_FLASHCARD_COLUMNS.
+        :param tuple row: (flashcard_id, deck_id, question, answer, last_study_date, due_day,
+        inter_repetition_interval, easiness_factor, repetition_number). due_day is the due date as an int day number,
+        see Flashcard.day_number(). question and answer are None if they are fetched through self.flashcard_text_cache.
+        :return: New Flashcard object
+        :rtype: Flashcard
+        """
+        return Flashcard(flashcard_id=row[0],
+                         deck_id=row[1],
+                         question=row[2],
+                         answer=row[3],
+                         last_study_date=row[4],
+                         due_day=row[5],
+                         inter_repetition_interval=row[6],
+                         easiness_factor=row[7],
+                         repetition_number=row[8],
+                         text_cache=self.flashcard_text_cache)
 
     def update_deck_in_db(self, deck_id, title, last_study_datetime) -> None:
         """
@@ -346,17 +837,16 @@ class DatabaseManager:
         :param datetime last_study_datetime: Deck's last_study_daytime attribute.
         :type last_study_datetime: datetime
         """
-        self.open_db()
-        # self.db_connection.set_trace_callback(print)
+        # self.connection_manager.acquire().set_trace_callback(print)
         deck_row_tuple = (title, last_study_datetime, int(deck_id))
         sql = ''' UPDATE deck
                     SET title = ? , 
                     last_study_datetime = ?
                     WHERE deck_id = ? '''
-        self.cursor.execute(sql, deck_row_tuple)
-        self.close_db()
+        with self.connection_manager.transaction() as cursor:
+            cursor.execute(sql, deck_row_tuple)
 
-    def update_flashcard_in_db(self, flashcard_id, question, answer, last_study_date, due_date_string,
+    def update_flashcard_in_db(self, flashcard_id, question, answer, last_study_date, due_day,
                                inter_repetition_interval, easiness_factor, repetition_number) -> None:
         """
         Update values in Flashcard table in the db.
@@ -368,8 +858,8 @@ class DatabaseManager:
         :type answer: str
         :param last_study_date: Value for last_study_date column
         :type last_study_date: datetime
-        :param due_date_string: Value for due_date_string column
-        :type due_date_string: str
+        :param due_day: Value for due_day column
+        :type due_day: int
         :param inter_repetition_interval: Value for inter_repetition_interval column
         :type inter_repetition_interval: int
         :param easiness_factor: Value for easiness_factor column
@@ -377,36 +867,304 @@ class DatabaseManager:
         :param repetition_number: Value for repetition_number column
         :type repetition_number: int
         """
-        self.open_db()
-        # self.db_connection.set_trace_callback(print)
-        flashcard_row_tuple = (question, answer, last_study_date, due_date_string,
+        # A queued review of the flashcard must not overwrite this update later.
+        self.flush_pending_writes()
+        flashcard_row_tuple = (question, answer, last_study_date, due_day,
                                inter_repetition_interval, easiness_factor, repetition_number,
                                int(flashcard_id))
         sql = ''' UPDATE flashcard
                             SET question = ? ,
                                 answer = ?,
                                 last_study_date = ?, 
-                                due_date_string = ?,
+                                due_day = ?,
                                 inter_repetition_interval = ?, 
                                 easiness_factor = ?, 
                                 repetition_number = ?
                             WHERE flashcard_id = ? '''
-        self.cursor.execute(sql, flashcard_row_tuple)
-        self.close_db()
+        with self.connection_manager.transaction() as cursor:
+            cursor.execute(sql, flashcard_row_tuple)
+        self.flashcard_text_cache.update(int(flashcard_id), question, answer)
+
+    def update_flashcard_text_in_db(self, flashcard_id, question, answer) -> None:
+        """
+        Update only the question and answer of a flashcard in the db. Unlike self.update_flashcard_in_db(), it does
+        not overwrite the scheduling values, so it can be used with Flashcard objects that are not the ones being
+        studied.
+        :param int flashcard_id: Flashcard's unique identifier
+        :param str question: Flashcard's question attribute
+        :param str answer: Flashcard's answer attribute
+        """
+        sql = ''' UPDATE flashcard
+                    SET question = ? ,
+                    answer = ?
+                    WHERE flashcard_id = ? '''
+        with self.connection_manager.transaction() as cursor:
+            cursor.execute(sql, (question, answer, int(flashcard_id)))
+        self.flashcard_text_cache.update(int(flashcard_id), question, answer)
+
+    def update_flashcard_schedules(self, rows) -> None:
+        """
+        Write the scheduling values of many flashcards with one executemany, in one transaction. Reviews waiting in
+        the write-behind queue are written first, so that they do not overwrite these values later.
+        :param rows: (last_study_date, due_day, inter_repetition_interval, easiness_factor, repetition_number,
+        flashcard_id) tuples, as returned by BatchScheduler.schedule_flashcards()
+        :type rows: [tuple]
+        """
+        self.flush_pending_writes()
+        with self.connection_manager.transaction() as cursor:
+            cursor.executemany(ReviewWriter.UPDATE_SQL, rows)
+
+    def shift_due_days(self, days, deck_id=None) -> int:
+        """
+        Move the due dates of flashcards by an amount of days with a single UPDATE. Due dates are day numbers, so this
+        is integer arithmetic in SQL.
+        :param int days: Amount of days to add to the due dates. Negative values make flashcards due earlier.
+        :param Optional[int] deck_id: Shift only the flashcards of this deck. All flashcards are shifted if it is None.
+        :return: Amount of shifted flashcards
+        :rtype: int
+        """
+        self.flush_pending_writes()
+        sql = ''' UPDATE flashcard
+                  SET due_day = due_day + ? '''
+        parameters = (int(days),)
+        if deck_id is not None:
+            sql += ''' WHERE deck_id = ? '''
+            parameters += (int(deck_id),)
+        with self.connection_manager.transaction() as cursor:
+            count = cursor.execute(sql, parameters).rowcount
+        self.forget_loaded_flashcards(deck_id)
+        return count
+
+    def reset_flashcard_schedules(self, deck_id=None) -> int:
+        """
+        Forget the study history of flashcards, so that they are scheduled like new flashcards that are due today.
+        :param Optional[int] deck_id: Reset only the flashcards of this deck. All flashcards are reset if it is None.
+        :return: Amount of reset flashcards
+        :rtype: int
+        """
+        self.flush_pending_writes()
+        sql = ''' UPDATE flashcard
+                  SET last_study_date = NULL,
+                      due_day = ?,
+                      inter_repetition_interval = 0,
+                      easiness_factor = 0,
+                      repetition_number = 0 '''
+        parameters = (Flashcard.today_day_number(),)
+        if deck_id is not None:
+            sql += ''' WHERE deck_id = ? '''
+            parameters += (int(deck_id),)
+        with self.connection_manager.transaction() as cursor:
+            count = cursor.execute(sql, parameters).rowcount
+        self.forget_loaded_flashcards(deck_id)
+        return count
+
+    def forget_loaded_flashcards(self, deck_id=None) -> None:
+        """
+        Drop the flashcards of decks from memory after they have been changed in the database by a bulk update, and
+        update the deck summaries. Dropped flashcards are loaded again the next time they are accessed.
+        :param Optional[int] deck_id: Deck whose flashcards are dropped. Flashcards of all decks are dropped if it is
+        None.
+        """
+        summaries = self.deck_summaries()
+        for deck in self.decks:
+            if deck_id is not None and deck.deck_id != int(deck_id):
+                continue
+            if deck.is_loaded():
+                deck.flashcards = None
+                deck.due_flashcards = []
+            summary = summaries.get(deck.deck_id)
+            deck.flashcard_count = summary.total_count if summary is not None else 0
+            deck.due_flashcard_count = summary.due_count if summary is not None else 0
+
+    def collection_statistics(self) -> CollectionStatistics:
+        """
+        Count decks and flashcards of the whole database with aggregate queries.
+        :return: Statistics of the database
+        :rtype: CollectionStatistics
+        """
+        self.flush_pending_writes()
+        today_day = Flashcard.today_day_number()
+        with self.connection_manager.transaction() as cursor:
+            deck_count = cursor.execute("SELECT COUNT(*) FROM deck").fetchone()[0]
+            flashcard_count, due_count, due_within_a_week_count, studied_count = cursor.execute("""
+                SELECT COUNT(*),
+                       IFNULL(SUM(due_day <= ?), 0),
+                       IFNULL(SUM(due_day <= ?), 0),
+                       IFNULL(SUM(repetition_number > 0), 0)
+                FROM flashcard
+                """, (today_day, today_day + 7)).fetchone()
+            page_count = cursor.execute("PRAGMA page_count").fetchone()[0]
+            page_size = cursor.execute("PRAGMA page_size").fetchone()[0]
+        return CollectionStatistics(deck_count, flashcard_count, due_count, due_within_a_week_count, studied_count,
+                                    page_count * page_size)
+
+    def add_review_log_rows(self, rows) -> None:
+        """
+        Append many reviews to the review log in one transaction, e.g. reviews of an imported or generated history.
+        Reviews of study sessions are logged by self.review_writer.
+        :param [tuple] rows: (flashcard_id, reviewed_at, grade, previous_interval, new_interval,
+        previous_easiness_factor, new_easiness_factor, response_milliseconds) tuples. See ReviewLogEntry.
+        """
+        sql = ''' INSERT INTO review_log (flashcard_id, reviewed_at, grade, previous_interval, new_interval,
+                                          previous_easiness_factor, new_easiness_factor, response_milliseconds)
+                  VALUES (?, ?, ?, ?, ?, ?, ?, ?) '''
+        with self.connection_manager.transaction() as cursor:
+            cursor.executemany(sql, rows)
+
+    def reviews_between(self, start, end) -> [ReviewLogEntry]:
+        """
+        Read the reviews of a time range from the review log, oldest first. Reviews that have been rolled up into
+        daily totals are not included.
+        :param datetime.datetime start: Beginning of the range, included
+        :param datetime.datetime end: End of the range, excluded
+        :rtype: [ReviewLogEntry]
+        """
+        self.flush_pending_writes()
+        with self.connection_manager.transaction() as cursor:
+            rows = cursor.execute("""
+                SELECT flashcard_id, reviewed_at, grade, previous_interval, new_interval, previous_easiness_factor,
+                       new_easiness_factor, response_milliseconds
+                FROM review_log
+                WHERE reviewed_at >= ? AND reviewed_at < ?
+                ORDER BY reviewed_at
+                """, (str(start), str(end))).fetchall()
+        return [ReviewLogEntry(*row) for row in rows]
+
+    def daily_review_statistics(self, first_day=None) -> [ReviewDay]:
+        """
+        Count the reviews of every day, from the daily totals of rolled up reviews and from the review log.
+        :param Optional[int] first_day: Day number of the first day. All days are counted if it is None.
+        :return: Days with at least one review, oldest first
+        :rtype: [ReviewDay]
+        """
+        self.flush_pending_writes()
+        if first_day is None:
+            first_day = 0
+        # The review log is searched by its reviewed_at index, so the first day is also given as text.
+        first_date_string = Flashcard.date_string_from_day_number(first_day)
+        with self.connection_manager.transaction() as cursor:
+            rows = cursor.execute("""
+                SELECT day, SUM(review_count), SUM(failed_count), SUM(grade_sum), SUM(response_count),
+                       SUM(response_milliseconds_sum)
+                FROM (SELECT day, review_count, failed_count, grade_sum, response_count, response_milliseconds_sum
+                      FROM review_day
+                      WHERE day >= ?
+                      UNION ALL
+                      SELECT {} AS day, COUNT(*), SUM(grade < 2), SUM(grade), COUNT(response_milliseconds),
+                             IFNULL(SUM(response_milliseconds), 0)
+                      FROM review_log
+                      WHERE reviewed_at >= ?
+                      GROUP BY day)
+                GROUP BY day
+                ORDER BY day
+                """.format(DatabaseManager.REVIEW_DAY_SQL), (first_day, first_date_string)).fetchall()
+        return [ReviewDay(day, review_count, failed_count,
+                          grade_sum / review_count if review_count > 0 else None,
+                          response_milliseconds_sum / response_count if response_count > 0 else None)
+                for day, review_count, failed_count, grade_sum, response_count, response_milliseconds_sum in rows]
+
+    def roll_up_review_log(self, retention_days=REVIEW_LOG_RETENTION_DAYS) -> int:
+        """
+        Add the reviews that are older than retention_days to the daily totals of the review_day table, and delete
+        them from the review log, in one transaction. It keeps the review log from growing without bound. Only the
+        old end of the reviewed_at index is read, so it is cheap when there is nothing to roll up.
+        :param int retention_days: Reviews of this many days before today are kept in the review log
+        :return: Amount of rolled up reviews
+        :rtype: int
+        """
+        cutoff_date_string = Flashcard.date_string_from_day_number(Flashcard.today_day_number() -
+                                                                   max(0, int(retention_days)))
+        with self.connection_manager.transaction(immediate=True) as cursor:
+            rolled_up_count = DatabaseManager.roll_up_reviews(cursor, "reviewed_at < ?", (cutoff_date_string,))
+        return rolled_up_count
+
+    @staticmethod
+    def roll_up_reviews(cursor, condition, parameters) -> int:
+        """
+        Add the reviews of the review log that match a condition to the daily totals of the review_day table, and
+        delete them from the review log. Runs in the transaction of the cursor.
+        :param sqlite3.Cursor cursor: Cursor of an open transaction
+        :param str condition: WHERE condition on review_log, with ? placeholders. It is a constant of the caller.
+        :param tuple parameters: Values of the placeholders in condition
+        :return: Amount of rolled up reviews
+        :rtype: int
+        """
+        cursor.execute("""
+            INSERT INTO review_day (day, review_count, failed_count, grade_sum, response_count,
+                                    response_milliseconds_sum)
+            SELECT {} AS review_day, COUNT(*), SUM(grade < 2), SUM(grade), COUNT(response_milliseconds),
+                   IFNULL(SUM(response_milliseconds), 0)
+            FROM review_log
+            WHERE {}
+            GROUP BY review_day
+            ON CONFLICT (day) DO UPDATE
+            SET review_count = review_count + excluded.review_count,
+                failed_count = failed_count + excluded.failed_count,
+                grade_sum = grade_sum + excluded.grade_sum,
+                response_count = response_count + excluded.response_count,
+                response_milliseconds_sum = response_milliseconds_sum + excluded.response_milliseconds_sum
+            """.format(DatabaseManager.REVIEW_DAY_SQL, condition), parameters)
+        cursor.execute("DELETE FROM review_log WHERE {}".format(condition), parameters)
+        return cursor.rowcount
+
+    def vacuum(self) -> None:
+        """
+        Rebuild the database file to give the space of deleted rows back to the file system, and checkpoint the
+        write-ahead log. VACUUM cannot run inside a transaction, so it runs on a pooled connection in autocommit mode.
+        """
+        self.flush_pending_writes()
+        connection = self.connection_manager.acquire()
+        try:
+            connection.execute("VACUUM")
+            connection.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        finally:
+            self.connection_manager.release()
+
+    def queue_flashcard_review(self, flashcard_id, last_study_date, due_day, inter_repetition_interval,
+                               easiness_factor, repetition_number, grade=None, previous_interval=None,
+                               previous_easiness_factor=None, response_time=None) -> None:
+        """
+        Queue the new scheduling values of a studied flashcard to be written to the database by self.review_writer.
+        It returns without waiting for the disk. Question and answer of the flashcard are not written. If grade is
+        given, the review is also appended to the review_log table, in the same transaction.
+        :param flashcard_id: Flashcard's unique identifier
+        :type flashcard_id: int
+        :param last_study_date: Value for last_study_date column
+        :type last_study_date: datetime
+        :param due_day: Value for due_day column
+        :type due_day: int
+        :param inter_repetition_interval: Value for inter_repetition_interval column
+        :type inter_repetition_interval: int
+        :param easiness_factor: Value for easiness_factor column
+        :type easiness_factor: float
+        :param repetition_number: Value for repetition_number column
+        :type repetition_number: int
+        :param Optional[int] grade: Grade of the answer, between 0 and 4
+        :param previous_interval: inter_repetition_interval before the answer
+        :param Optional[float] previous_easiness_factor: easiness_factor before the answer
+        :param Optional[float] response_time: Seconds the user took to answer, if it is known
+        """
+        self.review_writer.put(flashcard_id, last_study_date, due_day, inter_repetition_interval,
+                               easiness_factor, repetition_number, grade=grade, previous_interval=previous_interval,
+                               previous_easiness_factor=previous_easiness_factor, response_time=response_time)
 
     def delete_flashcard_from_db(self, flashcard_id):
         """
         Delete a row from Flashcard table in the database.
+        Reviews of the flashcard are moved from the review log to the daily totals in the same transaction, because
+        its flashcard_id may be given to a new flashcard.
         :param flashcard_id: Primary key in Flashcard table, mapping to the Flashcard's flashcard_id
         :type flashcard_id: int
         """
-        self.open_db()
-        # self.db_connection.set_trace_callback(print)
+        # Queued reviews of the flashcard are logged before its reviews are rolled up.
+        self.flush_pending_writes()
         flashcard_row_tuple = (int(flashcard_id),)
         sql = ''' DELETE FROM flashcard
                               WHERE flashcard_id = ? '''
-        self.cursor.execute(sql, flashcard_row_tuple)
-        self.close_db()
+        with self.connection_manager.transaction() as cursor:
+            DatabaseManager.roll_up_reviews(cursor, "flashcard_id = ?", flashcard_row_tuple)
+            cursor.execute(sql, flashcard_row_tuple)
+        self.flashcard_text_cache.remove(int(flashcard_id))
         # print("\ndelete_flashcard_from_db just run\n")
         # self.print_all_flashcards()
 
@@ -416,21 +1174,27 @@ class DatabaseManager:
         Finally, delete the row from Deck table where deck_id is the primary key
         As a result, delete from the database everything related to the Deck object
         of which deck_id is the passed deck_id
+        Reviews of the flashcards are moved from the review log to the daily totals, as in delete_flashcard_from_db().
         :param deck_id: Primary key in Deck table, mapping to the Deck's deck_id
         :type deck_id: int
         """
-        self.open_db()
-        # First delete all flashcards of this deck
-        flashcard_row_tuple = (int(deck_id),)
-        sql = ''' DELETE FROM flashcard
-                                      WHERE deck_id = ? '''
-        self.cursor.execute(sql, flashcard_row_tuple)
-        # Now delete the deck
-        deck_row_tuple = (int(deck_id),)
-        sql = ''' DELETE FROM deck
-                              WHERE deck_id = ? '''
-        self.cursor.execute(sql, deck_row_tuple)
-        self.close_db()
+        self.flush_pending_writes()
+        # All deletions run in the same transaction, so a deck is never left half deleted.
+        with self.connection_manager.transaction() as cursor:
+            # First delete all flashcards of this deck, and their reviews
+            flashcard_row_tuple = (int(deck_id),)
+            DatabaseManager.roll_up_reviews(cursor, "flashcard_id IN (SELECT flashcard_id FROM flashcard "
+                                                    "WHERE deck_id = ?)", flashcard_row_tuple)
+            sql = ''' DELETE FROM flashcard
+                                          WHERE deck_id = ? '''
+            cursor.execute(sql, flashcard_row_tuple)
+            # Now delete the deck
+            deck_row_tuple = (int(deck_id),)
+            sql = ''' DELETE FROM deck
+                                  WHERE deck_id = ? '''
+            cursor.execute(sql, deck_row_tuple)
+        # flashcard_id values of the deleted flashcards may be given to new flashcards.
+        self.flashcard_text_cache.clear()
         # print("\ndelete_deck_from_db just run\n")
         # self.print_all_flashcards()
 
@@ -450,18 +1214,15 @@ class DatabaseManager:
         """
         print()
         print("All Flashcards in the DB:")
-        self.open_db()
         sql = ''' SELECT * FROM flashcard '''
-        results = self.cursor.execute(sql)
+        with self.connection_manager.transaction() as cursor:
+            results = cursor.execute(sql).fetchall()
         for result in results:
             flashcard_string = ''
             for index in range(4):
                 flashcard_string += str(result[index]) + " "
             print(flashcard_string)
-        self.close_db()
         print()
 
     # TODO [New Feature] Code a function to find duplicate values in the database. It can be useful when user is
     #  attempting to add a duplicate flashcard.
-
-    # TODO [New Feature] Code a function to search data in the database.
@@ -21,32 +21,109 @@
 #   You should have received a copy of the GNU General Public License
 #   along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
+import os
 from datetime import datetime
 from typing import Optional
 
+from DueIndex import DueIndex
 from Flashcard import Flashcard
 
 
 class Deck:
     MAXIMUM_LENGTH_OF_DECK_TITLE = 50
     MAXIMUM_LENGTH_OF_DECK_SHORT_TITLE = 20
-    MAXIMUM_AMOUNT_OF_FLASHCARDS = 10000
+    DEFAULT_MAXIMUM_AMOUNT_OF_FLASHCARDS = 10000
+    # Maximum amount of flashcards per deck. See set_maximum_amount_of_flashcards().
+    MAXIMUM_AMOUNT_OF_FLASHCARDS = DEFAULT_MAXIMUM_AMOUNT_OF_FLASHCARDS
+    # Environment variable that sets MAXIMUM_AMOUNT_OF_FLASHCARDS when the program starts
+    MAXIMUM_AMOUNT_OF_FLASHCARDS_VARIABLE = "FLASHCARDS_MAXIMUM_DECK_SIZE"
 
-    def __init__(self, deck_id, title, last_study_datetime: Optional[datetime] = None):
+    __slots__ = ("deck_id", "title", "database_manager", "_flashcards", "due_flashcards", "flashcard_count",
+                 "due_flashcard_count", "last_study_datetime", "_due_index")
+
+    def __init__(self, deck_id, title, last_study_datetime: Optional[datetime] = None, database_manager=None,
+                 flashcard_count=0, due_flashcard_count=0):
         """
         Deck class represents every deck in the Program, that holds flashcards. Decks are simply sets of flashcards.
         :param int deck_id: Unique identifer for the Deck. Provided by the database.
         :param str title: Title of the deck. Max length is kept in a class constant: MAXIMUM_LENGTH_OF_DECK_TITLE
         :param Optional[datetime] last_study_datetime: When this deck was studied for the last time. It can be None.
+        :param Optional[DatabaseManager] database_manager: If it is given, flashcards are loaded from the database
+        the first time self.flashcards is accessed. Otherwise the deck starts with no flashcards.
+        :param int flashcard_count: Amount of flashcards in the database, known before they are loaded
+        :param int due_flashcard_count: Amount of due flashcards in the database, known before they are loaded
         """
         self.deck_id = deck_id
         self.title = title
-        self.flashcards: [Flashcard] = []
+        self.database_manager = database_manager
+        # None until the flashcards are loaded. See the flashcards property.
+        self._flashcards: Optional[list] = None if database_manager is not None else []
         self.due_flashcards: [Flashcard] = []
+        # Summary of the deck, so that it can be listed without loading its flashcards.
+        self.flashcard_count = flashcard_count
+        self.due_flashcard_count = due_flashcard_count
         # last_study_datetime will hold the last study date and time. For compatibility with SQlite3,
         # ISO8601 string format will be used as follows:
         # YYYY-MM-DD HH:MM:SS.SSS
         self.last_study_datetime = last_study_datetime
+        # Due dates of the flashcards, built from the loaded flashcards when it is first needed. See due_index().
+        self._due_index: Optional[DueIndex] = None
+
+    @property
+    def flashcards(self) -> [Flashcard]:
+        """
+        Flashcards of the deck. They are loaded from the database on first access.
+        :rtype: [Flashcard]
+        """
+        if self._flashcards is None:
+            self.database_manager.load_flashcards(self)
+        return self._flashcards
+
+    @flashcards.setter
+    def flashcards(self, flashcards) -> None:
+        self._flashcards = flashcards
+        # The due index refers to the previous list
+        self._due_index = None
+
+    def due_index(self) -> DueIndex:
+        """
+        Index of the flashcards of the deck by due date. It is built from self.flashcards the first time it is needed,
+        which loads the flashcards if they are not loaded yet. Afterwards it is kept up to date by
+        self.process_answer(), self.add_flashcard(), and self.remove_flashcard().
+        :rtype: DueIndex
+        """
+        if self._due_index is None:
+            due_index = DueIndex(Flashcard.today_day_number())
+            due_index.build(self.flashcards)
+            self._due_index = due_index
+        return self._due_index
+
+    def get_due_flashcard_count(self) -> int:
+        """
+        Amount of due flashcards in the deck. It does not load the flashcards.
+        :return: Count from the due index if it has been built. Otherwise, the count loaded with the deck summary.
+        :rtype: int
+        """
+        if self._due_index is not None:
+            return self._due_index.due_count(Flashcard.today_day_number())
+        return self.due_flashcard_count
+
+    def is_loaded(self) -> bool:
+        """
+        :return: True if flashcards of the deck are in memory.
+        :rtype: bool
+        """
+        return self._flashcards is not None
+
+    def get_flashcard_count(self) -> int:
+        """
+        Amount of flashcards in the deck. It does not load the flashcards.
+        :return: Length of self.flashcards if they are loaded. Otherwise, the count loaded with the deck summary.
+        :rtype: int
+        """
+        if self._flashcards is not None:
+            return len(self._flashcards)
+        return self.flashcard_count
 
     def get_truncated_title(self) -> str:
         """
@@ -91,11 +168,26 @@ class Deck:
 
     def set_due_flashcards(self, database_manager) -> None:
         """
-        Loads due flashcards from the database and puts them in self.due_flashcards list attribute.
+        Puts due flashcards in self.due_flashcards list attribute. They are taken from the due index, in memory; the
+        database is read only when the index is built for the first time.
+        :param database_manager: DatabaseManager object kept in the main controller (Program)
+        :type database_manager: DatabaseManager
+        """
+        self.due_flashcards = self.due_index().due_flashcards(Flashcard.today_day_number())
+
+    def process_answer(self, flashcard, grade, database_manager, response_time=None) -> None:
+        """
+        Process user's answer to a flashcard of this deck by calling Flashcard.process_answer(), and move the
+        flashcard in the due index according to its new due date.
+        :param Flashcard flashcard: Answered flashcard
+        :param int grade: Between 0 and 4
         :param database_manager: DatabaseManager object kept in the main controller (Program)
         :type database_manager: DatabaseManager
+        :param Optional[float] response_time: Seconds the user took to answer, if it is known
         """
-        database_manager.load_due_flashcards(self)
+        flashcard.process_answer(grade, database_manager, response_time)
+        if self._due_index is not None:
+            self._due_index.update(flashcard)
 
     def append_to_flashcards(self, flashcard) -> int:
         """
@@ -114,3 +206,86 @@ class Deck:
                 return 1
         else:
             return 2
+
+    def add_flashcard(self, flashcard) -> None:
+        """
+        Adds a new flashcard, that has already been saved to the database, to the deck. If the flashcards of the deck
+        are not loaded, only the summary count is updated. Deck.MAXIMUM_AMOUNT_OF_FLASHCARDS is checked by the caller
+        before the flashcard is saved, so it is not checked again here.
+        :param Flashcard flashcard: Flashcard object to be added
+        """
+        if self._flashcards is not None:
+            self._flashcards.append(flashcard)
+        else:
+            self.flashcard_count += 1
+        if self._due_index is not None:
+            self._due_index.add(flashcard)
+
+    def remove_flashcard(self, flashcard_id) -> None:
+        """
+        Removes a flashcard, that has already been deleted from the database, from the deck. If the flashcards of the
+        deck are not loaded, only the summary count is updated.
+        :param int flashcard_id: flashcard_id of the Flashcard object to be removed
+        """
+        if self._flashcards is not None:
+            self._flashcards = [flashcard for flashcard in self._flashcards if flashcard.flashcard_id != flashcard_id]
+        else:
+            self.flashcard_count = max(0, self.flashcard_count - 1)
+        if self._due_index is not None:
+            self._due_index.remove(flashcard_id)
+        self.due_flashcards = [flashcard for flashcard in self.due_flashcards if flashcard.flashcard_id != flashcard_id]
+
+    def get_loaded_flashcard(self, flashcard_id) -> Optional[Flashcard]:
+        """
+        Finds a flashcard among the loaded flashcards of the deck. It does not load the flashcards.
+        :param int flashcard_id: flashcard_id of the Flashcard object
+        :return: Flashcard object, or None if it is not found or flashcards are not loaded.
+        :rtype: Optional[Flashcard]
+        """
+        if self._flashcards is not None:
+            for flashcard in self._flashcards:
+                if flashcard.flashcard_id == flashcard_id:
+                    return flashcard
+        return None
+
+    def update_flashcard_text(self, flashcard_id, question, answer) -> None:
+        """
+        Updates the question and answer of a flashcard in the loaded flashcards and due flashcards of the deck, after
+        they have been saved to the database. It does not load the flashcards.
+        :param int flashcard_id: flashcard_id of the Flashcard object
+        :param str question: New question of the flashcard
+        :param str answer: New answer of the flashcard
+        """
+        for flashcard in (self._flashcards or []) + self.due_flashcards:
+            if flashcard.flashcard_id == flashcard_id:
+                flashcard.question = question
+                flashcard.answer = answer
+
+    @staticmethod
+    def set_maximum_amount_of_flashcards(amount) -> None:
+        """
+        Set the maximum amount of flashcards per deck. Large decks are listed by pages (see DeckPager), so the limit
+        is bounded only by the time it takes to study or load a whole deck.
+        :param int amount: New limit. It must be at least 1.
+        """
+        amount = int(amount)
+        if amount < 1:
+            raise ValueError("Maximum amount of flashcards must be at least 1: {}".format(amount))
+        Deck.MAXIMUM_AMOUNT_OF_FLASHCARDS = amount
+
+    @staticmethod
+    def set_maximum_amount_of_flashcards_from_environment() -> None:
+        """
+        Set the maximum amount of flashcards per deck from the FLASHCARDS_MAXIMUM_DECK_SIZE environment variable, if
+        it is set. An invalid value is reported, and the limit is not changed.
+        """
+        value = os.environ.get(Deck.MAXIMUM_AMOUNT_OF_FLASHCARDS_VARIABLE, "")
+        if value == "":
+            return
+        try:
+            Deck.set_maximum_amount_of_flashcards(value)
+        except ValueError as error:
+            print("Invalid {}: {}".format(Deck.MAXIMUM_AMOUNT_OF_FLASHCARDS_VARIABLE, error))
+
+
+Deck.set_maximum_amount_of_flashcards_from_environment()
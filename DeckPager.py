@@ -0,0 +1,198 @@
+#   Program FlashCards
+#
+#   Copyright 2020 Ertugrul Harman
+#
+#       E-mail  : harmancode@gmail.com
+#       Twitter : https://twitter.com/harmancode
+#       Web     : https://harman.page
+#
+#   This file is part of Flashcards.
+#
+#   Flashcards is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+from collections import OrderedDict
+from typing import Optional
+
+from Flashcard import Flashcard
+
+
+class DeckPager:
+    DEFAULT_PAGE_SIZE = 200
+    DEFAULT_MAXIMUM_AMOUNT_OF_CACHED_PAGES = 20
+
+    def __init__(self, database_manager, deck_id, page_size=DEFAULT_PAGE_SIZE,
+                 maximum_amount_of_cached_pages=DEFAULT_MAXIMUM_AMOUNT_OF_CACHED_PAGES, search_query=""):
+        """
+        DeckPager gives access to the flashcards of a deck of any size, ordered by flashcard_id, without loading the
+        deck. Flashcards are read from the database a page at a time, and only the most recently used pages are kept,
+        so memory use is bounded by page_size * maximum_amount_of_cached_pages flashcards.
+        Pages are found by key: a page next to a cached page is read from the flashcard_id where the cached page
+        ends, which costs the same at any depth of the deck. Only a page far from the cached ones needs the position
+        of its first flashcard, which is read from the deck index without reading flashcard rows.
+        Page boundaries shift when flashcards are added or removed. Call invalidate() after changing the deck.
+        If search_query is given, the pager holds the search results of the deck instead, in the order of
+        DatabaseManager.search(). Search results are ranked, not ordered by flashcard_id, so their pages are read by
+        offset.
+        :param DatabaseManager database_manager: DatabaseManager of the deck
+        :param int deck_id: deck_id of the Deck
+        :param int page_size: Amount of flashcards per page
+        :param int maximum_amount_of_cached_pages: Amount of pages kept in memory
+        :param str search_query: Search query whose results are paged. All flashcards of the deck are paged if it is
+        empty.
+        """
+        self.database_manager = database_manager
+        self.deck_id = deck_id
+        self.page_size = max(1, int(page_size))
+        self.maximum_amount_of_cached_pages = max(1, int(maximum_amount_of_cached_pages))
+        self.search_query = search_query
+
+        # Loaded pages, least recently used first. {page number: [Flashcard]}
+        self.pages = OrderedDict()
+
+        # Flashcards of the loaded pages by flashcard_id. {flashcard_id: Flashcard}
+        self.flashcards_by_id = dict()
+
+        # Amount of flashcards of the deck, counted in the database when it is first needed
+        self._count: Optional[int] = None
+
+    def count(self) -> int:
+        """
+        :return: Amount of flashcards of the deck, or of search results. It is counted in the database once after every
+        invalidate().
+        :rtype: int
+        """
+        if self._count is None:
+            if self.search_query != "":
+                self._count = self.database_manager.count_search_results(self.search_query, self.deck_id)
+            else:
+                self._count = self.database_manager.count_flashcards(self.deck_id)
+        return self._count
+
+    def page_count(self) -> int:
+        """
+        :return: Amount of pages of the deck
+        :rtype: int
+        """
+        return (self.count() + self.page_size - 1) // self.page_size
+
+    def get_range(self, start, count) -> [Flashcard]:
+        """
+        Returns the flashcards from index start to index start + count, loading the pages that contain them if they
+        are not in memory.
+        :param int start: Index of the first flashcard
+        :param int count: Amount of flashcards
+        :rtype: [Flashcard]
+        """
+        flashcards = []
+        if count <= 0:
+            return flashcards
+        first_page = start // self.page_size
+        last_page = (start + count - 1) // self.page_size
+        for page_number in range(first_page, last_page + 1):
+            flashcards.extend(self.get_page(page_number))
+        offset_in_first_page = start - first_page * self.page_size
+        return flashcards[offset_in_first_page:offset_in_first_page + count]
+
+    def get_page(self, page_number) -> [Flashcard]:
+        """
+        Returns a page of flashcards. The page is loaded from the database unless it is cached. The least recently
+        used page is dropped when there are more than self.maximum_amount_of_cached_pages pages.
+        :param int page_number: Index of the page, starting from 0
+        :rtype: [Flashcard]
+        """
+        if page_number in self.pages:
+            self.pages.move_to_end(page_number)
+            return self.pages[page_number]
+
+        previous_page = self.pages.get(page_number - 1)
+        next_page = self.pages.get(page_number + 1)
+        if self.search_query != "":
+            page = self.database_manager.search(self.search_query, self.deck_id, limit=self.page_size,
+                                                offset=page_number * self.page_size)
+        elif page_number == 0:
+            page = self.database_manager.load_flashcards_after(self.deck_id, 0, self.page_size)
+        elif previous_page:
+            # Scrolling down
+            page = self.database_manager.load_flashcards_after(self.deck_id, previous_page[-1].flashcard_id,
+                                                               self.page_size)
+        elif next_page:
+            # Scrolling up. Every page before the last one is full.
+            page = self.database_manager.load_flashcards_before(self.deck_id, next_page[0].flashcard_id,
+                                                                self.page_size)
+        else:
+            # Jumping, e.g. by dragging the scrollbar. Find the flashcard before the page in the deck index.
+            flashcard_id = self.database_manager.flashcard_id_at_position(self.deck_id,
+                                                                          page_number * self.page_size - 1)
+            if flashcard_id is None:
+                page = []
+            else:
+                page = self.database_manager.load_flashcards_after(self.deck_id, flashcard_id, self.page_size)
+
+        self.pages[page_number] = page
+        for flashcard in page:
+            self.flashcards_by_id[flashcard.flashcard_id] = flashcard
+
+        if len(self.pages) > self.maximum_amount_of_cached_pages:
+            dropped_page_number, dropped_page = self.pages.popitem(last=False)
+            for flashcard in dropped_page:
+                self.flashcards_by_id.pop(flashcard.flashcard_id, None)
+
+        return page
+
+    def get_flashcard(self, flashcard_id) -> Optional[Flashcard]:
+        """
+        Random access by flashcard_id. The flashcard is taken from the cached pages, or read from the database alone.
+        :param int flashcard_id: flashcard_id of a flashcard of the deck
+        :return: Flashcard, or None if the deck does not have it
+        :rtype: Optional[Flashcard]
+        """
+        flashcard = self.flashcards_by_id.get(flashcard_id)
+        if flashcard is None:
+            flashcard = self.database_manager.load_flashcard(flashcard_id)
+            if flashcard is not None and flashcard.deck_id != self.deck_id:
+                flashcard = None
+        return flashcard
+
+    def get_cached_flashcard(self, flashcard_id) -> Optional[Flashcard]:
+        """
+        :param int flashcard_id: flashcard_id of a flashcard of the deck
+        :return: Flashcard if it is in a cached page. The database is not read.
+        :rtype: Optional[Flashcard]
+        """
+        return self.flashcards_by_id.get(flashcard_id)
+
+    def position(self, flashcard_id) -> Optional[int]:
+        """
+        :param int flashcard_id: flashcard_id of a flashcard of the deck
+        :return: Index of the flashcard in the deck. It is found in the cached pages, or counted in the database.
+        The position of a search result that is not in a cached page is not known, and None is returned for it.
+        :rtype: Optional[int]
+        """
+        for page_number, page in self.pages.items():
+            for index, flashcard in enumerate(page):
+                if flashcard.flashcard_id == flashcard_id:
+                    return page_number * self.page_size + index
+        if self.search_query != "":
+            return None
+        return self.database_manager.flashcard_position(self.deck_id, flashcard_id)
+
+    def invalidate(self) -> None:
+        """
+        Forget the cached pages and the count, so that they are read from the database again. Call it after
+        flashcards of the deck have been added, removed, or changed.
+        """
+        self.pages.clear()
+        self.flashcards_by_id.clear()
+        self._count = None
@@ -0,0 +1,140 @@
+#   Program FlashCards
+#
+#   Copyright 2020 Ertugrul Harman
+#
+#       E-mail  : harmancode@gmail.com
+#       Twitter : https://twitter.com/harmancode
+#       Web     : https://harman.page
+#
+#   This file is part of Flashcards.
+#
+#   Flashcards is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import heapq
+
+
+class DueIndex:
+
+    def __init__(self, today):
+        """
+        DueIndex keeps the flashcards of a deck grouped by their due dates, so that due flashcards can be listed and
+        counted in memory, without querying the database.
+        Flashcards that are due are kept together in one dictionary. Other flashcards are kept in one bucket per due
+        date, and the due dates are kept in a heap. When the date changes, refresh() moves the buckets that have
+        become due into the due flashcards.
+        Dates are compared as day numbers, like the due_day attribute of Flashcard.
+        :param int today: Today's date as day number. See Flashcard.day_number().
+        """
+        self.today = today
+
+        # Flashcards that are due. {flashcard_id: Flashcard}
+        self._due = dict()
+
+        # Flashcards that are not due yet, by due date. {due_day: {flashcard_id: Flashcard}}
+        self._buckets = dict()
+
+        # Due dates of self._buckets, smallest first. It may hold dates whose buckets have become empty.
+        self._bucket_dates = []
+
+        # Due date under which every flashcard is kept. {flashcard_id: due_day}
+        self._due_date_of = dict()
+
+    def build(self, flashcards) -> None:
+        """
+        Add many flashcards at once.
+        :param [Flashcard] flashcards: Flashcards of the deck
+        """
+        for flashcard in flashcards:
+            self.add(flashcard)
+
+    def add(self, flashcard) -> None:
+        """
+        Add a flashcard, or move it if it is already in the index and its due date has changed.
+        :param Flashcard flashcard: Flashcard to be added
+        """
+        flashcard_id = flashcard.flashcard_id
+        due_day = flashcard.due_day
+        if self._due_date_of.get(flashcard_id, None) == due_day:
+            return
+        self.remove(flashcard_id)
+        self._due_date_of[flashcard_id] = due_day
+        if due_day <= self.today:
+            self._due[flashcard_id] = flashcard
+        else:
+            bucket = self._buckets.get(due_day)
+            if bucket is None:
+                bucket = dict()
+                self._buckets[due_day] = bucket
+                heapq.heappush(self._bucket_dates, due_day)
+            bucket[flashcard_id] = flashcard
+
+    def update(self, flashcard) -> None:
+        """
+        Move a flashcard after its due date has changed, e.g. after it has been answered.
+        :param Flashcard flashcard: Flashcard in the index
+        """
+        self.add(flashcard)
+
+    def remove(self, flashcard_id) -> None:
+        """
+        Remove a flashcard from the index. Nothing is done if it is not in the index.
+        :param int flashcard_id: flashcard_id of the Flashcard
+        """
+        due_day = self._due_date_of.pop(flashcard_id, None)
+        if due_day is None:
+            return
+        if flashcard_id in self._due:
+            del self._due[flashcard_id]
+        else:
+            bucket = self._buckets[due_day]
+            del bucket[flashcard_id]
+            if len(bucket) == 0:
+                # Its date stays in the heap, and it is skipped by refresh().
+                del self._buckets[due_day]
+
+    def refresh(self, today) -> None:
+        """
+        Move the flashcards that have become due since the last call into the due flashcards.
+        :param int today: Today's date as day number
+        """
+        if today <= self.today:
+            return
+        self.today = today
+        while len(self._bucket_dates) > 0 and self._bucket_dates[0] <= today:
+            due_day = heapq.heappop(self._bucket_dates)
+            bucket = self._buckets.pop(due_day, None)
+            if bucket is not None:
+                self._due.update(bucket)
+
+    def due_flashcards(self, today) -> list:
+        """
+        :param int today: Today's date as day number
+        :return: Flashcards that are due today
+        :rtype: [Flashcard]
+        """
+        self.refresh(today)
+        return list(self._due.values())
+
+    def due_count(self, today) -> int:
+        """
+        :param int today: Today's date as day number
+        :return: Amount of flashcards that are due today
+        :rtype: int
+        """
+        self.refresh(today)
+        return len(self._due)
+
+    def __len__(self) -> int:
+        return len(self._due_date_of)
@@ -0,0 +1,66 @@
+#   Program FlashCards
+#
+#   Copyright 2020 Ertugrul Harman
+#
+#       E-mail  : harmancode@gmail.com
+#       Twitter : https://twitter.com/harmancode
+#       Web     : https://harman.page
+#
+#   This file is part of Flashcards.
+#
+#   Flashcards is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+class ExportResult:
+
+    def __init__(self, filepath, deck):
+        """
+        ExportResult describes what happened while a deck was exported to a csv file by ImportExportManager. It does
+        not show anything to the user; the caller decides how to report it.
+        A result is True in boolean context when the export has succeeded.
+        :param str filepath: Path of the exported file
+        :param Deck deck: Exported deck
+        """
+        self.filepath = filepath
+        self.deck = deck
+
+        # True if the whole deck has been written to the file
+        self.succeeded = False
+
+        # Amount of flashcards written to the file
+        self.exported_count = 0
+
+        # Amount of written flashcards whose question appeared before in the deck. Other applications, and imports of
+        # files without the scheduling values, may keep only the first of them.
+        self.duplicate_count = 0
+
+        # Description of the exception that made the export fail, if there is any
+        self.error = None
+
+    def summary(self) -> str:
+        """
+        :return: One line description of the result
+        :rtype: str
+        """
+        if self.succeeded:
+            text = "Exported {} flashcards of deck \"{}\" to {}.".format(self.exported_count, self.deck.title,
+                                                                        self.filepath)
+        else:
+            text = "Export of deck \"{}\" to {} has failed.".format(self.deck.title, self.filepath)
+        if self.duplicate_count > 0:
+            text += " {} of them repeat a question that appeared before in the deck.".format(self.duplicate_count)
+        return text
+
+    def __bool__(self) -> bool:
+        return self.succeeded
@@ -28,6 +28,16 @@ class Flashcard:
     MAX_LENGTH_OF_QUESTION = 500
     MAX_LENGTH_OF_ANSWER = 500
 
+    # Due dates are kept as day numbers: the amount of days since this date.
+    EPOCH_DATE = datetime.date(1970, 1, 1)
+
+    # Flashcards are kept in memory in large amounts. __slots__ saves the per-instance __dict__.
+    __slots__ = ("flashcard_id", "deck_id", "_question", "_answer", "last_study_date", "due_day",
+                 "inter_repetition_interval", "easiness_factor", "repetition_number", "text_cache")
+
+    # Many flashcards share the same due day. One int object is kept per day number, and shared by them.
+    _shared_day_numbers = dict()
+
     def __init__(self,
                  flashcard_id,
                  deck_id,
@@ -37,36 +47,44 @@ class Flashcard:
                  due_date_string="",
                  inter_repetition_interval=0,
                  easiness_factor=0.0,
-                 repetition_number=0):
+                 repetition_number=0,
+                 text_cache=None,
+                 due_day=None):
         """
         Flashcard class represents every flashcard item in a deck.
         :param int flashcard_id: Unique identifier. Provided by the database. Minimum value is 0.
         :param int deck_id: Unique identifier. Provided by the database. Minimum value is 0.
-        :param str question: Front side of the flashcard. Usually contains the question.
-        Length between 0 and MAX_LENGTH_OF_QUESTION
-        :param str answer: The bask side of the flashcard. Usually contains the answer of the question.
-        Length between 0 and MAX_LENGTH_OF_ANSWER.
+        :param Optional[str] question: Front side of the flashcard. Usually contains the question.
+        Length between 0 and MAX_LENGTH_OF_QUESTION. It can be None if text_cache is given.
+        :param Optional[str] answer: The bask side of the flashcard. Usually contains the answer of the question.
+        Length between 0 and MAX_LENGTH_OF_ANSWER. It can be None if text_cache is given.
         :param datetime.datetime last_study_date: When this flashcard last studied.
-        :param str due_date_string: Due date of this flashcard as str.
+        :param str due_date_string: Due date of this flashcard as str in the format of YYYY-MM-DD. Used only if
+        due_day is None.
         :param int inter_repetition_interval: How many days program should wait before setting this flahcard due again.
         Minimum value is 0.
         :param float easiness_factor: Calculated based on the answers of the user by using the spaced-repetition
         algorithm.
         :param int repetition_number: How many times user has studied this flashcard. Minimum value is 0.
+        :param Optional[FlashcardTextCache] text_cache: If question and answer are None, they are fetched from this
+        cache when they are accessed, so that they do not stay in memory with the flashcard.
+        :param Optional[int] due_day: Due date of this flashcard as day number. See Flashcard.day_number().
         """
 
         self.flashcard_id = flashcard_id
         self.deck_id = deck_id
-        self.question = question
-        self.answer = answer
+        self._question = question
+        self._answer = answer
+        self.text_cache = text_cache
         self.last_study_date: datetime.datetime = last_study_date
 
-        # Use due_date attribute to determine due flashcards that user should work on
-        if due_date_string == "":
+        # Use due_day attribute to determine due flashcards that user should work on
+        if due_day is not None:
+            self.due_day = Flashcard.shared_day_number(due_day)
+        elif due_date_string == "" or due_date_string is None:
             # There is no due date passed. Set it as today. Otherwise this flashcard won't be included in study
             # sessions.
-            today = datetime.datetime.today()
-            self.due_date_string = today.strftime('%Y-%m-%d')
+            self.due_day = Flashcard.today_day_number()
         else:
             # There is a due date passed. Assign it.
             self.due_date_string = due_date_string
@@ -76,6 +94,93 @@ class Flashcard:
         self.easiness_factor = easiness_factor                          # from 0 (hardest) to 4 (easiest)
         self.repetition_number = repetition_number                      # how many times user solved this flashcard?
 
+    @property
+    def question(self) -> str:
+        """
+        Question of the flashcard. It is fetched from self.text_cache if it is not kept in the flashcard.
+        :rtype: str
+        """
+        if self._question is None and self.text_cache is not None:
+            return self.text_cache.get(self.flashcard_id)[0]
+        return self._question
+
+    @question.setter
+    def question(self, question) -> None:
+        self._question = question
+
+    @property
+    def answer(self) -> str:
+        """
+        Answer of the flashcard. It is fetched from self.text_cache if it is not kept in the flashcard.
+        :rtype: str
+        """
+        if self._answer is None and self.text_cache is not None:
+            return self.text_cache.get(self.flashcard_id)[1]
+        return self._answer
+
+    @answer.setter
+    def answer(self, answer) -> None:
+        self._answer = answer
+
+    @property
+    def due_date_string(self) -> str:
+        """
+        Due date of the flashcard as str in the format of YYYY-MM-DD. It is calculated from self.due_day, which is
+        what is stored in the database.
+        :rtype: str
+        """
+        return Flashcard.date_string_from_day_number(self.due_day)
+
+    @due_date_string.setter
+    def due_date_string(self, due_date_string) -> None:
+        self.due_day = Flashcard.day_number_from_string(due_date_string)
+
+    @staticmethod
+    def day_number(date) -> int:
+        """
+        :param datetime.date date: Date, or datetime whose date is used
+        :return: Amount of days from Flashcard.EPOCH_DATE to the date
+        :rtype: int
+        """
+        if isinstance(date, datetime.datetime):
+            date = date.date()
+        return Flashcard.shared_day_number(date.toordinal() - Flashcard.EPOCH_DATE.toordinal())
+
+    @staticmethod
+    def day_number_from_string(date_string) -> int:
+        """
+        :param str date_string: Date as str in the format of YYYY-MM-DD
+        :return: Day number of the date. See Flashcard.day_number().
+        :rtype: int
+        """
+        return Flashcard.day_number(datetime.datetime.strptime(date_string[:10], '%Y-%m-%d').date())
+
+    @staticmethod
+    def date_string_from_day_number(day_number) -> str:
+        """
+        :param int day_number: Day number. See Flashcard.day_number().
+        :return: Date as str in the format of YYYY-MM-DD
+        :rtype: str
+        """
+        return datetime.date.fromordinal(Flashcard.EPOCH_DATE.toordinal() + day_number).strftime('%Y-%m-%d')
+
+    @staticmethod
+    def today_day_number() -> int:
+        """
+        :return: Day number of today's local date
+        :rtype: int
+        """
+        return Flashcard.day_number(datetime.date.today())
+
+    @staticmethod
+    def shared_day_number(day_number) -> int:
+        """
+        :param int day_number: Day number
+        :return: The int object kept for the day number, so that flashcards with the same due day share it.
+        :rtype: int
+        """
+        return Flashcard._shared_day_numbers.setdefault(day_number, day_number)
+
     def set_inter_repetition_interval(self, grade) -> None:
         """
         Parameter grade is a number between 0 (hardest) and 4 (easiest), indicating the difficulty
@@ -110,41 +215,47 @@ class Flashcard:
         Set the self.last_study_datetime property and save to the database.
         :param database_manager:
         """
-        self.last_study_datetime = datetime.datetime.now()
+        self.last_study_date = datetime.datetime.now()
         database_manager.update_flashcard_in_db(flashcard_id=self.flashcard_id,
                                                 question=self.question,
                                                 answer=self.answer,
                                                 last_study_date=self.last_study_date,
-                                                due_date_string=self.due_date_string,
+                                                due_day=self.due_day,
                                                 inter_repetition_interval=self.inter_repetition_interval,
                                                 easiness_factor=self.easiness_factor,
                                                 repetition_number=self.repetition_number)
 
     def set_due_date(self) -> None:
         """
-        Set self.due_date_string attribute by adding the interval calculated by spaced-repetition algorithm.
+        Set self.due_day attribute by adding the interval calculated by spaced-repetition algorithm.
         """
         due_date = datetime.datetime.now() + datetime.timedelta(self.inter_repetition_interval)
         # today = datetime.datetime.today()
-        self.due_date_string = due_date.strftime('%Y-%m-%d')
+        self.due_day = Flashcard.day_number(due_date)
         # DEBUG
         # print("Flashcard's new due date: ", self.due_date_string)
 
-    def process_answer(self, grade, database_manager) -> None:
+    def process_answer(self, grade, database_manager, response_time=None) -> None:
         """
         Process user's answer to a flashcard, and set the due date as the final result.
-        Update flashcard data in the database.
+        Queue the update of the flashcard data in the database, and the review to be logged. They are written in the
+        background.
         :param int grade: Between 0 and 4
         :param DatabaseManager database_manager: DatabaseManager instance kept in the main controller (Program)
+        :param Optional[float] response_time: Seconds the user took to answer, if it is known
         """
+        previous_interval = self.inter_repetition_interval
+        previous_easiness_factor = self.easiness_factor
         self.last_study_date = datetime.datetime.now()
         self.set_inter_repetition_interval(grade)
         self.set_due_date()
-        database_manager.update_flashcard_in_db(self.flashcard_id,
-                                                self.question,
-                                                self.answer,
+        database_manager.queue_flashcard_review(self.flashcard_id,
                                                 self.last_study_date,
-                                                self.due_date_string,
+                                                self.due_day,
                                                 self.inter_repetition_interval,
                                                 self.easiness_factor,
-                                                self.repetition_number)
+                                                self.repetition_number,
+                                                grade=grade,
+                                                previous_interval=previous_interval,
+                                                previous_easiness_factor=previous_easiness_factor,
+                                                response_time=response_time)
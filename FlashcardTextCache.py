@@ -0,0 +1,117 @@
+#   Program FlashCards
+#
+#   Copyright 2020 Ertugrul Harman
+#
+#       E-mail  : harmancode@gmail.com
+#       Twitter : https://twitter.com/harmancode
+#       Web     : https://harman.page
+#
+#   This file is part of Flashcards.
+#
+#   Flashcards is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+from collections import OrderedDict
+
+
+class FlashcardTextCache:
+    # Amount of (question, answer) pairs kept in memory.
+    DEFAULT_CAPACITY = 256
+
+    # Maximum amount of flashcard_id values in one SELECT ... IN (...) statement.
+    PREFETCH_BATCH_SIZE = 500
+
+    def __init__(self, connection_manager, capacity=DEFAULT_CAPACITY):
+        """
+        FlashcardTextCache keeps the question and answer of recently used flashcards, so that Flashcard objects can be
+        loaded without their text. Texts are fetched from the database on demand, and the least recently used ones are
+        dropped when there are more than capacity of them.
+        :param ConnectionManager connection_manager: Provides connections to the database
+        :param int capacity: Maximum amount of flashcards whose texts are kept
+        """
+        self.connection_manager = connection_manager
+        self.capacity = max(1, int(capacity))
+
+        # {flashcard_id: (question, answer)}, least recently used first
+        self._texts = OrderedDict()
+
+    def get(self, flashcard_id) -> (str, str):
+        """
+        Return the question and answer of a flashcard, fetching them from the database if they are not cached.
+        :param int flashcard_id: flashcard_id of the Flashcard
+        :return: (question, answer). Empty strings if the flashcard is not in the database.
+        :rtype: (str, str)
+        """
+        texts = self._texts.get(flashcard_id)
+        if texts is not None:
+            self._texts.move_to_end(flashcard_id)
+            return texts
+
+        with self.connection_manager.transaction() as cursor:
+            row = cursor.execute("SELECT question, answer FROM flashcard WHERE flashcard_id = ?",
+                                 (flashcard_id,)).fetchone()
+        texts = (row[0], row[1]) if row is not None else ("", "")
+        self._store(flashcard_id, texts)
+        return texts
+
+    def prefetch(self, flashcard_ids) -> None:
+        """
+        Fetch the texts of the given flashcards with a few queries, instead of one query per flashcard. Only as many
+        flashcards as the capacity of the cache are fetched.
+        :param [int] flashcard_ids: flashcard_id values of the flashcards that are about to be used
+        """
+        missing_ids = [flashcard_id for flashcard_id in flashcard_ids[:self.capacity]
+                       if flashcard_id not in self._texts]
+        for start in range(0, len(missing_ids), FlashcardTextCache.PREFETCH_BATCH_SIZE):
+            batch = missing_ids[start:start + FlashcardTextCache.PREFETCH_BATCH_SIZE]
+            placeholders = ", ".join("?" * len(batch))
+            with self.connection_manager.transaction() as cursor:
+                rows = cursor.execute("SELECT flashcard_id, question, answer FROM flashcard "
+                                      "WHERE flashcard_id IN ({})".format(placeholders), batch).fetchall()
+            for row in rows:
+                self._store(row[0], (row[1], row[2]))
+
+    def update(self, flashcard_id, question, answer) -> None:
+        """
+        Replace the cached texts of a flashcard after they have been changed in the database.
+        :param int flashcard_id: flashcard_id of the Flashcard
+        :param str question: New question
+        :param str answer: New answer
+        """
+        if flashcard_id in self._texts:
+            self._texts[flashcard_id] = (question, answer)
+
+    def remove(self, flashcard_id) -> None:
+        """
+        Forget the texts of a flashcard, e.g. after it has been deleted from the database.
+        :param int flashcard_id: flashcard_id of the Flashcard
+        """
+        self._texts.pop(flashcard_id, None)
+
+    def clear(self) -> None:
+        """
+        Forget all cached texts.
+        """
+        self._texts.clear()
+
+    def _store(self, flashcard_id, texts) -> None:
+        """
+        Put texts into the cache, dropping the least recently used ones if the cache is full.
+        :param int flashcard_id: flashcard_id of the Flashcard
+        :param (str, str) texts: (question, answer)
+        """
+        self._texts[flashcard_id] = texts
+        self._texts.move_to_end(flashcard_id)
+        while len(self._texts) > self.capacity:
+            self._texts.popitem(last=False)
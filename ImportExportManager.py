@@ -23,130 +23,141 @@
 
 
 import csv  # Documentation: https://docs.python.org/3/library/csv.html
+import os
+from collections import deque
 from time import localtime, strftime
 
+from CsvDeckParser import CsvDeckParser
 from Deck import Deck
 from Flashcard import Flashcard
 from DatabaseManager import DatabaseManager
-
-try:
-    import tkinter as tk  # python 3
-except ImportError:
-    import Tkinter as tk  # python 2
+from ExportResult import ExportResult
+from ImportResult import ImportResult
 
 
 class ImportExportManager:
+    # Amount of imported flashcards that are inserted into the database in one transaction.
+    IMPORT_CHUNK_SIZE = 1000
+
+    # Amount of flashcards that import_csv_directory() inserts into the database in one transaction, at least. Files
+    # are not split between transactions.
+    DIRECTORY_IMPORT_TRANSACTION_SIZE = 50000
+    # Amount of parsed files that wait to be inserted, per worker process. It bounds the memory used by files that
+    # are parsed faster than they are inserted.
+    PARSED_FILES_PER_WORKER = 2
 
     def __init__(self, database_manager: DatabaseManager):
         """
         ImportExportManager class handles importing and exporting data operations.
+        It does not interact with the user. Its methods return ImportResult and ExportResult objects, and the caller
+        reports them, so that it can be used without a display.
         :param database_manager: DatabaseManager
         """
         self.database_manager: DatabaseManager = database_manager
 
-    def import_csv_file(self, filepath) -> bool:
+    def import_csv_file(self, filepath, progress_callback=None, chunk_size=IMPORT_CHUNK_SIZE) -> ImportResult:
         """
-        Imports given csv file
+        Imports given csv file as a new deck.
+        The file is read as a stream with csv.reader, and flashcards are inserted in chunks of chunk_size rows, each
+        chunk in its own transaction, so memory use does not grow with the file size. If a question appears more
+        than once in the file, only its first occurrence is imported, unless the file has been exported with the
+        scheduling values (fileversion 2). Such files are imported as they are, with the schedule of each flashcard.
+        If the import fails or it is cancelled, the partially imported deck is deleted from the database.
         :param filepath: Path to the file, including filename
-        :return: True if import is successful. Otherwise, False.
+        :param progress_callback: Called after every chunk as progress_callback(imported_count, bytes_read,
+        total_bytes). Import is cancelled if it returns False.
+        :type progress_callback: Optional[Callable[[int, int, int], bool]]
+        :param int chunk_size: Amount of flashcards inserted per transaction
+        :return: Counts, rejected rows and warnings of the import. It is True in boolean context if import is
+        successful.
+        :rtype: ImportResult
         """
 
+        result = ImportResult(filepath)
+        new_deck = None
+
         try:
 
+            total_bytes = os.path.getsize(filepath)
+
             with open(filepath, newline='', encoding='utf-8') as csvfile:
-                reader = csv.DictReader(csvfile)
-                reader.fieldnames = ("key", "value")
-                dictionary = dict()
-                decktitle = ""
+                reader = csv.reader(csvfile)
+                # Reads the rows, and counts the flashcards, rejected rows and duplicate questions.
+                parser = CsvDeckParser(result)
                 count = 0
-                valid_file = False
+                # Rows that have been read but not inserted yet. It never holds more than chunk_size rows.
+                chunk = []
+                cancelled = False
+
+                # Get current local time as formatted string
+                datetime_string = strftime("%Y-%m-%d %H:%M:%S", localtime())
+
+                # All imported flashcards are due today.
+                today_day = Flashcard.today_day_number()
 
                 # Process every row in the imported data
                 for row in reader:
-                    # print(row['key'], row['value'])
-                    try:
-                        # Check if key is special
-                        if row['key'] == 'decktitle':
-                            decktitle = row['value']
-                        elif row['key'] == 'fileversion':
-                            # There is not any process defined yet for this data.
-                            pass
-                        elif row['key'] == 'program':
-                            # There is not any process defined yet for this data.
-                            pass
-                        else:
-                            # Key is not special, process it as an ordinary row
-                            dictionary[row['key']] = row['value']
-                            count += 1
-                    except Exception as error:
-                        print("Bad row in import_csv_file(): ", row)
-                        print("Exception in import_csv_file(): ", error)
+                    flashcard_row = parser.parse_row(row, reader.line_num)
+                    if flashcard_row is None:
+                        continue
+                    chunk.append(flashcard_row)
+                    count = parser.count
+
+                    if count > Deck.MAXIMUM_AMOUNT_OF_FLASHCARDS:
+                        break
+
+                    if len(chunk) >= chunk_size:
+                        if new_deck is None:
+                            new_deck = self.create_imported_deck(parser.decktitle, datetime_string)
+                        self.add_imported_flashcards(new_deck, chunk, today_day)
+                        chunk = []
+                        if progress_callback is not None:
+                            if progress_callback(count, csvfile.buffer.tell(), total_bytes) is False:
+                                cancelled = True
+                                break
                 # end for row in reader
 
+                if cancelled:
+                    self.delete_partially_imported_deck(new_deck)
+                    result.cancelled = True
+                    return result
+
                 if count <= 0:
-                    tk.messagebox.showwarning("No flashcards found",
-                                              "There is not any recognizable flashcards found in this file.")
-                    valid_file = False
+                    result.add_warning("No flashcards found",
+                                       "There is not any recognizable flashcards found in this file.")
+                    return result
                 elif count > Deck.MAXIMUM_AMOUNT_OF_FLASHCARDS:
+                    self.delete_partially_imported_deck(new_deck)
                     warning_message = "This file contains more flashcards that a deck may contain. " \
                                       "A deck may not contain more than {} " \
                                       "flashcards".format(Deck.MAXIMUM_AMOUNT_OF_FLASHCARDS)
-                    tk.messagebox.showwarning("Too many flashcards",
-                                              warning_message)
-                    valid_file = False
-                else:
-                    valid_file = True
-                # end if count <= ImportExportManager.MAXIMUM_FLASHCARDS_IN_IMPORTED_DECK
-
-                if valid_file:
-                    # Get current local time as formatted string
-                    datetime_string = strftime("%Y-%m-%d %H:%M:%S", localtime())
-
-                    decktitle = decktitle.strip()
-
-                    # If there is not any decktitle key found in the imported data, set a title by adding current date
-                    # and time to the title.
-                    if decktitle == '':
-                        decktitle = "Imported deck (" + datetime_string + ")"
-
-                    # Create imported deck in memory and in database
-                    new_deck_id = self.database_manager.add_new_deck_to_db(decktitle)
-                    new_deck = Deck(new_deck_id, decktitle)
-                    self.database_manager.decks.append(new_deck)
-
-                    # print()
-                    # print("dictionary is filled. its contents:", dictionary.items())
-                    # print("now passing to listdict phase...")
-
-                    # Add imported flashcards to the imported deck
-                    listdict = list(dictionary.items())
-
-                    for item in listdict:
-
-                        # print("question: ", item[0])
-                        # print("answer: ", item[1])
-
-                        today_as_string = self.database_manager.today_as_string()
-
-                        new_flashcard_id = self.database_manager.add_new_flashcard_to_db(deck_id=new_deck_id,
-                                                                                         question=item[0],
-                                                                                         answer=item[1],
-                                                                                         last_study_date=None,
-                                                                                         due_date_string=today_as_string)
-                        new_flashcard = Flashcard(flashcard_id=new_flashcard_id,
-                                                  deck_id=new_deck_id,
-                                                  question=item[0],
-                                                  answer=item[1])
-
-                        new_deck.append_to_flashcards(new_flashcard)
-
-                    # end for item in listdict
-
-                    return True
-
-                # end if valid_file
-
-            return False
+                    result.add_warning("Too many flashcards",
+                                       warning_message)
+                    return result
+
+                # Insert the last, incomplete chunk
+                if new_deck is None:
+                    new_deck = self.create_imported_deck(parser.decktitle, datetime_string)
+                if len(chunk) > 0:
+                    self.add_imported_flashcards(new_deck, chunk, today_day)
+
+                # The decktitle row may come after the first chunk has been inserted. Rename the deck in that case.
+                decktitle = parser.decktitle.strip()
+                if decktitle != '' and decktitle != new_deck.title:
+                    new_deck.title = decktitle
+                    self.database_manager.update_deck_in_db(new_deck.deck_id, new_deck.title,
+                                                            new_deck.last_study_datetime)
+
+                if progress_callback is not None:
+                    progress_callback(count, total_bytes, total_bytes)
+
+                # The deck becomes visible to the rest of the Program only after it has been fully imported.
+                self.database_manager.decks.append(new_deck)
+
+                result.deck = new_deck
+                result.imported_count = count
+                result.succeeded = True
+                return result
 
             # end with open
 
@@ -154,51 +165,264 @@ class ImportExportManager:
 
         except Exception as error:
             print("Exception import_csv_file(): ", error)
+            self.delete_partially_imported_deck(new_deck)
+            result.error = str(error)
+            return result
 
         # end except
 
     # end import_csv_file()
 
-    def export_csv_file(self, filepath, deck) -> bool:
+    @staticmethod
+    def csv_files_in_directory(directory) -> [str]:
+        """
+        :param str directory: Path of a directory
+        :return: Paths of the csv files in the directory, sorted by name. Subdirectories are not searched.
+        :rtype: [str]
+        """
+        names = sorted(name for name in os.listdir(directory)
+                       if name.lower().endswith(".csv") and os.path.isfile(os.path.join(directory, name)))
+        return [os.path.join(directory, name) for name in names]
+
+    def import_csv_directory(self, directory, progress_callback=None, max_workers=None,
+                             transaction_size=DIRECTORY_IMPORT_TRANSACTION_SIZE) -> [ImportResult]:
+        """
+        Imports every csv file in a directory as a new deck.
+        Parsing csv is CPU-bound, so the files are parsed in parallel by a pool of max_workers processes. The parsed
+        decks are inserted by this process alone, through its own database connection, in transactions of at least
+        transaction_size flashcards. Every file is imported as in import_csv_file(). A file that can not be imported
+        does not keep the others from being imported. A deck whose file has no decktitle row is named after the file.
+        :param str directory: Path of the directory
+        :param progress_callback: Called after every file as progress_callback(done_file_count, file_count). Import is
+        cancelled if it returns False; the files that have been imported until then are kept.
+        :type progress_callback: Optional[Callable[[int, int], bool]]
+        :param Optional[int] max_workers: Amount of worker processes. The amount of CPUs if it is None. Files are
+        parsed in this process if it is 1.
+        :param int transaction_size: Amount of flashcards inserted per transaction, at least
+        :return: Result of every file, in the order of file names
+        :rtype: [ImportResult]
+        """
+        filepaths = self.csv_files_in_directory(directory)
+        results = []
+        if len(filepaths) == 0:
+            return results
+        if max_workers is None:
+            max_workers = os.cpu_count() or 1
+        max_workers = max(1, min(max_workers, len(filepaths)))
+
+        today_day = Flashcard.today_day_number()
+
+        # Parsed files that have not been inserted yet, as (title, rows, result) tuples
+        batch = []
+        batch_flashcard_count = 0
+        cancelled = False
+
+        for filepath, parsed_file in self.parse_csv_files(filepaths, max_workers):
+            decktitle, rows, result = parsed_file
+            results.append(result)
+            if len(rows) > 0:
+                decktitle = decktitle.strip()
+                if decktitle == '':
+                    decktitle = os.path.splitext(os.path.basename(filepath))[0]
+                batch.append((decktitle, rows, result))
+                batch_flashcard_count += len(rows)
+            if batch_flashcard_count >= transaction_size:
+                self.add_imported_decks(batch, today_day)
+                batch = []
+                batch_flashcard_count = 0
+            if progress_callback is not None and progress_callback(len(results), len(filepaths)) is False:
+                cancelled = True
+                break
+
+        if len(batch) > 0:
+            self.add_imported_decks(batch, today_day)
+
+        if cancelled:
+            for filepath in filepaths[len(results):]:
+                result = ImportResult(filepath)
+                result.cancelled = True
+                results.append(result)
+        return results
+
+    @staticmethod
+    def parse_csv_files(filepaths, max_workers):
+        """
+        Parse csv files with CsvDeckParser.parse_file(), in max_workers processes. Only a few parsed files per worker
+        are kept waiting to be consumed; the next files are submitted as the results are consumed.
+        :param [str] filepaths: Paths of the files
+        :param int max_workers: Amount of worker processes. Files are parsed in this process if it is 1.
+        :return: Generator of (filepath, (title, rows, result)) tuples, in the order of filepaths
+        :rtype: Iterator[(str, (str, [tuple], ImportResult))]
+        """
+        if max_workers <= 1:
+            for filepath in filepaths:
+                yield filepath, CsvDeckParser.parse_file(filepath, Deck.MAXIMUM_AMOUNT_OF_FLASHCARDS)
+            return
+
+        # multiprocessing is slow to import, so it is imported only when files are parsed in worker processes.
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            pending = deque()
+            next_index = 0
+            try:
+                while len(pending) > 0 or next_index < len(filepaths):
+                    while next_index < len(filepaths) and \
+                            len(pending) < max_workers * ImportExportManager.PARSED_FILES_PER_WORKER:
+                        filepath = filepaths[next_index]
+                        pending.append((filepath, executor.submit(CsvDeckParser.parse_file, filepath,
+                                                                  Deck.MAXIMUM_AMOUNT_OF_FLASHCARDS)))
+                        next_index += 1
+                    filepath, future = pending.popleft()
+                    try:
+                        parsed_file = future.result()
+                    except Exception as error:
+                        # The worker process has failed, e.g. it has run out of memory.
+                        print("Exception parse_csv_files(): ", error)
+                        result = ImportResult(filepath)
+                        result.error = str(error)
+                        parsed_file = ("", [], result)
+                    yield filepath, parsed_file
+            finally:
+                # The consumer may stop early. Do not parse the files that have not been started.
+                for filepath, future in pending:
+                    future.cancel()
+
+    def add_imported_decks(self, parsed_files, due_day) -> None:
+        """
+        Insert parsed files as new decks in one transaction, and make the decks visible to the rest of the Program.
+        Their flashcards are loaded from the database when they are first needed.
+        :param parsed_files: (title, rows, result) tuples. The results are updated.
+        :type parsed_files: [(str, [tuple], ImportResult)]
+        :param int due_day: Due date of the imported flashcards without a schedule as day number
+        """
+        try:
+            added_decks = self.database_manager.add_decks_bulk([(title, rows) for title, rows, result in parsed_files],
+                                                               due_day)
+        except Exception as error:
+            print("Exception add_imported_decks(): ", error)
+            added_decks = [(None, str(error))] * len(parsed_files)
+
+        for (title, rows, result), (deck_id, error) in zip(parsed_files, added_decks):
+            if deck_id is None:
+                result.error = error
+                continue
+            due_count = sum(1 for row in rows if len(row) == 2 or row[3] <= due_day)
+            deck = Deck(deck_id, title, database_manager=self.database_manager, flashcard_count=len(rows),
+                        due_flashcard_count=due_count)
+            self.database_manager.decks.append(deck)
+            result.deck = deck
+            result.imported_count = len(rows)
+            result.succeeded = True
+
+    def create_imported_deck(self, decktitle, datetime_string) -> Deck:
+        """
+        Create the deck of an import in the database.
+        :param str decktitle: Title of the deck found in the imported file so far. It may be empty.
+        :param str datetime_string: Time of the import. Used in the title if decktitle is empty.
+        :return: New Deck object. It is not added to database_manager.decks. Its flashcards are not kept in memory;
+        they are loaded from the database when they are first needed.
+        :rtype: Deck
+        """
+        decktitle = decktitle.strip()
+
+        # If there is not any decktitle key found in the imported data, set a title by adding current date
+        # and time to the title.
+        if decktitle == '':
+            decktitle = "Imported deck (" + datetime_string + ")"
+
+        new_deck_id = self.database_manager.add_new_deck_to_db(decktitle)
+        return Deck(new_deck_id, decktitle, database_manager=self.database_manager)
+
+    @staticmethod
+    def row_from_schedule(row) -> tuple:
+        """
+        Inverse of CsvDeckParser.schedule_from_row().
+        :param tuple row: Row of the flashcard table with the columns of DatabaseManager.SCHEDULED_EXPORT_COLUMNS
+        :return: Flashcard row of a file of CsvDeckParser.SCHEDULED_FILE_VERSION
+        :rtype: tuple
+        """
+        question, answer, last_study_date, due_day, inter_repetition_interval, easiness_factor, repetition_number = row
+        return (question,
+                answer,
+                "" if last_study_date is None else str(last_study_date),
+                Flashcard.date_string_from_day_number(due_day),
+                inter_repetition_interval,
+                easiness_factor,
+                repetition_number)
+
+    def add_imported_flashcards(self, deck, rows, due_day) -> None:
+        """
+        Insert a chunk of imported flashcards into the database in one transaction, and count them in the deck. No
+        Flashcard objects are created, so memory use does not grow with the size of the file.
+        :param Deck deck: Deck of the import. Its flashcards are not loaded.
+        :param [tuple] rows: (question, answer) tuples, or (question, answer, last_study_date, due_day,
+        inter_repetition_interval, easiness_factor, repetition_number) tuples of flashcards that keep their schedule
+        :param int due_day: Due date of the imported flashcards without a schedule as day number
+        """
+        self.database_manager.add_flashcards_bulk(deck_id=deck.deck_id, rows=rows, due_day=due_day)
+        deck.flashcard_count += len(rows)
+        deck.due_flashcard_count += sum(1 for row in rows if len(row) == 2 or row[3] <= due_day)
+
+    def delete_partially_imported_deck(self, deck) -> None:
+        """
+        Clean up after a failed or cancelled import by deleting the deck and its flashcards from the database.
+        :param Optional[Deck] deck: Deck of the import. Nothing is done if it is None.
+        """
+        if deck is not None:
+            try:
+                self.database_manager.delete_deck_from_db(deck.deck_id)
+            except Exception as error:
+                print("Exception delete_partially_imported_deck(): ", error)
+
+    def export_csv_file(self, filepath, deck, include_schedule=False,
+                        batch_size=DatabaseManager.EXPORT_BATCH_SIZE) -> ExportResult:
         """
         Export a deck to a csv file.
+        Flashcards are streamed from the database in batches of batch_size rows, so memory use does not grow with the
+        size of the deck, and decks whose flashcards are not loaded are exported without loading them. Every
+        flashcard is exported, in the order of the deck, including the ones whose question appeared before.
         :param filepath: Path of the file with .csv extension added.
         :type filepath: str
         :param deck: Deck object to be exported
         :type deck: Deck
-        :return: True if export is successful. Otherwise, false.
-        :rtype: bool
+        :param include_schedule: True to write the scheduling values of every flashcard after its question and
+        answer (fileversion 2), so that the file can be imported without losing the study progress. False to write
+        question and answer only, for use in other applications.
+        :type include_schedule: bool
+        :param batch_size: Amount of flashcards read from the database at a time
+        :type batch_size: int
+        :return: Amount of exported flashcards. It is True in boolean context if export is successful.
+        :rtype: ExportResult
         """
 
+        result = ExportResult(filepath, deck)
+
         try:
 
             with open(filepath, 'w', newline='', encoding='utf-8') as csvfile:
 
-                dictionary = dict()
-
-                for flashcard in deck.flashcards:
-                    question = flashcard.question
-                    answer = flashcard.answer
-                    dictionary[question] = answer
-
-                fieldnames = ['key', 'value']
-
-                writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
+                writer = csv.writer(csvfile)
 
                 # writer.writeheader() # Not necessary
-                writer.writerow({'key': 'decktitle', 'value': deck.title})
+                if include_schedule:
+                    writer.writerow(('program', 'Flashcards'))
+                    writer.writerow(('fileversion', CsvDeckParser.SCHEDULED_FILE_VERSION))
+                writer.writerow(('decktitle', deck.title))
 
-                for key in dictionary:
-                    # Uncomment to print the data as it is being written to the file.
-                    # print("key: ", key)
-                    # print("value: ", dictionary[key])
-                    # print()
-                    writer.writerow({'key': key, 'value': dictionary[key]})
+                for rows in self.database_manager.iterate_flashcard_rows(deck.deck_id, include_schedule, batch_size):
+                    if include_schedule:
+                        rows = [ImportExportManager.row_from_schedule(row) for row in rows]
+                    writer.writerows(rows)
+                    result.exported_count += len(rows)
 
-                return True
+            result.duplicate_count = self.database_manager.count_duplicate_questions(deck.deck_id)
+            result.succeeded = True
+            return result
 
         except Exception as error:
 
             print("Exception export_csv_file(): ", error)
 
-            return False
+            result.error = str(error)
+            return result
@@ -0,0 +1,102 @@
+#   Program FlashCards
+#
+#   Copyright 2020 Ertugrul Harman
+#
+#       E-mail  : harmancode@gmail.com
+#       Twitter : https://twitter.com/harmancode
+#       Web     : https://harman.page
+#
+#   This file is part of Flashcards.
+#
+#   Flashcards is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+class ImportResult:
+    # Amount of rejected rows that are kept with their content. Only the amount of the others is counted.
+    MAXIMUM_AMOUNT_OF_KEPT_REJECTED_ROWS = 100
+
+    def __init__(self, filepath):
+        """
+        ImportResult describes what happened while a csv file was imported by ImportExportManager. It does not show
+        anything to the user; the caller decides how to report it.
+        A result is True in boolean context when the import has succeeded.
+        :param str filepath: Path of the imported file
+        """
+        self.filepath = filepath
+
+        # True if the deck has been fully imported
+        self.succeeded = False
+
+        # True if the import has been cancelled by the progress callback
+        self.cancelled = False
+
+        # Imported deck. It is None if the import has failed or it has been cancelled.
+        self.deck = None
+
+        # Amount of imported flashcards
+        self.imported_count = 0
+
+        # Amount of rows that have been skipped because their question appeared before in the file
+        self.duplicate_count = 0
+
+        # Amount of rows that could not be read as flashcards
+        self.rejected_count = 0
+
+        # First rejected rows as (line_number, row) tuples. See MAXIMUM_AMOUNT_OF_KEPT_REJECTED_ROWS.
+        self.rejected_rows: [(int, [str])] = []
+
+        # Warnings for the user as (title, message) tuples
+        self.warnings: [(str, str)] = []
+
+        # Description of the exception that made the import fail, if there is any
+        self.error = None
+
+    def reject_row(self, line_number, row) -> None:
+        """
+        Record a row that could not be read as a flashcard.
+        :param int line_number: Line number of the row in the file
+        :param [str] row: Fields of the row
+        """
+        self.rejected_count += 1
+        if len(self.rejected_rows) < ImportResult.MAXIMUM_AMOUNT_OF_KEPT_REJECTED_ROWS:
+            self.rejected_rows.append((line_number, row))
+
+    def add_warning(self, title, message) -> None:
+        """
+        Record a warning for the user.
+        :param str title: Short title of the warning
+        :param str message: Warning message
+        """
+        self.warnings.append((title, message))
+
+    def summary(self) -> str:
+        """
+        :return: One line description of the result
+        :rtype: str
+        """
+        if self.succeeded:
+            text = "Imported {} flashcards from {} into deck \"{}\".".format(self.imported_count, self.filepath,
+                                                                            self.deck.title)
+        elif self.cancelled:
+            text = "Import of {} has been cancelled.".format(self.filepath)
+        else:
+            text = "Import of {} has failed.".format(self.filepath)
+        if self.duplicate_count > 0:
+            text += " {} duplicate questions skipped.".format(self.duplicate_count)
+        if self.rejected_count > 0:
+            text += " {} unreadable rows skipped.".format(self.rejected_count)
+        return text
+
+    def __bool__(self) -> bool:
+        return self.succeeded
@@ -0,0 +1,365 @@
+#   Program FlashCards
+#
+#   Copyright 2020 Ertugrul Harman
+#
+#       E-mail  : harmancode@gmail.com
+#       Twitter : https://twitter.com/harmancode
+#       Web     : https://harman.page
+#
+#   This file is part of Flashcards.
+#
+#   Flashcards is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import deque
+
+
+class Instrumentation:
+    # Set to 1 to instrument every DatabaseManager. See from_environment().
+    ENABLED_VARIABLE = "FLASHCARDS_INSTRUMENTATION"
+    # Statements slower than this many milliseconds are logged with their query plan.
+    SLOW_STATEMENT_THRESHOLD_VARIABLE = "FLASHCARDS_SLOW_SQL_MS"
+    # Path of the JSON report written when the DatabaseManager is closed.
+    OUTPUT_VARIABLE = "FLASHCARDS_INSTRUMENTATION_OUTPUT"
+
+    DEFAULT_SLOW_STATEMENT_THRESHOLD = 0.05
+
+    # Upper bounds of the latency histogram buckets, in milliseconds. The last bucket holds everything slower.
+    HISTOGRAM_BOUNDS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+
+    # Amount of slow statements kept in the log. Older ones are dropped.
+    MAXIMUM_AMOUNT_OF_LOGGED_STATEMENTS = 200
+
+    # Amount of statements shown by format_report()
+    AMOUNT_OF_REPORTED_STATEMENTS = 10
+
+    def __init__(self, slow_statement_threshold=DEFAULT_SLOW_STATEMENT_THRESHOLD, output_path=None):
+        """
+        Instrumentation records call counts and latency histograms of the public methods of a DatabaseManager, and
+        the execution time of every SQL statement. Statements slower than slow_statement_threshold are logged with
+        their EXPLAIN QUERY PLAN.
+        Statement times cover executing the statement until its first row; fetching the other rows is part of the
+        time of the calling method.
+        It is opt-in: see from_environment(), and the instrumentation parameter of DatabaseManager.
+        :param float slow_statement_threshold: In seconds
+        :param Optional[str] output_path: The report is written to this JSON file by close(). Nothing is written if
+        it is None.
+        """
+        self.slow_statement_threshold = slow_statement_threshold
+        self.output_path = output_path
+
+        # Statistics of DatabaseManager methods and of SQL statements. {name: LatencyStatistics}
+        self.method_statistics = dict()
+        self.statement_statistics = dict()
+
+        # Statements that have exceeded the threshold, newest last
+        self.slow_statements = deque(maxlen=Instrumentation.MAXIMUM_AMOUNT_OF_LOGGED_STATEMENTS)
+
+        # Query plans of the slow statements, so that every statement is explained once. {sql: [str]}
+        self._query_plans = dict()
+
+        # Methods and statements are recorded by the Program thread and by the ReviewWriter thread.
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def from_environment(db_path):
+        """
+        Create an Instrumentation if it is enabled with the FLASHCARDS_INSTRUMENTATION environment variable.
+        FLASHCARDS_SLOW_SQL_MS sets the threshold of slow statements, and FLASHCARDS_INSTRUMENTATION_OUTPUT the path
+        of the report, which is the database path with ".instrumentation.json" added by default.
+        :param str db_path: Path of the instrumented database
+        :return: New Instrumentation, or None if it is not enabled
+        :rtype: Optional[Instrumentation]
+        """
+        if os.environ.get(Instrumentation.ENABLED_VARIABLE, "") in ("", "0"):
+            return None
+        threshold = Instrumentation.DEFAULT_SLOW_STATEMENT_THRESHOLD
+        try:
+            threshold = float(os.environ[Instrumentation.SLOW_STATEMENT_THRESHOLD_VARIABLE]) / 1000
+        except KeyError:
+            pass
+        except ValueError as error:
+            print("Invalid {}: {}".format(Instrumentation.SLOW_STATEMENT_THRESHOLD_VARIABLE, error))
+        output_path = os.environ.get(Instrumentation.OUTPUT_VARIABLE, db_path + ".instrumentation.json")
+        return Instrumentation(threshold, output_path)
+
+    def instrument(self, database_manager) -> None:
+        """
+        Replace the public methods of a DatabaseManager instance with wrappers that record their latency. The class
+        itself is not changed, so other instances are not affected.
+        :param DatabaseManager database_manager: Instance to be instrumented
+        """
+        for name in dir(type(database_manager)):
+            if name.startswith("_"):
+                continue
+            method = getattr(database_manager, name)
+            if not callable(method) or isinstance(method, type):
+                continue
+            setattr(database_manager, name, self.timed(name, method))
+
+    def timed(self, name, function):
+        """
+        :param str name: Name under which the calls are recorded
+        :param Callable function: Function to be timed
+        :return: Function that calls function and records its latency
+        :rtype: Callable
+        """
+        def timed_function(*arguments, **keyword_arguments):
+            start_time = time.perf_counter()
+            try:
+                return function(*arguments, **keyword_arguments)
+            finally:
+                self.record_call(name, time.perf_counter() - start_time)
+        timed_function.__name__ = name
+        timed_function.__doc__ = function.__doc__
+        return timed_function
+
+    def record_call(self, name, seconds) -> None:
+        """
+        :param str name: Name of the DatabaseManager method
+        :param float seconds: Latency of one call
+        """
+        with self._lock:
+            statistics = self.method_statistics.get(name)
+            if statistics is None:
+                statistics = LatencyStatistics()
+                self.method_statistics[name] = statistics
+            statistics.add(seconds)
+
+    def record_statement(self, connection, sql, parameters, seconds) -> None:
+        """
+        Record the execution time of a statement, and log it with its query plan if it is slow.
+        :param sqlite3.Connection connection: Connection that has executed the statement
+        :param str sql: SQL statement
+        :param parameters: Parameters of the statement. For executemany(), the parameters of its first row.
+        :param float seconds: Execution time
+        """
+        sql = " ".join(sql.split())
+        with self._lock:
+            statistics = self.statement_statistics.get(sql)
+            if statistics is None:
+                statistics = LatencyStatistics()
+                self.statement_statistics[sql] = statistics
+            statistics.add(seconds)
+        if seconds >= self.slow_statement_threshold:
+            query_plan = self.query_plan(connection, sql, parameters)
+            with self._lock:
+                self.slow_statements.append({"time": time.strftime("%Y-%m-%d %H:%M:%S"),
+                                             "milliseconds": seconds * 1000,
+                                             "sql": sql,
+                                             "query_plan": query_plan})
+            print("Slow SQL statement ({:.1f} ms): {}".format(seconds * 1000, sql))
+            for line in query_plan:
+                print("    " + line)
+
+    def query_plan(self, connection, sql, parameters) -> [str]:
+        """
+        :param sqlite3.Connection connection: Connection to run EXPLAIN QUERY PLAN on
+        :param str sql: SQL statement
+        :param parameters: Parameters of the statement
+        :return: Lines of the query plan of the statement, indented by depth. Empty if it cannot be explained, e.g.
+        BEGIN or PRAGMA statements.
+        :rtype: [str]
+        """
+        query_plan = self._query_plans.get(sql)
+        if query_plan is not None:
+            return query_plan
+        query_plan = []
+        keyword = sql.split(" ", 1)[0].upper()
+        if keyword in ("SELECT", "INSERT", "UPDATE", "DELETE", "WITH", "REPLACE"):
+            try:
+                # sqlite3.Connection.execute is called directly, so that EXPLAIN itself is not recorded.
+                rows = sqlite3.Connection.execute(connection, "EXPLAIN QUERY PLAN " + sql, parameters).fetchall()
+                depths = dict()
+                for row_id, parent_id, unused, detail in rows:
+                    depths[row_id] = depths.get(parent_id, -1) + 1
+                    query_plan.append("  " * depths[row_id] + detail)
+            except sqlite3.Error as error:
+                query_plan.append("EXPLAIN QUERY PLAN failed: {}".format(error))
+        self._query_plans[sql] = query_plan
+        return query_plan
+
+    def report(self) -> dict:
+        """
+        :return: Everything recorded so far, ready to be written as JSON
+        :rtype: dict
+        """
+        with self._lock:
+            return {"slow_statement_threshold_milliseconds": self.slow_statement_threshold * 1000,
+                    "methods": {name: statistics.to_dict()
+                                for name, statistics in sorted(self.method_statistics.items())},
+                    "statements": {sql: statistics.to_dict()
+                                   for sql, statistics in sorted(self.statement_statistics.items(),
+                                                                 key=lambda item: -item[1].total)},
+                    "slow_statements": list(self.slow_statements)}
+
+    def write_json(self, path) -> None:
+        """
+        :param str path: Path of the JSON file to be written
+        """
+        with open(path, "w", encoding="utf-8") as json_file:
+            json.dump(self.report(), json_file, indent=2)
+
+    def close(self) -> None:
+        """
+        Write the report to self.output_path, if it is set. Called when the DatabaseManager is closed.
+        """
+        if self.output_path is not None:
+            try:
+                self.write_json(self.output_path)
+            except OSError as error:
+                print("Instrumentation report could not be written: ", error)
+
+    @staticmethod
+    def format_report(report) -> str:
+        """
+        :param dict report: Report as returned by report(), or loaded from its JSON file
+        :return: Report as text: a table of methods, the slowest statements by total time, and the slow statement log
+        :rtype: str
+        """
+        lines = ["{:44} {:>7} {:>10} {:>9} {:>9} {:>9}".format("Method", "Calls", "Total ms", "Mean ms", "p50 ms",
+                                                               "p99 ms")]
+        for name, statistics in report["methods"].items():
+            lines.append("{:44} {:>7} {:>10.1f} {:>9.2f} {:>9} {:>9}".format(
+                name, statistics["count"], statistics["total_milliseconds"], statistics["mean_milliseconds"],
+                LatencyStatistics.percentile_bound(statistics, 0.5), LatencyStatistics.percentile_bound(statistics,
+                                                                                                       0.99)))
+        lines.append("")
+        lines.append("{:>7} {:>10} {:>9}  Statement".format("Count", "Total ms", "Max ms"))
+        statements = list(report["statements"].items())[:Instrumentation.AMOUNT_OF_REPORTED_STATEMENTS]
+        for sql, statistics in statements:
+            lines.append("{:>7} {:>10.1f} {:>9.2f}  {}".format(statistics["count"], statistics["total_milliseconds"],
+                                                               statistics["maximum_milliseconds"], sql[:100]))
+        lines.append("")
+        lines.append("Slow statements (at least {:.1f} ms): {}".format(
+            report["slow_statement_threshold_milliseconds"], len(report["slow_statements"])))
+        for slow_statement in report["slow_statements"]:
+            lines.append("{} {:>9.1f} ms  {}".format(slow_statement["time"], slow_statement["milliseconds"],
+                                                      slow_statement["sql"]))
+            for line in slow_statement["query_plan"]:
+                lines.append("    " + line)
+        return "\n".join(lines)
+
+
+class LatencyStatistics:
+    __slots__ = ("count", "total", "minimum", "maximum", "buckets")
+
+    def __init__(self):
+        """
+        Count, total, extremes, and histogram of latencies. See Instrumentation.HISTOGRAM_BOUNDS.
+        """
+        self.count = 0
+        self.total = 0.0
+        self.minimum = None
+        self.maximum = None
+        self.buckets = [0] * (len(Instrumentation.HISTOGRAM_BOUNDS) + 1)
+
+    def add(self, seconds) -> None:
+        """
+        :param float seconds: One latency
+        """
+        self.count += 1
+        self.total += seconds
+        if self.minimum is None or seconds < self.minimum:
+            self.minimum = seconds
+        if self.maximum is None or seconds > self.maximum:
+            self.maximum = seconds
+        milliseconds = seconds * 1000
+        index = 0
+        while index < len(Instrumentation.HISTOGRAM_BOUNDS) and milliseconds > Instrumentation.HISTOGRAM_BOUNDS[index]:
+            index += 1
+        self.buckets[index] += 1
+
+    def to_dict(self) -> dict:
+        """
+        :return: Statistics in milliseconds. Histogram keys are the upper bounds of the buckets.
+        :rtype: dict
+        """
+        histogram = dict()
+        for index, count in enumerate(self.buckets):
+            if count > 0:
+                if index < len(Instrumentation.HISTOGRAM_BOUNDS):
+                    histogram["<={}".format(Instrumentation.HISTOGRAM_BOUNDS[index])] = count
+                else:
+                    histogram[">{}".format(Instrumentation.HISTOGRAM_BOUNDS[-1])] = count
+        return {"count": self.count,
+                "total_milliseconds": self.total * 1000,
+                "mean_milliseconds": self.total * 1000 / self.count if self.count > 0 else 0.0,
+                "minimum_milliseconds": (self.minimum or 0.0) * 1000,
+                "maximum_milliseconds": (self.maximum or 0.0) * 1000,
+                "histogram": histogram}
+
+    @staticmethod
+    def percentile_bound(statistics, fraction) -> str:
+        """
+        :param dict statistics: Statistics as returned by to_dict()
+        :param float fraction: Between 0 and 1, e.g. 0.99 for the 99th percentile
+        :return: Upper bound of the histogram bucket that holds the percentile, e.g. "<=2.5"
+        :rtype: str
+        """
+        target = fraction * statistics["count"]
+        seen = 0
+        bucket = ""
+        for bucket, count in statistics["histogram"].items():
+            seen += count
+            if seen >= target:
+                break
+        return bucket
+
+
+class InstrumentedConnection(sqlite3.Connection):
+    """
+    sqlite3 connection whose statements are timed by an Instrumentation. Used as the factory of sqlite3.connect() by
+    ConnectionManager when it is given an Instrumentation.
+    """
+
+    # Set by ConnectionManager after the connection has been opened
+    instrumentation: Instrumentation = None
+
+    def cursor(self, factory=None):
+        return sqlite3.Connection.cursor(self, factory if factory is not None else InstrumentedCursor)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, parameters):
+        return self.cursor().executemany(sql, parameters)
+
+
+class InstrumentedCursor(sqlite3.Cursor):
+    """
+    sqlite3 cursor that reports the execution time of its statements to the Instrumentation of its connection.
+    """
+
+    def execute(self, sql, parameters=()):
+        start_time = time.perf_counter()
+        result = sqlite3.Cursor.execute(self, sql, parameters)
+        self.connection.instrumentation.record_statement(self.connection, sql, parameters,
+                                                         time.perf_counter() - start_time)
+        return result
+
+    def executemany(self, sql, parameters):
+        # The parameters may be an iterator. Keep the first row for EXPLAIN QUERY PLAN.
+        parameters = list(parameters)
+        start_time = time.perf_counter()
+        result = sqlite3.Cursor.executemany(self, sql, parameters)
+        self.connection.instrumentation.record_statement(self.connection, sql,
+                                                         parameters[0] if len(parameters) > 0 else (),
+                                                         time.perf_counter() - start_time)
+        return result
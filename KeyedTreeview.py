@@ -0,0 +1,102 @@
+#   Program FlashCards
+#
+#   Copyright 2020 Ertugrul Harman
+#
+#       E-mail  : harmancode@gmail.com
+#       Twitter : https://twitter.com/harmancode
+#       Web     : https://harman.page
+#
+#   This file is part of Flashcards.
+#
+#   Flashcards is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+
+class KeyedTreeview:
+
+    def __init__(self, treeview):
+        """
+        KeyedTreeview keeps the rows of a flat ttk.Treeview in sync with a list of rows, by inserting, updating,
+        moving, or deleting only the rows that have changed. Rows are identified by stable iids, e.g. deck_id or
+        flashcard_id, so an edit costs a few Tk calls instead of clearing and refilling the whole treeview.
+        Values of the rows are cached here, so that changes are found without querying Tk.
+        :param tkinter.ttk.Treeview treeview: Treeview whose rows are managed only through this object
+        """
+        self.treeview = treeview
+
+        # iids of the rows in the treeview, in order
+        self.iids: [str] = []
+
+        # Values of the rows in the treeview. {iid: tuple}
+        self.values = dict()
+
+    def apply(self, rows) -> None:
+        """
+        Make the treeview display the given rows, in the given order.
+        :param rows: (iid, values) tuples
+        :type rows: [(str, tuple)]
+        """
+        new_iids = [str(iid) for iid, values in rows]
+        new_iid_set = set(new_iids)
+
+        removed_iids = [iid for iid in self.iids if iid not in new_iid_set]
+        if len(removed_iids) > 0:
+            self.treeview.delete(*removed_iids)
+            for iid in removed_iids:
+                del self.values[iid]
+
+        # Rows of the treeview, in order, as they are changed below. current_iids[:index] always equals
+        # new_iids[:index].
+        current_iids = [iid for iid in self.iids if iid in new_iid_set]
+
+        for index, (iid, values) in enumerate(rows):
+            iid = str(iid)
+            values = tuple(values)
+            if iid not in self.values:
+                self.treeview.insert(parent='', index=index, iid=iid, text="", values=values)
+                current_iids.insert(index, iid)
+            else:
+                if self.values[iid] != values:
+                    self.treeview.item(iid, values=values)
+                if current_iids[index] != iid:
+                    self.treeview.move(iid, '', index)
+                    current_iids.remove(iid)
+                    current_iids.insert(index, iid)
+            self.values[iid] = values
+
+        self.iids = new_iids
+
+    def update_row(self, iid, values) -> None:
+        """
+        Change the values of one row, if it is in the treeview and its values are different.
+        :param str iid: iid of the row
+        :param tuple values: New values of the row
+        """
+        iid = str(iid)
+        values = tuple(values)
+        if iid in self.values and self.values[iid] != values:
+            self.treeview.item(iid, values=values)
+            self.values[iid] = values
+
+    def clear(self) -> None:
+        """
+        Remove all rows from the treeview.
+        """
+        if len(self.iids) > 0:
+            self.treeview.delete(*self.iids)
+        self.iids = []
+        self.values = dict()
+
+    def __contains__(self, iid) -> bool:
+        return str(iid) in self.values
@@ -26,6 +26,7 @@ from typing import Optional
 import platform
 
 from Deck import Deck
+from KeyedTreeview import KeyedTreeview
 
 try:
     import tkinter as tk  # python 3
@@ -92,14 +93,14 @@ class ManageDecksFrame(tk.Frame):
         self.treeview.heading("#3", text="Due", anchor="e")
         self.treeview.heading("#4", text="Total", anchor="e")
 
+        # Rows of the treeview are identified by deck_id, and they are changed only when their data changes.
+        self.keyed_treeview = KeyedTreeview(self.treeview)
+
         # Fill treeview with data
         self.add_data_to_treeview()
 
         # Select first row if there is any
-        decks = self.controller.database_manager.decks
-        if len(decks) > 0:
-            self.treeview.selection_set(0)
-            self.treeview.focus(0)
+        self.select_first_row_in_treeview()
 
         # Set up buttons frame
         self.buttons_frame = tk.Frame(self)
@@ -175,8 +176,8 @@ class ManageDecksFrame(tk.Frame):
                 if len(self.controller.database_manager.decks) == 1:
                     self.controller.database_manager.set_first_deck_as_the_current_deck_if_possible()
 
-                # GUI tasks
-                self.refresh_treeview()
+                # GUI tasks. The new deck has no flashcards, so counts of the decks are not fetched again.
+                self.refresh_treeview(update_counts=False)
                 self.select_last_deck_in_treeview()
 
                 # For user's convenience
@@ -219,14 +220,11 @@ class ManageDecksFrame(tk.Frame):
                                                   "The title you typed was too long. It was shortened.")
                     new_title = new_title[:Deck.MAXIMUM_LENGTH_OF_DECK_TITLE]
 
-                    selected_index = self.get_selected_treeview_index()
-
                     deck.title = new_title
                     self.controller.database_manager.update_deck_in_db(deck.deck_id, deck.title, deck.last_study_datetime)
 
-                    self.refresh_treeview()
-                    self.treeview.selection_set(selected_index)
-                    self.treeview.focus(selected_index)
+                    # Only the renamed row is updated. Its iid does not change, so it stays selected.
+                    self.keyed_treeview.update_row(deck.deck_id, self.deck_row_values(deck))
 
                 else:
                     tk.messagebox.showwarning("Info", "Title cannot be empty.")
@@ -234,19 +232,19 @@ class ManageDecksFrame(tk.Frame):
             tk.messagebox.showwarning("Info", "You should create a deck first.")
             self.new_deck_button.focus_set()
 
-    def refresh_treeview(self) -> None:
+    def refresh_treeview(self, update_counts=True) -> None:
         """
-        Removes all contents from the treeview and fills it again with the current data.
+        Updates the treeview with the current data. Only the rows that have been added, removed, or changed cost Tk
+        calls.
+        :param bool update_counts: True to fetch due and total counts of the decks from the database again
         """
-        self.remove_all_data_from_treeview()
-        self.add_data_to_treeview()
+        self.add_data_to_treeview(update_counts)
 
     def remove_all_data_from_treeview(self) -> None:
         """
         Removes all the contents from the treeview.
         """
-        for i in self.treeview.get_children():
-            self.treeview.delete(i)
+        self.keyed_treeview.clear()
 
     def delete_deck(self) -> None:
         """
@@ -255,7 +253,7 @@ class ManageDecksFrame(tk.Frame):
         decks = self.controller.database_manager.decks
         if len(decks) > 0:
             deck = decks[self.get_selected_treeview_index()]
-            flashcard_count = len(deck.flashcards)
+            flashcard_count = deck.get_flashcard_count()
             confirmation_message = "This deck will be deleted: " + deck.title + "\n\n"
             if flashcard_count == 0:
                 confirmation_message += "It does not contain any flashcards."
@@ -272,8 +270,8 @@ class ManageDecksFrame(tk.Frame):
                 self.controller.database_manager.delete_deck_from_db(deck.deck_id)
                 # Remove the deck from the decks list, so that it can be removed from the memory
                 self.controller.database_manager.decks.remove(deck)
-                # Update view
-                self.refresh_treeview()
+                # Update view. Counts of the remaining decks have not changed.
+                self.refresh_treeview(update_counts=False)
                 # Assign a new deck as current deck, if current deck has just been deleted.
                 if self.controller.database_manager.deck.deck_id == deck.deck_id:
                     self.controller.database_manager.set_first_deck_as_the_current_deck_if_possible()
@@ -318,11 +316,9 @@ class ManageDecksFrame(tk.Frame):
         Returns the title of the deck that is delected in the treeview
         :return: str
         """
-        selected_item = self.treeview.focus()
-        selected_item_dict = self.treeview.item(selected_item)
-        item_list = selected_item_dict["values"]
-        if len(item_list) > 0:
-            title = item_list[0]
+        deck = self.get_selected_deck()
+        if deck is not None:
+            title = deck.title
         else:
             print("Error in get_selected_deck_title()")
             title = ""
@@ -345,30 +341,49 @@ class ManageDecksFrame(tk.Frame):
             result = selected_deck
         return result
 
-    def add_data_to_treeview(self) -> None:
+    def add_data_to_treeview(self, update_counts=True) -> None:
         """
         Fills treeview with data derived from decks
+        :param bool update_counts: True to fetch due and total counts of the decks from the database again
         """
         # Add data to the treeview
         decks = self.controller.database_manager.decks
-        deck_count = len(decks)
-        for index in range(deck_count):
-            deck = decks[index]
-            title = deck.title
-            deck.set_due_flashcards(self.controller.database_manager)
-            due_count = len(deck.due_flashcards)
-            total_count = len(deck.flashcards)
-            last_study = deck.get_last_study_datetime_as_formatted_string()
-            self.treeview.insert(parent='', index='end', iid=index, text="",
-                                 values=(title, last_study, due_count, total_count))
+        if update_counts:
+            # Due and total counts of all decks are fetched with one query.
+            summaries = self.controller.database_manager.deck_summaries()
+            for deck in decks:
+                summary = summaries.get(deck.deck_id)
+                if summary is not None:
+                    deck.due_flashcard_count = summary.due_count
+                    deck.flashcard_count = summary.total_count
+                else:
+                    deck.due_flashcard_count = 0
+                    deck.flashcard_count = 0
+        rows = [(deck.deck_id, self.deck_row_values(deck)) for deck in decks]
+        self.keyed_treeview.apply(rows)
+
+    def deck_row_values(self, deck) -> tuple:
+        """
+        Values of the row of a deck in the treeview.
+        :param Deck deck: Deck object
+        :return: (title, last study date, due count, total count)
+        :rtype: tuple
+        """
+        # Counts come from memory for decks whose flashcards are loaded, so that reviews that are still being
+        # written are included.
+        return (deck.title,
+                deck.get_last_study_datetime_as_formatted_string(),
+                deck.get_due_flashcard_count(),
+                deck.get_flashcard_count())
 
     def select_first_row_in_treeview(self) -> None:
         """
         Selects first row in the treeview if there is any row.
         """
-        if len(self.controller.database_manager.decks) > 0:
-            self.treeview.selection_set(0)
-            self.treeview.focus(0)
+        decks = self.controller.database_manager.decks
+        if len(decks) > 0:
+            self.treeview.selection_set(str(decks[0].deck_id))
+            self.treeview.focus(str(decks[0].deck_id))
 
     def select_last_deck_in_treeview(self) -> None:
         """
@@ -378,8 +393,8 @@ class ManageDecksFrame(tk.Frame):
         decks = self.controller.database_manager.decks
         count = len(decks)
         if count > 0:
-            self.treeview.selection_set(count - 1)
-            self.treeview.focus(count - 1)
+            self.treeview.selection_set(str(decks[count - 1].deck_id))
+            self.treeview.focus(str(decks[count - 1].deck_id))
 
     def prepare_manage_decks_view(self) -> None:
         """
@@ -391,7 +406,7 @@ class ManageDecksFrame(tk.Frame):
         selected_deck = self.get_selected_deck()
         if len(self.controller.database_manager.decks) > 0:
             if selected_deck is not None:
-                if len(selected_deck.flashcards) > 0:
+                if selected_deck.get_flashcard_count() > 0:
                     self.study_button.focus_set()
                 else:
                     self.edit_deck_button.focus_set()
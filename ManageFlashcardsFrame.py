@@ -25,10 +25,18 @@ import tkinter as tk
 from typing import Optional
 
 from Deck import Deck
+from DeckPager import DeckPager
 from Flashcard import Flashcard
+from VirtualTreeview import VirtualTreeview
 
 
 class ManageFlashcardsFrame(tk.Frame):
+    # Amount of flashcards loaded from the database at a time, and amount of such pages kept in memory.
+    PAGE_SIZE = 200
+    MAXIMUM_AMOUNT_OF_CACHED_PAGES = 20
+
+    # Search runs when the user stops typing in the search box for this many milliseconds.
+    SEARCH_DELAY = 250
 
     def __init__(self, parent, controller):
         """
@@ -47,20 +55,41 @@ class ManageFlashcardsFrame(tk.Frame):
         self.flashcards_frame = tk.LabelFrame(self, text="Flashcards")
         self.flashcards_frame.grid(row=0, column=0, padx=10, pady=10, sticky="nsew")
 
+        # Set up search box. While it holds a query, the treeview lists the flashcards of the deck that match it,
+        # best match first, instead of all flashcards of the deck.
+        self.search_frame = tk.Frame(self.flashcards_frame)
+        self.search_frame.grid(row=0, column=0, padx=10, pady=(10, 0), sticky="nsew")
+
+        self.search_label = tk.Label(self.search_frame, text="Search:")
+        self.search_label.grid(row=0, column=0, sticky="w")
+
+        self.search_entry = tk.Entry(self.search_frame)
+        self.search_entry.grid(row=0, column=1, padx=10, sticky="we")
+        self.search_entry.bind("<KeyRelease>", self.search_entry_changed)
+        self.search_entry.bind("<Escape>", lambda event: self.clear_search())
+
+        self.clear_search_button = tk.Button(self.search_frame, text="Clear", command=self.clear_search)
+        self.clear_search_button.grid(row=0, column=2, sticky="e")
+
+        self.search_frame.grid_columnconfigure(1, weight=1)
+
+        # Query of the search box that the treeview rows are filtered by. Empty when all flashcards are listed.
+        self.search_query = ""
+
+        # Pending search, scheduled by search_entry_changed()
+        self.search_after_id = None
+
         # Set up Treeview
 
         # Create a new frame specific to Treeview and its scrollbar to easily use scrollbar in there
         self.treeview_frame = tk.Frame(self.flashcards_frame)
-        self.treeview_frame.grid(row=0, column=0, pady=10, padx=10, sticky="nsew")
+        self.treeview_frame.grid(row=1, column=0, pady=10, padx=10, sticky="nsew")
 
         self.treeview = tk.ttk.Treeview(self.treeview_frame, columns=("Question", "Answer"))
         self.treeview.grid(row=0, column=0, pady=2, ipady=2, sticky="nsew")
 
-        self.yscrollbar = tk.ttk.Scrollbar(self.treeview_frame, orient='vertical', command=self.treeview.yview)
-        self.treeview.configure(yscrollcommand=self.yscrollbar.set)
-
+        self.yscrollbar = tk.ttk.Scrollbar(self.treeview_frame, orient='vertical')
         self.yscrollbar.grid(row=0, column=1, sticky='nse')
-        self.yscrollbar.configure(command=self.treeview.yview)
 
         # Format columns
         # We set width as 0 because we will not use parent-children rows
@@ -75,8 +104,20 @@ class ManageFlashcardsFrame(tk.Frame):
         self.treeview.heading("#1", text="Question", anchor="w", )
         self.treeview.heading("#2", text="Answer", anchor="e")
 
+        # Only the visible part of the deck is inserted into the treeview. VirtualTreeview fetches pages of flashcards
+        # from the database as the user scrolls, and it drives the scrollbar. Rows are identified by flashcard_id.
+        self.virtual_treeview = VirtualTreeview(self.treeview, self.yscrollbar,
+                                                count_rows=self.count_flashcard_rows,
+                                                fetch_rows=self.fetch_flashcard_rows)
+
+        # Pages of the flashcards, or the search results, of the current deck. It is created by flashcard_pager().
+        self.deck_pager: Optional[DeckPager] = None
+
+        # Flashcard that is displayed in the entry boxes. It is kept when its row is scrolled out of the treeview.
+        self.current_flashcard: Optional[Flashcard] = None
+
         # Add binding to the treeview
-        self.treeview.bind("<ButtonRelease-1>", self.row_selected)
+        self.treeview.bind("<ButtonRelease-1>", self.row_selected, add="+")
 
         # Add edit flashcard frame
         self.edit_flashcard_frame = tk.LabelFrame(self, text="Edit Flashcard...")
@@ -143,7 +184,8 @@ class ManageFlashcardsFrame(tk.Frame):
         self.bottom_frame.grid_columnconfigure(0, weight=1)
         self.bottom_frame.grid_columnconfigure(4, weight=1)
 
-        self.flashcards_frame.grid_rowconfigure(0, weight=1)
+        self.flashcards_frame.grid_rowconfigure(0, weight=0)
+        self.flashcards_frame.grid_rowconfigure(1, weight=1)
         self.flashcards_frame.grid_columnconfigure(0, weight=1)
 
         self.treeview_frame.grid_rowconfigure(0, weight=1)
@@ -155,14 +197,20 @@ class ManageFlashcardsFrame(tk.Frame):
         self.grid_rowconfigure(1, weight=0)
         self.grid_rowconfigure(2, weight=0)
 
-        # All GUI setup is complete. Now prepare the view contents.
-        self.prepare_manage_flashcards_view()
+        # All GUI setup is complete. The view contents are prepared by Program.show_manage_flashcards_frame() every
+        # time it is shown, so that flashcards of the current deck are not loaded before they are needed.
+        self.adding_new_flashcard = False
 
     def load_deck(self) -> None:
         """
         Make the view ready for user interaction by loading the deck, flashcards, and configuring GUI elements.
         """
         deck = self.controller.database_manager.deck
+        # The rows, the cached pages and the search belong to the previous deck
+        self.invalidate_flashcard_pages()
+        self.clear_search(refresh=False)
+        self.current_flashcard = None
+        self.remove_all_data_from_treeview()
         # Safety check
         if deck is not None:
             deck_title_string = "Deck: " + deck.get_truncated_title()
@@ -172,19 +220,139 @@ class ManageFlashcardsFrame(tk.Frame):
             pass
             # print("Deck is None in load_deck()")
 
+    def count_flashcard_rows(self) -> int:
+        """
+        Row counter of self.virtual_treeview.
+        :return: Amount of flashcards of the current deck in the database that match the search query, if there is
+        one
+        :rtype: int
+        """
+        pager = self.flashcard_pager()
+        if pager is None:
+            return 0
+        return pager.count()
+
+    def fetch_flashcard_rows(self, start, count) -> [(str, tuple)]:
+        """
+        Row provider of self.virtual_treeview.
+        :param int start: Index of the first flashcard
+        :param int count: Amount of flashcards
+        :return: (iid, values) tuples of the rows, where iid is the flashcard_id
+        :rtype: [(str, tuple)]
+        """
+        return [(str(flashcard.flashcard_id), (flashcard.question, flashcard.answer))
+                for flashcard in self.get_flashcards_in_range(start, count)]
+
+    def flashcard_pager(self) -> Optional[DeckPager]:
+        """
+        Returns the pager of the current deck and search query. A new one is created when the deck or the search
+        query has changed.
+        :return: DeckPager, or None if there is no current deck
+        :rtype: Optional[DeckPager]
+        """
+        deck = self.controller.database_manager.deck
+        if deck is None:
+            return None
+        pager = self.deck_pager
+        if pager is None or pager.deck_id != deck.deck_id or pager.search_query != self.search_query:
+            pager = DeckPager(self.controller.database_manager, deck.deck_id,
+                              page_size=ManageFlashcardsFrame.PAGE_SIZE,
+                              maximum_amount_of_cached_pages=ManageFlashcardsFrame.MAXIMUM_AMOUNT_OF_CACHED_PAGES,
+                              search_query=self.search_query)
+            self.deck_pager = pager
+        return pager
+
+    def get_flashcards_in_range(self, start, count) -> [Flashcard]:
+        """
+        Returns the flashcards of the current deck from index start to index start + count, loading the pages that
+        contain them if they are not in memory.
+        :param int start: Index of the first flashcard
+        :param int count: Amount of flashcards
+        :rtype: [Flashcard]
+        """
+        pager = self.flashcard_pager()
+        if pager is None:
+            return []
+        return pager.get_range(start, count)
+
+    def invalidate_flashcard_pages(self) -> None:
+        """
+        Forget the cached pages, so that they are loaded from the database again. Call it after flashcards of the
+        deck have been added, removed, or changed.
+        """
+        if self.deck_pager is not None:
+            self.deck_pager.invalidate()
+
+    def flashcard_count(self) -> int:
+        """
+        :return: Amount of rows of the treeview, i.e. flashcards of the current deck, or search results, as counted
+        when the treeview was last refreshed.
+        :rtype: int
+        """
+        return self.virtual_treeview.row_count
+
+    def deck_flashcard_count(self) -> int:
+        """
+        :return: Amount of flashcards of the current deck, whether they are filtered by a search or not
+        :rtype: int
+        """
+        if self.search_query == "":
+            return self.flashcard_count()
+        deck = self.controller.database_manager.deck
+        if deck is None:
+            return 0
+        return self.controller.database_manager.count_flashcards(deck.deck_id)
+
+    def search_entry_changed(self, event) -> None:
+        """
+        Event handler for key releases in the search box. The search runs when the user stops typing, so that a
+        query is not run for every key.
+        :param event: Key release
+        """
+        if self.search_after_id is not None:
+            self.after_cancel(self.search_after_id)
+        self.search_after_id = self.after(ManageFlashcardsFrame.SEARCH_DELAY, self.apply_search)
+
+    def apply_search(self) -> None:
+        """
+        List the flashcards that match the query of the search box, or all flashcards if it is empty.
+        """
+        self.search_after_id = None
+        search_query = self.search_entry.get().strip()
+        if search_query == self.search_query:
+            return
+        self.ask_save_question_if_necessary()
+        self.search_query = search_query
+        self.remove_all_data_from_treeview()
+        self.refresh_treeview()
+        self.select_first_flashcard()
+        self.search_entry.focus_set()
+
+    def clear_search(self, refresh=True) -> None:
+        """
+        Empty the search box and list all flashcards of the deck.
+        :param bool refresh: False to leave refreshing the treeview to the caller
+        """
+        if self.search_after_id is not None:
+            self.after_cancel(self.search_after_id)
+            self.search_after_id = None
+        self.search_entry.delete(0, tk.END)
+        if self.search_query == "":
+            return
+        self.search_query = ""
+        if refresh:
+            self.remove_all_data_from_treeview()
+            self.refresh_treeview()
+            self.select_first_flashcard()
+
     def add_data_to_treeview(self) -> None:
         """
         Fill the treeview with data.
         """
         try:
             deck = self.controller.database_manager.deck
-            if hasattr(deck, "flashcards"):
-                flashcards = self.controller.database_manager.deck.flashcards
-                flashcards_count = len(flashcards)
-                for index in range(flashcards_count):
-                    question = flashcards[index].question
-                    answer = flashcards[index].answer
-                    self.treeview.insert(parent='', index='end', iid=index, text="", values=(question, answer))
+            if deck is not None:
+                self.virtual_treeview.refresh()
         except AttributeError:
             tk.messagebox.showwarning("Info", "You should create a deck first.")
         except Exception as error:
@@ -192,59 +360,27 @@ class ManageFlashcardsFrame(tk.Frame):
 
     def refresh_treeview(self) -> None:
         """
-        Remove all contents from treeview, fill it with data and give it focus.
+        Fetch the visible rows of the treeview again from the database and give it focus. Scroll position and
+        selection are kept. Only the rows that have been added, removed, or changed cost Tk calls.
         """
-        self.remove_all_data_from_treeview()
+        self.invalidate_flashcard_pages()
         self.clear_entry_boxes()
         self.add_data_to_treeview()
         self.treeview.focus_set()
 
-        # flashcards = self.controller.database_manager.deck.flashcards
-
-        # if len(flashcards) > 0:
-        #     # self.question_entry.config(state="normal")
-        #     # self.answer_entry.config(state="normal")
-        #     self.question_textentry.config(state="normal")
-        #     self.answer_textentry.config(state="normal")
-        #     self.save_flashcard_button.config(state="normal")
-        # else:
-        #     # self.question_entry.config(state="disabled")
-        #     # self.answer_entry.config(state="disabled")
-        #     self.question_textentry.config(state="disabled")
-        #     self.answer_textentry.config(state="disabled")
-        #     self.save_flashcard_button.config(state="disabled")
-
     def remove_all_data_from_treeview(self) -> None:
         """
         Remove all contents from treeview
         """
-        for i in self.treeview.get_children():
-            self.treeview.delete(i)
-
-    def index_of_last_selection_in_treeview(self) -> int:
-        """
-        Returns the index of the item that is last selected in treeview.
-        :return: Index of the item in the treeview. -1 if there is no item.
-        """
-        # Details: https://stackoverflow.com/a/30615520/3780985
-        result = -1
-        if self.treeview.focus() != '':
-            row_index = int(self.treeview.focus())
-            # print("item: ", self.treeview.item(row_index))
-            result = row_index
-        return result
+        self.virtual_treeview.clear()
 
-    def get_flashcards_when_multiple_selection_in_treeview(self) -> [Flashcard]:
+    def get_flashcard_ids_when_multiple_selection_in_treeview(self) -> [int]:
         """
-        Returns selected flashcards in treeview as a list.
-        :return: [Flashcard]
+        Returns flashcard_id values of the selected flashcards in treeview as a list. Selected rows that have been
+        scrolled out of the treeview are included.
+        :return: [int]
         """
-        row_indexes = self.treeview.selection()
-        selected_flashcards = []
-        for row_index in row_indexes:
-            selected_flashcard = self.controller.database_manager.deck.flashcards[int(row_index)]
-            selected_flashcards.append(selected_flashcard)
-        return selected_flashcards
+        return [int(iid) for iid in self.virtual_treeview.selection]
 
     def select_first_flashcard(self) -> None:
         """
@@ -252,7 +388,7 @@ class ManageFlashcardsFrame(tk.Frame):
         """
         # Select first row if there is any
         if self.controller.database_manager.deck is not None:
-            if len(self.controller.database_manager.deck.flashcards) > 0:
+            if self.flashcard_count() > 0:
                 self.select_flashcard_at_index(0)
             else:
                 pass
@@ -263,8 +399,7 @@ class ManageFlashcardsFrame(tk.Frame):
         Calls select_flashcard_at_index(self, index) for the last row in treeview.
         """
         # Select last flashcard item in treeview, i.e. give it focus
-        flashcards = self.controller.database_manager.deck.flashcards
-        count = len(flashcards)
+        count = self.flashcard_count()
         if count > 0:
             self.select_flashcard_at_index(count - 1)
         else:
@@ -272,49 +407,53 @@ class ManageFlashcardsFrame(tk.Frame):
 
     def select_flashcard_at_index(self, index) -> None:
         """
-        Give selection to the given index in the treeview. Assign it to the self.current.flashcard. Fill edit boxes.
-        :param index:
+        Give selection to the flashcard at the given index in the deck, scrolling the treeview if necessary. Assign it
+        to self.current_flashcard. Fill edit boxes.
+        :param int index: Index of the flashcard in the deck
         """
-        flashcards = self.controller.database_manager.deck.flashcards
-        count = len(flashcards)
+        count = self.flashcard_count()
         # Safety check
         if 0 <= index <= count - 1:
-            self.treeview.selection_set(index)
-            self.treeview.focus(index)
-            self.fill_entry_boxes_based_on_selected_row_index(index)
+            flashcards = self.get_flashcards_in_range(index, 1)
+            if len(flashcards) > 0:
+                self.select_flashcard(flashcards[0], index)
         else:
             print("Error: No flashcard for select_flashcard_at_index(), index: ", index)
 
+    def select_flashcard(self, flashcard, index=None) -> None:
+        """
+        Give selection to the given flashcard in the treeview, scrolling the treeview if necessary. Assign it to
+        self.current_flashcard. Fill edit boxes.
+        :param Flashcard flashcard: Flashcard of the current deck
+        :param Optional[int] index: Index of the flashcard in the deck. It is looked up in the database if it is None.
+        """
+        if index is None:
+            index = self.flashcard_pager().position(flashcard.flashcard_id)
+        if index is not None:
+            # The position of a search result is not known without its page. It is selected without scrolling.
+            self.virtual_treeview.see(index)
+        self.virtual_treeview.select([flashcard.flashcard_id])
+        self.current_flashcard = flashcard
+        self.fill_entry_boxes(flashcard)
+
     def selected_flashcard(self) -> Optional[Flashcard]:
         """
         Returns if there is a flashcard selected in the treeview.
-        :return: Checks the treeview if there is an item selected. If yes, returns selected Flashcard. If no,
-        returns None.
+        :return: If there is a flashcard selected, returns selected Flashcard. If no, returns None.
         :rtype: Flashcard or None
         """
-        result = None
-        index = self.index_of_last_selection_in_treeview()
-        if (len(self.controller.database_manager.deck.flashcards) > 0) and (index >= 0):
-            if self.controller.database_manager.deck.flashcards[index] is not None:
-                selected_flashcard = self.controller.database_manager.deck.flashcards[index]
-                result = selected_flashcard
-        return result
+        return self.current_flashcard
 
-    def fill_entry_boxes_based_on_selected_row_index(self, index) -> None:
+    def fill_entry_boxes(self, flashcard) -> None:
         """
-        Fill text entry boxes based on the selected row index in the treeview.
-        :param int index: Index of selected row in treeview.
+        Fill text entry boxes with the question and answer of the given flashcard.
+        :param Flashcard flashcard: Selected flashcard
         """
-        if (len(self.controller.database_manager.deck.flashcards) > 0) and (index >= 0):
-            if self.controller.database_manager.deck.flashcards[index] is not None:
-                current_flashcard = self.controller.database_manager.deck.flashcards[index]
-                self.clear_entry_boxes()
-                # self.question_entry.insert(0, current_flashcard.question)
-                # self.answer_entry.insert(0, current_flashcard.answer)
-                self.question_textentry.insert(1.0, current_flashcard.question)
-                self.answer_textentry.insert(1.0, current_flashcard.answer)
-            else:
-                print("There is not any flashcard at index", index)
+        self.clear_entry_boxes()
+        # self.question_entry.insert(0, current_flashcard.question)
+        # self.answer_entry.insert(0, current_flashcard.answer)
+        self.question_textentry.insert(1.0, flashcard.question)
+        self.answer_textentry.insert(1.0, flashcard.answer)
 
     # Binding function for treeview selection event
     def row_selected(self, event):
@@ -322,8 +461,14 @@ class ManageFlashcardsFrame(tk.Frame):
         Event handler for row selection in treeview.
         :param event: Treeview button release
         """
-        # Check if there are any flashcards in the deck
-        if len(self.controller.database_manager.deck.flashcards) > 0:
+        # Details: https://stackoverflow.com/a/30615520/3780985
+        focused_iid = self.treeview.focus()
+        # Check if a flashcard row has been clicked
+        flashcard = None
+        if focused_iid != '' and self.deck_pager is not None:
+            flashcard = self.deck_pager.get_flashcard(int(focused_iid))
+        if flashcard is not None:
+            self.current_flashcard = flashcard
             # Set add_mode_switch to False. This will automatically enable entry boxes for the selected flashcard
             # if any.
             self.add_mode_switch(status=False)
@@ -340,9 +485,7 @@ class ManageFlashcardsFrame(tk.Frame):
         """
         Removes any selection from the treeview.
         """
-        # See: https://stackoverflow.com/a/48593195
-        if len(self.treeview.selection()) > 0:
-            self.treeview.selection_remove(self.treeview.selection()[0])
+        self.virtual_treeview.select([])
 
     def add_mode_switch(self, status) -> None:
         """
@@ -361,10 +504,9 @@ class ManageFlashcardsFrame(tk.Frame):
             self.remove_selection_from_treeview()
         else:
             self.adding_new_flashcard = False
-            index = self.index_of_last_selection_in_treeview()
             # Safety check
-            if index >= 0:
-                self.fill_entry_boxes_based_on_selected_row_index(index)
+            if self.current_flashcard is not None:
+                self.fill_entry_boxes(self.current_flashcard)
                 self.edit_flashcard_frame.config(text="Edit flashcard... ")
 
         # Set the status of the buttons depending on the add/edit mode/status
@@ -378,9 +520,8 @@ class ManageFlashcardsFrame(tk.Frame):
             self.clear_entry_boxes()
         self.add_mode_switch(status=False)
         self.treeview.focus_set()
-        index = self.index_of_last_selection_in_treeview()
-        if index >= 0:
-            self.treeview.selection_set(index)
+        if self.current_flashcard is not None:
+            self.virtual_treeview.select([self.current_flashcard.flashcard_id])
         else:
             self.add_flashcard_button.focus_set()
 
@@ -389,7 +530,7 @@ class ManageFlashcardsFrame(tk.Frame):
         Just calls self.add_mode_switch by passing True as status parameter. This function is called when user clicks
         on the "Add new flashcard..." button.
         """
-        if len(self.controller.database_manager.deck.flashcards) < Deck.MAXIMUM_AMOUNT_OF_FLASHCARDS:
+        if self.deck_flashcard_count() < Deck.MAXIMUM_AMOUNT_OF_FLASHCARDS:
             self.add_mode_switch(status=True)
         else:
             self.show_too_many_flashcards_warning()
@@ -400,10 +541,13 @@ class ManageFlashcardsFrame(tk.Frame):
         Deletes a flashcard from database, from model, and from the view. And then refreshes the view and selects
         first flashcard in the treeview, if there is any.
         """
-        flashcards = self.get_flashcards_when_multiple_selection_in_treeview()
-        for flashcard in flashcards:
-            self.controller.database_manager.delete_flashcard_from_db(flashcard.flashcard_id)
-            self.controller.database_manager.deck.flashcards.remove(flashcard)
+        deck = self.controller.database_manager.deck
+        flashcard_ids = self.get_flashcard_ids_when_multiple_selection_in_treeview()
+        for flashcard_id in flashcard_ids:
+            self.controller.database_manager.delete_flashcard_from_db(flashcard_id)
+            deck.remove_flashcard(flashcard_id)
+        self.current_flashcard = None
+        self.remove_selection_from_treeview()
         self.clear_entry_boxes()
         self.refresh_treeview()
         self.select_first_flashcard()
@@ -415,7 +559,7 @@ class ManageFlashcardsFrame(tk.Frame):
         easy-to-use, because user will not have to click on "Add flashcard" button to add a new flashcard.
         """
         if self.controller.database_manager.deck is not None:
-            if len(self.controller.database_manager.deck.flashcards) == 0:
+            if self.deck_flashcard_count() == 0:
                 self.add_mode_switch(True)
             else:
                 self.add_mode_switch(False)
@@ -433,10 +577,9 @@ class ManageFlashcardsFrame(tk.Frame):
         """
                 Updates flashcard by using texts in entry boxes.
                 """
-        selected_treeview_index = self.index_of_last_selection_in_treeview()
+        flashcard = self.current_flashcard
         # Safety check
-        if selected_treeview_index >= 0:
-            flashcard = self.controller.database_manager.deck.flashcards[selected_treeview_index]
+        if flashcard is not None:
             # question = str(self.question_entry.get())
             # answer = str(self.answer_entry.get())
             question = str(self.question_textentry.get("1.0", tk.END))
@@ -456,17 +599,20 @@ class ManageFlashcardsFrame(tk.Frame):
             else:
                 flashcard.question = question
                 flashcard.answer = answer
-                self.controller.database_manager.update_flashcard_in_db(flashcard_id=flashcard.flashcard_id,
-                                                                        question=question,
-                                                                        answer=answer,
-                                                                        last_study_date=flashcard.last_study_date,
-                                                                        due_date_string=flashcard.due_date_string,
-                                                                        inter_repetition_interval=flashcard.inter_repetition_interval,
-                                                                        easiness_factor=flashcard.easiness_factor,
-                                                                        repetition_number=flashcard.repetition_number
-                                                                        )
-                self.refresh_treeview()
-                self.select_flashcard_at_index(selected_treeview_index)
+                # Only the text is written. Scheduling values of this copy may be older than the ones being studied.
+                self.controller.database_manager.update_flashcard_text_in_db(flashcard_id=flashcard.flashcard_id,
+                                                                             question=question,
+                                                                             answer=answer)
+                self.controller.database_manager.deck.update_flashcard_text(flashcard.flashcard_id, question, answer)
+                # The page cache may hold another copy of the flashcard if its page has been loaded again.
+                cached_flashcard = self.deck_pager.get_cached_flashcard(flashcard.flashcard_id)
+                if cached_flashcard is not None:
+                    cached_flashcard.question = question
+                    cached_flashcard.answer = answer
+                # Only the edited row is updated in the treeview.
+                self.virtual_treeview.update_row(flashcard.flashcard_id, (question, answer))
+                self.virtual_treeview.select([flashcard.flashcard_id])
+                self.fill_entry_boxes(flashcard)
 
     def are_entry_box_entries_valid_to_save(self, show_warnings: bool = False) -> bool:
         """
@@ -514,7 +660,7 @@ class ManageFlashcardsFrame(tk.Frame):
         if self.are_entry_box_entries_valid_to_save(show_warnings=True):
             deck_id = self.controller.database_manager.deck.deck_id
 
-            due_date_string = self.controller.database_manager.today_as_string()
+            due_day = Flashcard.today_day_number()
 
             # It is safe to take data from textentry boxes because their validity has just been checked in
             # self.are_entry_box_entries_valid_to_save()
@@ -527,7 +673,7 @@ class ManageFlashcardsFrame(tk.Frame):
                 question=question,
                 answer=answer,
                 last_study_date=None,
-                due_date_string=due_date_string)
+                due_day=due_day)
 
             # Initialize new Flashcard object with the just-obtained flashcard_id
             new_flashcard = Flashcard(flashcard_id=new_flashcard_id,
@@ -535,13 +681,16 @@ class ManageFlashcardsFrame(tk.Frame):
                                       question=question,
                                       answer=answer,
                                       last_study_date=None,
-                                      due_date_string=due_date_string,
+                                      due_day=due_day,
                                       inter_repetition_interval=0,
                                       easiness_factor=0,
                                       repetition_number=0)
 
-            # Add initialized Flashcard object to the deck.flashcard list
-            self.controller.database_manager.deck.flashcards.append(new_flashcard)
+            # Add initialized Flashcard object to the deck. It does not load the flashcards of the deck.
+            self.controller.database_manager.deck.add_flashcard(new_flashcard)
+
+            # The new flashcard is shown at the end of the deck, which is not listed while searching.
+            self.clear_search(refresh=False)
 
             self.refresh_treeview()
 
@@ -553,14 +702,9 @@ class ManageFlashcardsFrame(tk.Frame):
 
     def scroll_to_the_bottom_of_treeview(self) -> None:
         """
-        Scroll to the bottom of the treeview.
-        "You can use tree.yview_moveto(1) to display the bottom of the table. The yview_moveto method takes as
-        argument the fraction of the total (scrollable) widget height that you want to be off-screen to the top.
-        So, yview_moveto(0) will display the top part of the table, yview_moveto(1) the bottom part and
-        yview_moveto(0.5) will adjust the display so that the top half of the widget is hidden."
-        Source: https://stackoverflow.com/a/42161808
+        Scroll to the bottom of the treeview. Only the last rows of the deck are fetched.
         """
-        self.treeview.yview_moveto(1)
+        self.virtual_treeview.scroll_to(self.flashcard_count())
 
     def save_flashcard_button_pressed(self) -> None:
         """
@@ -572,16 +716,17 @@ class ManageFlashcardsFrame(tk.Frame):
         # flashcard, user will probably trying to add a new flashcard by using the entry boxes, instead of trying to
         # edit something.
 
-        if len(self.controller.database_manager.deck.flashcards) < Deck.MAXIMUM_AMOUNT_OF_FLASHCARDS:
-            if len(self.controller.database_manager.deck.flashcards) == 0:
-                self.adding_new_flashcard = True
+        if self.deck_flashcard_count() == 0:
+            self.adding_new_flashcard = True
 
-            if self.adding_new_flashcard:
+        if self.adding_new_flashcard:
+            # The limit applies only to adding. Flashcards of a deck that is already larger can still be edited.
+            if self.deck_flashcard_count() < Deck.MAXIMUM_AMOUNT_OF_FLASHCARDS:
                 self.create_new_flashcard()
             else:
-                self.update_existing_flashcard()
+                self.show_too_many_flashcards_warning()
         else:
-            self.show_too_many_flashcards_warning()
+            self.update_existing_flashcard()
 
     def show_too_many_flashcards_warning(self) -> None:
         """
@@ -604,7 +749,7 @@ class ManageFlashcardsFrame(tk.Frame):
             self.remove_flashcard_button.config(state="normal")
             self.start_studying_button.config(state="normal")
 
-        if len(self.controller.database_manager.deck.flashcards) == 0:
+        if self.deck_flashcard_count() == 0:
             self.start_studying_button.config(state="disabled")
             self.remove_flashcard_button.config(state="disabled")
         else:
@@ -25,18 +25,22 @@
 import platform
 import subprocess
 
+import csv
+import sqlite3
 import sys
 import os
+import threading
+import time
 
 import tkinter as tk
 import tkinter.ttk
 import tkinter.filedialog
 
-from ManageFlashcardsFrame import ManageFlashcardsFrame
-from StudyFrame import StudyFrame
-from ManageDecksFrame import ManageDecksFrame
+from BackupManager import BackupManager
 from DatabaseManager import DatabaseManager
 from ImportExportManager import ImportExportManager
+from ImportResult import ImportResult
+from ProgressDialog import ProgressDialog
 
 class Program(tk.Tk):
 
@@ -47,7 +51,22 @@ class Program(tk.Tk):
     DECKSFRAME = "ManageDecksFrame"
     FLASHCARDSFRAME = "ManageFlashcardsFrame"
 
+    # Names of all frames. Frames are built, and their modules are imported, when they are first shown.
+    FRAME_NAMES = (STUDYFRAME, DECKSFRAME, FLASHCARDSFRAME)
+
+    # Set to 1 to build all frames when the Program starts, instead of when they are first shown.
+    EAGER_FRAMES_VARIABLE = "FLASHCARDS_EAGER_FRAMES"
+
+    # Set to 1 to print startup times. Set to "exit" to also quit right after the first paint, for benchmarks.
+    STARTUP_TIMING_VARIABLE = "FLASHCARDS_STARTUP_TIMING"
+
+    # How often the progress of a backup running in the background is checked, in milliseconds
+    BACKUP_POLL_INTERVAL = 200
+
     def __init__(self):
+        # Startup is timed from here. See report_startup_time().
+        self.startup_time = time.perf_counter()
+
         # Initialize super class
         tk.Tk.__init__(self)
 
@@ -57,6 +76,14 @@ class Program(tk.Tk):
         # It will be used for all import and export operations.
         self.import_export_manager = ImportExportManager(self.database_manager)
 
+        # It will be used for backing up and restoring the database.
+        self.backup_manager = BackupManager(self.database_manager)
+
+        # Thread of the running backup, its latest progress as (phase, done, total), and its result when it is done
+        self.backup_thread = None
+        self.backup_progress = None
+        self.backup_result = None
+
         # Set the app favicon
         # The r prefix specifies it as a raw string. See: https://stackoverflow.com/q/55890931/3780985
         if platform.system() == 'Darwin':  # macOS
@@ -91,7 +118,13 @@ class Program(tk.Tk):
         self.decks_menu.add_command(label="Flashcards...", command=self.show_manage_flashcards_frame)
         self.decks_menu.add_separator()
         self.decks_menu.add_command(label="Import...", command=self.import_deck_from_csv_file)
+        self.decks_menu.add_command(label="Import directory...", command=self.import_decks_from_csv_directory)
         self.decks_menu.add_command(label="Export...", command=self.export_deck_as_csv_file_menu_command)
+        self.decks_menu.add_command(label="Export with study progress...",
+                                    command=lambda: self.export_deck_as_csv_file_menu_command(include_schedule=True))
+        self.decks_menu.add_separator()
+        self.decks_menu.add_command(label="Back up now", command=self.backup_database_menu_command)
+        self.decks_menu.add_command(label="Restore from backup...", command=self.restore_database_menu_command)
         self.decks_menu.add_separator()
         self.decks_menu.add_command(label="Quit", command=self.quit)
 
@@ -111,21 +144,50 @@ class Program(tk.Tk):
         self.container.grid_columnconfigure(0, weight=1)
 
         # Frames dictionary will hold all the Frames (other views) that the GUI of the program consists of.
+        # Frames are added to it by get_frame() when they are first needed.
         self.frames = dict()
 
         # Current frame
         self.current_frame = None
 
-        # Initialize child frames by iterating through the "Frame classes", classes that inherits from tk.Frame
-        # Add initialized frames to the self.frames dictionary. It will provide access and persistence (in memory).
-        for frame in (StudyFrame, ManageDecksFrame, ManageFlashcardsFrame):
-            frame_name = frame.__name__
-            # print("A new frame is being initialized; frame_name is", frame_name)
+        # How long it took to build every frame, in seconds. {frame_name: float}
+        self.frame_construction_times = dict()
+
+        # Build all frames up front only if it is asked for, e.g. to compare startup times.
+        if os.environ.get(Program.EAGER_FRAMES_VARIABLE, "") == "1":
+            for frame_name in Program.FRAME_NAMES:
+                self.get_frame(frame_name)
+
+        # Center the main window on screen
+        self.center_window()
+
+        # Welcome user by showing the decks frame. Other frames are built when they are first shown.
+        self.show_manage_decks_frame()
+
+        startup_timing = os.environ.get(Program.STARTUP_TIMING_VARIABLE, "")
+        if startup_timing != "":
+            # The window is painted by idle callbacks that Tk schedules when it is mapped. An idle callback scheduled
+            # after the Map event runs after them, i.e. after the first paint.
+            self.container.bind("<Map>",
+                                lambda event: self.after_idle(self.report_startup_time, startup_timing == "exit"))
+
+    def get_frame(self, frame_name) -> tk.Frame:
+        """
+        Return the frame of the given name, building it the first time it is needed.
+        :param str frame_name: Program.STUDYFRAME, Program.DECKSFRAME or Program.FLASHCARDSFRAME
+        :return: Frame that has been added to self.frames
+        :rtype: tk.Frame
+        """
+        frame = self.frames.get(frame_name)
+        if frame is None:
+            start_time = time.perf_counter()
+
+            frame_class = Program.frame_class(frame_name)
 
             # Initialize child frame with two parameters, parent and controller Parent is the container, an attribute
             # of the Program class, that will contain all frames Controller is the Program class itself. By passing
             # these parameters, child frame will have references to access attributes and methods of the Program class.
-            frame = frame(parent=self.container, controller=self)
+            frame = frame_class(parent=self.container, controller=self)
 
             # Add the frame that has just been initialized to the dictionary: self.frames
             # So that Program class instance can access those frames later by calling their names
@@ -136,11 +198,54 @@ class Program(tk.Tk):
             # GUIs. We will only change the top Frame to change the view in the main window.
             frame.grid(row=0, column=0, sticky="nsew")
 
-        # Center the main window on screen
-        self.center_window()
+            self.frame_construction_times[frame_name] = time.perf_counter() - start_time
+        return frame
 
-        # Welcome user by showing the decks frame.
-        self.show_manage_decks_frame()
+    @staticmethod
+    def frame_class(frame_name) -> type:
+        """
+        Import the class of a frame. Frame modules are imported only when they are needed, so that the modules of
+        frames that are not shown, and their dependencies such as PIL, stay out of the startup. The imports are
+        written out one by one so that PyInstaller finds them.
+        :param str frame_name: Program.STUDYFRAME, Program.DECKSFRAME or Program.FLASHCARDSFRAME
+        :return: Class of the frame
+        :rtype: type
+        """
+        if frame_name == Program.STUDYFRAME:
+            from StudyFrame import StudyFrame
+            return StudyFrame
+        elif frame_name == Program.DECKSFRAME:
+            from ManageDecksFrame import ManageDecksFrame
+            return ManageDecksFrame
+        elif frame_name == Program.FLASHCARDSFRAME:
+            from ManageFlashcardsFrame import ManageFlashcardsFrame
+            return ManageFlashcardsFrame
+        raise ValueError("Unknown frame: {}".format(frame_name))
+
+    def is_current_frame(self, frame_name) -> bool:
+        """
+        :param str frame_name: Program.STUDYFRAME, Program.DECKSFRAME or Program.FLASHCARDSFRAME
+        :return: True if the frame of the given name is on top. It is False for frames that have not been built yet.
+        :rtype: bool
+        """
+        return self.current_frame is not None and self.current_frame is self.frames.get(frame_name)
+
+    def report_startup_time(self, quit_afterwards=False) -> None:
+        """
+        Print the time from the start of Program.__init__() to the first paint of the window, and how long building
+        each frame took. Called once after startup if Program.STARTUP_TIMING_VARIABLE is set.
+        :param bool quit_afterwards: True to close the Program after printing, for benchmarks
+        """
+        time_to_first_paint = time.perf_counter() - self.startup_time
+        # Report only the first paint
+        self.container.unbind("<Map>")
+        mode = "eager" if os.environ.get(Program.EAGER_FRAMES_VARIABLE, "") == "1" else "lazy"
+        frame_times = ", ".join("{} {:.1f} ms".format(frame_name, seconds * 1000)
+                                for frame_name, seconds in self.frame_construction_times.items())
+        print("Startup ({} frames): first paint after {:.1f} ms. Built frames: {}".format(
+            mode, time_to_first_paint * 1000, frame_times))
+        if quit_afterwards:
+            self.quit()
 
     # Necessary to use data files with pyinstaller in onefile mode.
     # https://stackoverflow.com/a/44352931/3780985
@@ -159,15 +264,15 @@ class Program(tk.Tk):
         if len(self.database_manager.decks) > 0:
             deck = self.database_manager.decks[index]
         if deck is not None:
-            deck.set_due_flashcards(self.database_manager)
-            count = len(deck.flashcards)
-            due_count = len(deck.due_flashcards)
+            # Due flashcards are set by StudyFrame.prepare_view(). Only their amount is needed here.
+            count = deck.get_flashcard_count()
+            due_count = deck.get_due_flashcard_count() if count > 0 else 0
             if count > 0:
                 if due_count > 0:
                     # There are some due flashcards. Study session will only use those.
                     self.database_manager.load_deck(index)
                     self.show_study_frame(show_only_due_flashcards=True)
-                    self.frames[Program.STUDYFRAME].start_study_session()
+                    self.get_frame(Program.STUDYFRAME).start_study_session()
                 else:
                     # There are not any due flashcards. Study session will use all flashcards in the deck if user
                     # confirms.
@@ -177,7 +282,7 @@ class Program(tk.Tk):
                     if confirmation:
                         self.database_manager.load_deck(index)
                         self.show_study_frame(show_only_due_flashcards=False)
-                        self.frames[Program.STUDYFRAME].start_study_session()
+                        self.get_frame(Program.STUDYFRAME).start_study_session()
             else:
                 tk.messagebox.showwarning("Info",
                                           "This deck is empty. Please add some flashcards to it first by clicking Flashcards button below.")
@@ -190,77 +295,65 @@ class Program(tk.Tk):
         :param bool show_only_due_flashcards: True when only due flashcards are used in study session.
         """
         deck = self.database_manager.deck
-        frame = self.frames[Program.STUDYFRAME]
+        frame = self.get_frame(Program.STUDYFRAME)
 
         # Ask to save if there is any unsaved changes in the entry boxes
-        if isinstance(self.current_frame, ManageFlashcardsFrame):
+        if self.is_current_frame(Program.FLASHCARDSFRAME):
             manage_flashcards_frame = self.frames[Program.FLASHCARDSFRAME]
             manage_flashcards_frame.ask_save_question_if_necessary()
 
-        # Safety check
-        if isinstance(frame, StudyFrame):
-            try:
-                if hasattr(deck, "flashcards"):
-                    if len(deck.flashcards) > 0:
-                        frame.prepare_view(show_only_due_flashcards=show_only_due_flashcards)
-                        frame.tkraise()
-                        self.current_frame = frame
-                    else:
-                        tk.messagebox.showwarning("Info", "You should add some flashcards first.", icon="info")
-            except AttributeError:
-                tk.messagebox.showwarning("Info", "You should create a deck first.")
-        else:
-            print("Error in show_study_frame()")
+        try:
+            if deck is not None:
+                if deck.get_flashcard_count() > 0:
+                    frame.prepare_view(show_only_due_flashcards=show_only_due_flashcards)
+                    frame.tkraise()
+                    self.current_frame = frame
+                else:
+                    tk.messagebox.showwarning("Info", "You should add some flashcards first.", icon="info")
+        except AttributeError:
+            tk.messagebox.showwarning("Info", "You should create a deck first.")
 
     def show_manage_decks_frame(self) -> None:
         """
         Brings Manage Decks frame to the top.
         """
         deck = self.database_manager.deck
-        frame = self.frames[Program.DECKSFRAME]
+        frame = self.get_frame(Program.DECKSFRAME)
 
         # Ask to save if there is any unsaved changes in the entry boxes
-        if isinstance(self.current_frame, ManageFlashcardsFrame):
+        if self.is_current_frame(Program.FLASHCARDSFRAME):
             manage_flashcards_frame = self.frames[Program.FLASHCARDSFRAME]
             manage_flashcards_frame.ask_save_question_if_necessary()
 
-        # Safety check
-        if isinstance(frame, ManageDecksFrame):
-            frame.prepare_manage_decks_view()
-            frame.tkraise()
-            self.current_frame = frame
-            if deck is None:
-                tk.messagebox.showwarning("Info", """
-                Welcome to Flashcards!
+        frame.prepare_manage_decks_view()
+        frame.tkraise()
+        self.current_frame = frame
+        if deck is None:
+            tk.messagebox.showwarning("Info", """
+            Welcome to Flashcards!
 
-                You can create decks of flashcards, and study them later to improve your knowledge and long-time memory.
+            You can create decks of flashcards, and study them later to improve your knowledge and long-time memory.
 
-                Click on the "New deck" button below to start.
-                """, icon='info')
-                frame.new_deck_button.focus_force()
-        else:
-            print("Error in show_manage_decks_frame()")
+            Click on the "New deck" button below to start.
+            """, icon='info')
+            frame.new_deck_button.focus_force()
 
     def show_manage_flashcards_frame(self) -> None:
         """
         Brings Manage Flashcards frame to the top.
         """
         deck = self.database_manager.deck
-        frame = self.frames[Program.FLASHCARDSFRAME]
-        # Safety check
-        if isinstance(frame, ManageFlashcardsFrame):
-            try:
-                if hasattr(deck, "flashcards"):
-                    # frame.load_deck()
-                    frame.prepare_manage_flashcards_view()
-                    frame.tkraise()
-                    self.current_frame = frame
-                else:
-                    tk.messagebox.showwarning("Info", "You should add some flashcards first.", icon="info")
-            except Exception as error:
-                print("Exception in show_manage_flashcards_frame(): ", error)
-        else:
-            print("Error in show_manage_flashcards_frame()")
+        try:
+            if deck is not None:
+                frame = self.get_frame(Program.FLASHCARDSFRAME)
+                # frame.load_deck()
+                frame.prepare_manage_flashcards_view()
+                frame.tkraise()
+                self.current_frame = frame
+            else:
+                tk.messagebox.showwarning("Info", "You should add some flashcards first.", icon="info")
+        except Exception as error:
+            print("Exception in show_manage_flashcards_frame(): ", error)
 
     def center_window(self):
         """
@@ -317,33 +410,136 @@ class Program(tk.Tk):
         filename = tkinter.filedialog.askopenfilename(filetypes=(("CSV files", "*.csv"),
                                                                  ("All files", "*.*")))
         if filename:
+            progress_dialog = ProgressDialog(self, "Import", "Importing " + os.path.basename(filename) + "...")
+
+            def import_file(report_progress) -> ImportResult:
+                # Runs on the background thread of the progress dialog.
+                def report_imported_count(imported_count, bytes_read, total_bytes) -> bool:
+                    text = "{} flashcards imported...".format(imported_count)
+                    return report_progress(bytes_read, total_bytes, text)
+
+                return self.import_export_manager.import_csv_file(filename, progress_callback=report_imported_count)
+
             try:
                 # print("filepath: ", filename)
-                result = self.import_export_manager.import_csv_file(filename)
+                result = progress_dialog.run(import_file)
+                progress_dialog.close()
                 if result:
-                    self.frames["ManageDecksFrame"].prepare_manage_decks_view()
-                    tk.messagebox.showwarning("Info", "Import is successful.", icon="info")
+                    self.get_frame(Program.DECKSFRAME).prepare_manage_decks_view()
+                    tk.messagebox.showwarning("Info", self.import_result_message(result), icon="info")
+                elif result.cancelled:
+                    tk.messagebox.showwarning("Info", "Import has been cancelled.", icon="info")
+                elif len(result.warnings) > 0:
+                    for title, message in result.warnings:
+                        tk.messagebox.showwarning(title, message)
+                elif result.error is not None:
+                    tk.messagebox.showwarning("Info", "Import has failed.\n\n" + result.error)
                 else:
                     tk.messagebox.showwarning("Info", "Import has failed.")
-            except:  # <- naked except is a bad idea
-                tk.messagebox.showerror("Open Source File", "Failed to read file\n'%s'" % filename)
+            except (OSError, csv.Error, sqlite3.Error, UnicodeDecodeError) as error:
+                progress_dialog.close()
+                tk.messagebox.showerror("Open Source File", "Failed to read file\n'%s'\n\n%s" % (filename, error))
         else:
             pass
             # print("Filename error in import_deck_from_csv_file()")
 
-    def export_deck_as_csv_file_menu_command(self):
+    def import_decks_from_csv_directory(self) -> None:
+        """
+        Import every csv file in a directory as a new deck.
+        """
+        directory = tkinter.filedialog.askdirectory()
+        if not directory:
+            return
+
+        file_count = len(self.import_export_manager.csv_files_in_directory(directory))
+        if file_count == 0:
+            tk.messagebox.showwarning("Info", "There is not any csv file in this directory.", icon="info")
+            return
+
+        progress_dialog = ProgressDialog(self, "Import", "Importing {} files...".format(file_count))
+
+        def import_directory(report_progress) -> [ImportResult]:
+            # Runs on the background thread of the progress dialog.
+            def report_file_count(done_file_count, total_file_count) -> bool:
+                text = "{} of {} files imported...".format(done_file_count, total_file_count)
+                return report_progress(done_file_count, total_file_count, text)
+
+            return self.import_export_manager.import_csv_directory(directory, progress_callback=report_file_count)
+
+        try:
+            results = progress_dialog.run(import_directory)
+        except (OSError, csv.Error, sqlite3.Error, UnicodeDecodeError) as error:
+            progress_dialog.close()
+            tk.messagebox.showerror("Import", "Failed to import the directory\n'{}'\n\n{}".format(directory, error))
+            return
+        progress_dialog.close()
+        self.get_frame(Program.DECKSFRAME).prepare_manage_decks_view()
+        tk.messagebox.showinfo("Info", self.directory_import_message(results))
+
+    @staticmethod
+    def directory_import_message(results) -> str:
+        """
+        Create the message shown after a directory has been imported.
+        :param [ImportResult] results: Results of the files of the directory
+        :return: Message for the user
+        :rtype: str
+        """
+        imported_results = [result for result in results if result]
+        message = "{} of {} files have been imported as new decks, with {} flashcards.".format(
+            len(imported_results), len(results), sum(result.imported_count for result in imported_results))
+        duplicate_count = sum(result.duplicate_count for result in imported_results)
+        if duplicate_count > 0:
+            message += "\n\n{} rows have been skipped because their questions appeared before in their " \
+                       "files.".format(duplicate_count)
+        rejected_count = sum(result.rejected_count for result in imported_results)
+        if rejected_count > 0:
+            message += "\n\n{} rows could not be read as flashcards.".format(rejected_count)
+        failed_results = [result for result in results if not result and not result.cancelled]
+        if len(failed_results) > 0:
+            message += "\n\nThese files could not be imported:\n"
+            message += "\n".join(os.path.basename(result.filepath) for result in failed_results[:10])
+            if len(failed_results) > 10:
+                message += "\n..."
+        cancelled_count = sum(1 for result in results if result.cancelled)
+        if cancelled_count > 0:
+            message += "\n\nImport has been cancelled before {} files.".format(cancelled_count)
+        return message
+
+    @staticmethod
+    def import_result_message(result) -> str:
+        """
+        Create the message shown after a successful import.
+        :param ImportResult result: Result of the import
+        :return: Message for the user
+        :rtype: str
+        """
+        message = "Import is successful.\n\n{} flashcards have been imported into " \
+                  "\"{}\".".format(result.imported_count, result.deck.title)
+        if result.duplicate_count > 0:
+            message += "\n\n{} rows have been skipped because their questions appeared before in the " \
+                       "file.".format(result.duplicate_count)
+        if result.rejected_count > 0:
+            line_numbers = ", ".join(str(line_number) for line_number, row in result.rejected_rows[:10])
+            if result.rejected_count > 10:
+                line_numbers += ", ..."
+            message += "\n\n{} rows could not be read as flashcards (lines {}).".format(result.rejected_count,
+                                                                                         line_numbers)
+        return message
+
+    def export_deck_as_csv_file_menu_command(self, include_schedule=False):
         """
         Export deck as a csv file menu command click handler
+        :param bool include_schedule: True to export the study progress of the flashcards with them
         """
 
         deck_to_be_exported = None
 
         # Check if Decks view is open
-        if isinstance(self.current_frame, ManageDecksFrame):
+        if self.is_current_frame(Program.DECKSFRAME):
             deck_to_be_exported = self.current_frame.get_selected_deck()
-        elif isinstance(self.current_frame, ManageFlashcardsFrame):
+        elif self.is_current_frame(Program.FLASHCARDSFRAME):
             deck_to_be_exported = self.database_manager.deck
-        elif isinstance(self.current_frame, StudyFrame):
+        elif self.is_current_frame(Program.STUDYFRAME):
             deck_to_be_exported = self.database_manager.deck
         else:
             print("Error in export_deck_as_csv_file_menu_command()")
@@ -360,20 +556,36 @@ class Program(tk.Tk):
                 if filepath[-4:].lower() != ".csv":
                     filepath += ".csv"
 
-                result = self.import_export_manager.export_csv_file(filepath=filepath, deck=deck_to_be_exported)
+                result = self.import_export_manager.export_csv_file(filepath=filepath, deck=deck_to_be_exported,
+                                                                    include_schedule=include_schedule)
 
-                if result:
+                if result and include_schedule:
+
+                    export_message = """
+                    Export is successful.
+
+                    {} flashcards have been exported with their study progress: last study date, due date, and the values calculated by the spaced repetition algorithm. Importing this file creates a copy of the deck that continues from where you are.
+
+                    Other applications may not recognize the additional columns of this file. Use "Export..." to use the deck in other applications.
+                    """.format(result.exported_count)
+
+                    tk.messagebox.showinfo("Info", export_message)
+
+                elif result:
 
                     export_message = """
                     Export is successful.
                     
-                    Please note that export functionality is for using this data in other applications. Therefore only deck's title, and all flashcards in the deck have been exported. Other data about the deck, such as last study date, due date, your previous responses to the flashcards, etc., have not been exported.
+                    Please note that export functionality is for using this data in other applications. Therefore only deck's title, and all flashcards in the deck have been exported. Other data about the deck, such as last study date, due date, your previous responses to the flashcards, etc., have not been exported. Use "Export with study progress..." to export them too.
                     
-                    If you intend to back up your data to use it later with this program you should not use export functionality for this purpose. You can back up \"Flashcards.db\" file that is located in the program directory (by copying it to another location, for example), and restore it later.
+                    If you intend to back up your data to use it later with this program you should not use export functionality for this purpose. Use "Back up now" in the menu instead, and "Restore from backup..." to restore it later.
                     """
 
                     tk.messagebox.showinfo("Info", export_message)
 
+                else:
+                    tk.messagebox.showwarning("Info", "Export has failed.")
+
             else:
                 # Cancel pressed
                 pass
@@ -385,6 +597,96 @@ class Program(tk.Tk):
             else:
                 tk.messagebox.showwarning("Info", "Please select a deck first.")
 
+    def backup_database_menu_command(self) -> None:
+        """
+        Back up the database on a background thread. The Program can be used while the backup runs; its progress is
+        shown in the title of the main window.
+        """
+        if self.backup_thread is not None and self.backup_thread.is_alive():
+            tk.messagebox.showwarning("Info", "A backup is already running.", icon="info")
+            return
+
+        # Include the reviews that have not been written yet
+        self.database_manager.flush_pending_writes()
+
+        self.backup_progress = None
+        self.backup_result = None
+
+        def report_progress(phase, done, total) -> bool:
+            # Called on the backup thread. Tk is updated by check_backup() on the Tk thread.
+            self.backup_progress = (phase, done, total)
+            return True
+
+        def run_backup() -> None:
+            self.backup_result = self.backup_manager.create_backup(progress_callback=report_progress)
+
+        self.backup_thread = threading.Thread(target=run_backup, name="Backup", daemon=True)
+        self.backup_thread.start()
+        self.after(Program.BACKUP_POLL_INTERVAL, self.check_backup)
+
+    def check_backup(self) -> None:
+        """
+        Show the progress of the backup started by backup_database_menu_command(), and its result when it is done.
+        """
+        if self.backup_thread.is_alive():
+            if self.backup_progress is not None:
+                phase, done, total = self.backup_progress
+                self.title("Flashcards - Backup: {} {}%".format(phase.lower(), done * 100 // max(total, 1)))
+            self.after(Program.BACKUP_POLL_INTERVAL, self.check_backup)
+            return
+        self.title("Flashcards")
+        result = self.backup_result
+        if result:
+            tk.messagebox.showinfo("Info", "Backup is successful.\n\nThe database has been backed up to "
+                                           "\"{}\".".format(result.filepath))
+        else:
+            tk.messagebox.showwarning("Info", "Backup has failed.\n\n{}".format(result.error))
+
+    def restore_database_menu_command(self) -> None:
+        """
+        Replace the database with a backup chosen by the user.
+        """
+        if self.backup_thread is not None and self.backup_thread.is_alive():
+            tk.messagebox.showwarning("Info", "Please wait until the running backup is complete.", icon="info")
+            return
+
+        initial_directory = self.backup_manager.directory if os.path.isdir(self.backup_manager.directory) else None
+        filename = tkinter.filedialog.askopenfilename(initialdir=initial_directory,
+                                                      filetypes=(("Flashcards backups",
+                                                                  "*" + BackupManager.FILE_EXTENSION),
+                                                                 ("All files", "*.*")))
+        if not filename:
+            return
+
+        answer = tk.messagebox.askquestion("Restore from backup",
+                                           "All decks and flashcards will be replaced by the contents of the "
+                                           "backup. The current database will be backed up first.\n\n"
+                                           "Do you want to continue?", icon="warning")
+        if answer != "yes":
+            return
+
+        # Ask to save if there is any unsaved changes in the entry boxes
+        if self.is_current_frame(Program.FLASHCARDSFRAME):
+            self.frames[Program.FLASHCARDSFRAME].ask_save_question_if_necessary()
+
+        progress_dialog = ProgressDialog(self, "Restore", "Restoring " + os.path.basename(filename) + "...")
+
+        def report_progress(phase, done, total) -> bool:
+            return progress_dialog.update_progress(done, total, "{}...".format(phase))
+
+        result = self.backup_manager.restore_backup(filename, progress_callback=report_progress)
+        progress_dialog.close()
+
+        if result:
+            # Frames may hold decks and flashcards of the replaced database.
+            self.show_manage_decks_frame()
+            tk.messagebox.showinfo("Info", "Restore is successful.\n\nThe previous database has been backed up to "
+                                           "\"{}\".".format(result.previous_database_backup))
+        elif result.cancelled:
+            tk.messagebox.showwarning("Info", "Restore has been cancelled.", icon="info")
+        else:
+            tk.messagebox.showwarning("Info", "Restore has failed.\n\n{}".format(result.error))
+
     def open_manual_file(self):
         """
         Opens the manual file by using the default PDF reader of the operating system
@@ -0,0 +1,147 @@
+#   Program FlashCards
+#
+#   Copyright 2020 Ertugrul Harman
+#
+#       E-mail  : harmancode@gmail.com
+#       Twitter : https://twitter.com/harmancode
+#       Web     : https://harman.page
+#
+#   This file is part of Flashcards.
+#
+#   Flashcards is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import threading
+
+try:
+    import tkinter as tk  # python 3
+    import tkinter.ttk
+except ImportError:
+    import Tkinter as tk  # python 2
+
+
+class ProgressDialog(tk.Toplevel):
+    # Milliseconds between two checks of an operation started by run()
+    POLL_INTERVAL = 50
+
+    def __init__(self, parent, title, text):
+        """
+        ProgressDialog is a small modal window with a progress bar and a Cancel button. It is used during long
+        operations, such as importing a large file, that report their progress from time to time. They run on the Tk
+        thread and call update_progress(), or on a background thread started by run().
+        :param tk.Tk parent: Parent window
+        :param str title: Title of the dialog window
+        :param str text: Text displayed above the progress bar
+        """
+        tk.Toplevel.__init__(self, parent)
+
+        # True after user has clicked on the Cancel button or has closed the window.
+        self.cancelled = False
+
+        self.title(title)
+        self.resizable(False, False)
+        self.transient(parent)
+
+        self.label = tk.Label(self, text=text, anchor="w")
+        self.label.grid(row=0, column=0, padx=10, pady=10, sticky="we")
+
+        self.progressbar = tk.ttk.Progressbar(self, orient="horizontal", length=300, mode="determinate")
+        self.progressbar.grid(row=1, column=0, padx=10, pady=5, sticky="we")
+
+        self.cancel_button = tk.Button(self, text="Cancel", command=self.cancel, width=9)
+        self.cancel_button.grid(row=2, column=0, padx=10, pady=10)
+
+        # Closing the window cancels the operation as well.
+        self.protocol("WM_DELETE_WINDOW", self.cancel)
+
+        # Keep user from interacting with the main window while the operation runs.
+        self.grab_set()
+        self.update()
+
+    def update_progress(self, value, maximum, text=None) -> bool:
+        """
+        Update the progress bar and process pending events, so that the window is redrawn and the Cancel button can be
+        clicked.
+        :param value: Current position of the progress bar
+        :param maximum: Position of the progress bar when the operation is complete
+        :param Optional[str] text: New text of the label. The text is not changed if it is None.
+        :return: False if user has cancelled the operation. Otherwise, True.
+        :rtype: bool
+        """
+        self.progressbar.config(maximum=max(maximum, 1), value=value)
+        if text is not None:
+            self.label.config(text=text)
+        self.update()
+        return not self.cancelled
+
+    def run(self, task):
+        """
+        Run a long operation on a background thread, and keep the window responsive until it is done. The operation
+        gets a progress callback with the arguments of update_progress(). The callback can be called from the
+        background thread: it only stores the progress, which is shown by the Tk thread, and it returns False if user
+        has cancelled the operation.
+        The operation must not use Tk.
+        :param task: Called as task(progress_callback) on the background thread
+        :type task: Callable[[Callable[..., bool]], Any]
+        :return: Return value of task
+        :raises Exception: The exception raised by task, if there is one
+        """
+        outcome = {"progress": None, "result": None, "error": None}
+        done = tk.BooleanVar(self, value=False)
+
+        def report_progress(value, maximum, text=None) -> bool:
+            outcome["progress"] = (value, maximum, text)
+            return not self.cancelled
+
+        def run_task() -> None:
+            try:
+                outcome["result"] = task(report_progress)
+            except Exception as error:
+                outcome["error"] = error
+
+        def check_task() -> None:
+            progress = outcome["progress"]
+            if progress is not None:
+                value, maximum, text = progress
+                self.progressbar.config(maximum=max(maximum, 1), value=value)
+                if text is not None and not self.cancelled:
+                    self.label.config(text=text)
+            if thread.is_alive():
+                self.after(ProgressDialog.POLL_INTERVAL, check_task)
+            else:
+                done.set(True)
+
+        thread = threading.Thread(target=run_task, name=self.title(), daemon=True)
+        thread.start()
+        self.after(ProgressDialog.POLL_INTERVAL, check_task)
+        # Process the events of the Program until the operation is done.
+        self.wait_variable(done)
+        if outcome["error"] is not None:
+            raise outcome["error"]
+        return outcome["result"]
+
+    def cancel(self) -> None:
+        """
+        Event handler for Cancel button click. The operation stops at its next progress report.
+        """
+        self.cancelled = True
+        self.cancel_button.config(state="disabled")
+        self.label.config(text="Cancelling...")
+
+    def close(self) -> None:
+        """
+        Close the dialog and give control back to the main window.
+        """
+        self.grab_release()
+        self.destroy()
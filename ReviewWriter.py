@@ -0,0 +1,322 @@
+#   Program FlashCards
+#
+#   Copyright 2020 Ertugrul Harman
+#
+#       E-mail  : harmancode@gmail.com
+#       Twitter : https://twitter.com/harmancode
+#       Web     : https://harman.page
+#
+#   This file is part of Flashcards.
+#
+#   Flashcards is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+
+class ReviewWriter:
+    # Maximum amount of reviews waiting to be written. Grading blocks when the queue is full.
+    DEFAULT_MAX_QUEUE_SIZE = 1000
+    # A batch is committed at the latest this many seconds after its first review has been queued.
+    DEFAULT_FLUSH_INTERVAL = 0.25
+    # A batch is committed as soon as it has this many reviews.
+    DEFAULT_FLUSH_COUNT = 50
+    # Reviews that could not be written are written again after this many seconds, or with the next batch.
+    RETRY_INTERVAL = 1.0
+
+    # Updates only the scheduling columns. Question and answer are never written by ReviewWriter.
+    UPDATE_SQL = ''' UPDATE flashcard
+                        SET last_study_date = ?,
+                            due_day = ?,
+                            inter_repetition_interval = ?,
+                            easiness_factor = ?,
+                            repetition_number = ?
+                        WHERE flashcard_id = ? '''
+
+    # Appends a review to the log. A review replayed from the journal after it has been committed already has its
+    # review_id in the log, and it is ignored.
+    INSERT_LOG_SQL = ''' INSERT INTO review_log (review_id, flashcard_id, reviewed_at, grade, previous_interval,
+                                                 new_interval, previous_easiness_factor, new_easiness_factor,
+                                                 response_milliseconds)
+                         VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                         ON CONFLICT (review_id) DO NOTHING '''
+
+    # Amount of UPDATE_SQL parameters at the beginning of a review tuple. The log values follow them.
+    UPDATE_PARAMETER_COUNT = 6
+
+    # Put into the queue by close() to stop the writer thread.
+    _STOP = object()
+
+    def __init__(self, connection_manager, journal_path, flush_interval=DEFAULT_FLUSH_INTERVAL,
+                 flush_count=DEFAULT_FLUSH_COUNT, max_queue_size=DEFAULT_MAX_QUEUE_SIZE):
+        """
+        ReviewWriter writes the results of study sessions to the database on a background thread, so that grading a
+        flashcard never waits for the disk. Reviews of the same flashcard that are waiting in the same batch are
+        coalesced, and every batch is written in one transaction (group commit). Every graded review is also appended
+        to the review_log table in the same transaction, without coalescing.
+        Every review is appended to a journal file before it is queued. The writer thread syncs the journal to the
+        disk once per batch, before the batch is committed, so grading never waits for the disk. If the Program or the
+        operating system crashes before a review is committed, the journal is replayed into the database the next time
+        the ReviewWriter starts. The journal is emptied whenever every queued review has been committed.
+        If a batch cannot be written, its reviews are kept and written again later. take_write_error() reports it
+        once, so that the failure is shown to the user without interrupting the readers, which only wait in flush().
+        Every review gets its review_id in the review_log table when it is journaled, so replaying a review that had
+        already been committed does not log it twice, while different reviews are all logged even if they have the
+        same flashcard and time.
+        :param ConnectionManager.ConnectionManager connection_manager: Connection pool of the database
+        :param str journal_path: Path of the journal file
+        :param float flush_interval: Seconds to wait for more reviews before a batch is committed
+        :param int flush_count: Maximum amount of reviews in a batch
+        :param int max_queue_size: Maximum amount of reviews waiting in the queue
+        """
+        self.connection_manager = connection_manager
+        self.journal_path = journal_path
+        self.flush_interval = flush_interval
+        self.flush_count = max(1, int(flush_count))
+
+        self.queue = queue.Queue(maxsize=max_queue_size)
+
+        # Guards the journal file. Reviews are journaled and queued while it is held, so that the journal is never
+        # emptied while a journaled review is not in the queue yet.
+        self._journal_lock = threading.Lock()
+        self._journal_file = None
+
+        # review_id of the last journaled review. Guarded by self._journal_lock.
+        self._last_review_id = 0
+
+        # Reviews of batches that could not be written, oldest first, and the error of the last attempt. The journal
+        # is kept while there are any, and until the next start if they are still there when the writer is closed.
+        self._failed_reviews = []
+        self._write_error: Optional[sqlite3.Error] = None
+        # True after take_write_error() has reported the current failure.
+        self._write_error_reported = False
+
+        self._thread: threading.Thread = None
+        # Guards the start of the writer thread by put().
+        self._start_lock = threading.Lock()
+
+    def start(self) -> None:
+        """
+        Replay the journal left by a previous run, if there is any, and start the writer thread. put() calls it when
+        the first review is queued, so the thread and the journal file exist only if reviews are written.
+        """
+        with self._start_lock:
+            if self._thread is not None:
+                return
+            self.replay_journal()
+            with self.connection_manager.transaction() as cursor:
+                self._last_review_id = cursor.execute("SELECT IFNULL(MAX(review_id), 0) "
+                                                      "FROM review_log").fetchone()[0]
+            self._journal_file = open(self.journal_path, "a", encoding="utf-8")
+            self._thread = threading.Thread(target=self._run, name="ReviewWriter", daemon=True)
+            self._thread.start()
+
+    def put(self, flashcard_id, last_study_date, due_day, inter_repetition_interval, easiness_factor,
+            repetition_number, grade=None, previous_interval=None, previous_easiness_factor=None,
+            response_time=None) -> None:
+        """
+        Journal the new scheduling values of a flashcard and queue them to be written to the database.
+        :param int flashcard_id: Flashcard's unique identifier
+        :param datetime last_study_date: Value for last_study_date column. It is also the time of the review.
+        :param int due_day: Value for due_day column
+        :param inter_repetition_interval: Value for inter_repetition_interval column
+        :param float easiness_factor: Value for easiness_factor column
+        :param int repetition_number: Value for repetition_number column
+        :param Optional[int] grade: Grade of the answer. The review is logged in the review_log table if it is given.
+        :param previous_interval: inter_repetition_interval before the answer
+        :param Optional[float] previous_easiness_factor: easiness_factor before the answer
+        :param Optional[float] response_time: Seconds the user took to answer, if it is known
+        """
+        # datetime values are stored as text in the same format sqlite3 uses for them.
+        if last_study_date is not None:
+            last_study_date = str(last_study_date)
+        response_milliseconds = int(round(response_time * 1000)) if response_time is not None else None
+        if self._thread is None:
+            self.start()
+        with self._journal_lock:
+            # review_id values follow the clock in nanoseconds, so they grow in time order, and they are always larger
+            # than the ones that are already in the review log.
+            self._last_review_id = max(time.time_ns(), self._last_review_id + 1)
+            review = (last_study_date, due_day, inter_repetition_interval, easiness_factor, repetition_number,
+                      int(flashcard_id), grade, previous_interval, previous_easiness_factor, response_milliseconds,
+                      self._last_review_id)
+            if self._journal_file is not None:
+                self._journal_file.write(json.dumps(review) + "\n")
+                # The journal is synced to the disk by the writer thread, see _sync_journal().
+                self._journal_file.flush()
+            self.queue.put(review)
+
+    def flush(self) -> None:
+        """
+        Block until every queued review has been committed to the database, or has failed to be written. Reviews that
+        could not be written are kept in the journal, and written again in the background; see take_write_error().
+        """
+        if self._thread is not None and self._thread.is_alive():
+            self.queue.join()
+
+    def take_write_error(self) -> Optional[str]:
+        """
+        Report reviews that could not be written to the database. Every failure is reported only once, even if the
+        reviews are still waiting to be written again at the next call.
+        :return: Description of the failure, or None if every review has been written or it has been reported already
+        :rtype: Optional[str]
+        """
+        failed_reviews = self._failed_reviews
+        if len(failed_reviews) == 0 or self._write_error_reported:
+            return None
+        self._write_error_reported = True
+        return "{} reviews could not be written to the database: {}".format(len(failed_reviews), self._write_error)
+
+    def close(self) -> None:
+        """
+        Commit every queued review, stop the writer thread and close the journal. If some reviews could not be
+        written, the journal is kept, and they are written when the next ReviewWriter starts.
+        """
+        if self._thread is not None and self._thread.is_alive():
+            self.queue.put(ReviewWriter._STOP)
+            self._thread.join()
+        self._thread = None
+        with self._journal_lock:
+            if self._journal_file is not None:
+                self._journal_file.close()
+                self._journal_file = None
+            if len(self._failed_reviews) == 0 and os.path.exists(self.journal_path):
+                os.remove(self.journal_path)
+
+    def replay_journal(self) -> int:
+        """
+        Write the reviews found in the journal to the database in one transaction, and empty the journal. Reviews are
+        replayed in their original order; each one holds the complete scheduling state of its flashcard, and the log
+        ignores review_id values it already has, so replaying a review that had already been committed is harmless.
+        :return: Amount of replayed reviews
+        :rtype: int
+        """
+        if not os.path.exists(self.journal_path):
+            return 0
+        reviews = []
+        with open(self.journal_path, encoding="utf-8") as journal_file:
+            for line in journal_file:
+                try:
+                    reviews.append(tuple(json.loads(line)))
+                except ValueError:
+                    # The last line may be incomplete if the Program crashed while writing it.
+                    print("Skipped a bad line in the review journal: ", line)
+        if len(reviews) > 0:
+            with self.connection_manager.transaction() as cursor:
+                cursor.executemany(ReviewWriter.UPDATE_SQL,
+                                   [review[:ReviewWriter.UPDATE_PARAMETER_COUNT] for review in reviews])
+                cursor.executemany(ReviewWriter.INSERT_LOG_SQL, ReviewWriter.log_rows(reviews))
+        os.remove(self.journal_path)
+        return len(reviews)
+
+    def _run(self) -> None:
+        """
+        Body of the writer thread. Collect reviews into batches and write every batch in one transaction.
+        """
+        stopping = False
+        while not stopping:
+            try:
+                # Wake up to write the failed reviews again even if no review is queued.
+                review = self.queue.get(timeout=ReviewWriter.RETRY_INTERVAL if len(self._failed_reviews) > 0
+                                        else None)
+            except queue.Empty:
+                self._write_batch([])
+                self._empty_journal_if_idle()
+                continue
+            batch = [review]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.flush_count and batch[-1] is not ReviewWriter._STOP:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(self.queue.get(timeout=timeout))
+                except queue.Empty:
+                    break
+            if batch[-1] is ReviewWriter._STOP:
+                stopping = True
+            self._sync_journal()
+            self._write_batch([review for review in batch if review is not ReviewWriter._STOP])
+            for _ in batch:
+                self.queue.task_done()
+            self._empty_journal_if_idle()
+
+    def _sync_journal(self) -> None:
+        """
+        Sync the journal to the disk, so that the reviews of a batch survive a crash of the operating system even if
+        the batch cannot be committed. The lock is not taken, because put() may be holding it while it waits for room
+        in the queue; the journal file is only closed after the writer thread has stopped.
+        """
+        journal_file = self._journal_file
+        if journal_file is not None:
+            try:
+                os.fsync(journal_file.fileno())
+            except OSError as error:
+                print("Error in syncing the review journal: ", error)
+
+    def _write_batch(self, batch) -> None:
+        """
+        Write a batch of reviews in one transaction, after the reviews that could not be written before. Only the last
+        review of each flashcard is written to the flashcard table, and every review is appended to the review log.
+        If the transaction fails, all of them are kept to be written again.
+        :param list batch: Reviews as tuples as built by put()
+        """
+        batch = self._failed_reviews + batch
+        if len(batch) == 0:
+            return
+        latest_reviews = dict()
+        for review in batch:
+            latest_reviews[review[5]] = review[:ReviewWriter.UPDATE_PARAMETER_COUNT]
+        try:
+            with self.connection_manager.transaction() as cursor:
+                cursor.executemany(ReviewWriter.UPDATE_SQL, list(latest_reviews.values()))
+                cursor.executemany(ReviewWriter.INSERT_LOG_SQL, ReviewWriter.log_rows(batch))
+        except sqlite3.Error as error:
+            if len(self._failed_reviews) == 0:
+                print("Error in ReviewWriter, reviews are kept in the journal and written again later: ", error)
+                self._write_error_reported = False
+            self._failed_reviews = batch
+            self._write_error = error
+        else:
+            self._failed_reviews = []
+            self._write_error = None
+
+    @staticmethod
+    def log_rows(reviews) -> [tuple]:
+        """
+        :param [tuple] reviews: Reviews as built by put()
+        :return: Parameters of ReviewWriter.INSERT_LOG_SQL for the reviews that have a grade
+        :rtype: [tuple]
+        """
+        return [(review[10], review[5], review[0], review[6], review[7], review[2], review[8], review[3], review[9])
+                for review in reviews if review[6] is not None and review[0] is not None]
+
+    def _empty_journal_if_idle(self) -> None:
+        """
+        Empty the journal if every journaled review has been committed. Do not wait for the lock, because put() may
+        be holding it while it waits for room in the queue; the journal will be emptied after a later batch then.
+        """
+        if len(self._failed_reviews) == 0 and self._journal_lock.acquire(blocking=False):
+            try:
+                if self.queue.unfinished_tasks == 0 and self._journal_file is not None:
+                    self._journal_file.seek(0)
+                    self._journal_file.truncate()
+            finally:
+                self._journal_lock.release()
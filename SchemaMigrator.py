@@ -0,0 +1,272 @@
+#   Program FlashCards
+#
+#   Copyright 2020 Ertugrul Harman
+#
+#       E-mail  : harmancode@gmail.com
+#       Twitter : https://twitter.com/harmancode
+#       Web     : https://harman.page
+#
+#   This file is part of Flashcards.
+#
+#   Flashcards is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import sqlite3
+
+
+class SchemaMigrator:
+
+    def __init__(self, connection_manager):
+        """
+        SchemaMigrator upgrades the database schema in place. The schema version is kept in SQLite's user_version
+        pragma. Every migration step moves the schema from one version to the next, and runs in its own transaction
+        together with the user_version update, so a database is never left between two versions.
+        To change the schema, append a new step to self.migrations. Never edit or reorder the existing steps, because
+        databases of users may already be migrated by them.
+        :param ConnectionManager.ConnectionManager connection_manager: Connection pool of the database to be migrated
+        """
+        self.connection_manager = connection_manager
+
+        # Ordered migration steps as (version, description, function) tuples. Each function takes a cursor of an open
+        # transaction.
+        self.migrations = [
+            (1, "Create deck and flashcard tables", self.create_tables),
+            (2, "Add index for the deck access path of flashcards", self.add_flashcard_deck_index),
+            (3, "Add index for the due date access path of flashcards", self.add_flashcard_due_date_index),
+            (4, "Store due dates of flashcards as day numbers", self.convert_due_dates_to_day_numbers),
+            (5, "Add full-text search index of flashcards", self.add_full_text_search_index),
+            (6, "Add review log and daily review totals", self.add_review_log),
+        ]
+
+    def latest_version(self) -> int:
+        """
+        :return: Schema version that the database will have after all migrations are applied
+        :rtype: int
+        """
+        return self.migrations[-1][0]
+
+    def current_version(self) -> int:
+        """
+        :return: Schema version of the database. 0 for a new database or for a database created before migrations.
+        :rtype: int
+        """
+        with self.connection_manager.transaction() as cursor:
+            version = cursor.execute("PRAGMA user_version").fetchone()[0]
+        return version
+
+    def migrate(self) -> int:
+        """
+        Apply all migration steps that are newer than the schema version of the database, in order.
+        :return: Amount of applied migration steps
+        :rtype: int
+        """
+        current_version = self.current_version()
+        if current_version > self.latest_version():
+            print("Database schema version {} is newer than this program supports ({}). "
+                  "It will be used without migration.".format(current_version, self.latest_version()))
+            return 0
+
+        applied_count = 0
+        for version, description, migration in self.migrations:
+            if version > current_version:
+                try:
+                    with self.connection_manager.transaction(immediate=True) as cursor:
+                        migration(cursor)
+                        # PRAGMA statements do not accept parameters. version is always an int from self.migrations.
+                        cursor.execute("PRAGMA user_version = {}".format(int(version)))
+                except sqlite3.Error as error:
+                    print("Error in database migration {} ({}): ".format(version, description), error)
+                    raise
+                current_version = version
+                applied_count += 1
+        return applied_count
+
+    def create_tables(self, cursor) -> None:
+        """
+        Migration 1. Create SQLite tables in database. Databases created before migrations were introduced already
+        have these tables; IF NOT EXISTS keeps them as they are.
+        :param sqlite3.Cursor cursor: Cursor of the migration transaction
+        """
+        cursor.execute("""
+        CREATE TABLE IF NOT EXISTS deck (
+        deck_id INTEGER PRIMARY KEY, 
+        title TEXT NOT NULL, 
+        last_study_datetime timestamp ) 
+        """)
+
+        cursor.execute("""
+        CREATE TABLE IF NOT EXISTS flashcard (
+        flashcard_id INTEGER PRIMARY KEY, 
+        deck_id INTEGER NOT NULL, 
+        question TEXT NOT NULL, 
+        answer TEXT NOT NULL,
+        last_study_date timestamp, 
+        due_date_string TEXT,
+        inter_repetition_interval INTEGER,
+        easiness_factor REAL,
+        repetition_number INTEGER, 
+        FOREIGN KEY (deck_id) REFERENCES deck (deck_id) )
+        """)
+
+    def add_flashcard_deck_index(self, cursor) -> None:
+        """
+        Migration 2. Index flashcards by deck, in flashcard_id order, so that loading the flashcards of a deck does not
+        scan the flashcards of all other decks.
+        :param sqlite3.Cursor cursor: Cursor of the migration transaction
+        """
+        cursor.execute("""
+        CREATE INDEX IF NOT EXISTS flashcard_deck_id_index
+        ON flashcard (deck_id, flashcard_id)
+        """)
+
+    def add_flashcard_due_date_index(self, cursor) -> None:
+        """
+        Migration 3. Index flashcards by deck and due date, so that due flashcards of a deck are found with a range
+        scan.
+        :param sqlite3.Cursor cursor: Cursor of the migration transaction
+        """
+        cursor.execute("""
+        CREATE INDEX IF NOT EXISTS flashcard_deck_id_due_date_string_index
+        ON flashcard (deck_id, due_date_string)
+        """)
+
+    def convert_due_dates_to_day_numbers(self, cursor) -> None:
+        """
+        Migration 4. Replace the due_date_string TEXT column of the flashcard table with the due_day INTEGER column,
+        which holds the amount of days since 1970-01-01 (see Flashcard.day_number()). Due flashcards are then found by
+        comparing integers, and due dates can be shifted with integer arithmetic.
+        SQLite cannot change the type of a column, so the table is rebuilt with the converted values, in the same
+        column order. Due dates that are missing or cannot be read become today, like in Flashcard.__init__().
+        :param sqlite3.Cursor cursor: Cursor of the migration transaction
+        """
+        cursor.execute("""
+        CREATE TABLE flashcard_with_due_day (
+        flashcard_id INTEGER PRIMARY KEY, 
+        deck_id INTEGER NOT NULL, 
+        question TEXT NOT NULL, 
+        answer TEXT NOT NULL,
+        last_study_date timestamp, 
+        due_day INTEGER,
+        inter_repetition_interval INTEGER,
+        easiness_factor REAL,
+        repetition_number INTEGER, 
+        FOREIGN KEY (deck_id) REFERENCES deck (deck_id) )
+        """)
+
+        # julianday('1970-01-01') is 2440587.5
+        cursor.execute("""
+        INSERT INTO flashcard_with_due_day
+        SELECT flashcard_id, deck_id, question, answer, last_study_date,
+        COALESCE(CAST(julianday(substr(due_date_string, 1, 10)) - 2440587.5 AS INTEGER),
+                 CAST(julianday('now', 'localtime', 'start of day') - 2440587.5 AS INTEGER)),
+        inter_repetition_interval, easiness_factor, repetition_number
+        FROM flashcard
+        """)
+
+        # Indexes of the old table are dropped with it.
+        cursor.execute("DROP TABLE flashcard")
+        cursor.execute("ALTER TABLE flashcard_with_due_day RENAME TO flashcard")
+
+        cursor.execute("""
+        CREATE INDEX flashcard_deck_id_index
+        ON flashcard (deck_id, flashcard_id)
+        """)
+        cursor.execute("""
+        CREATE INDEX flashcard_deck_id_due_day_index
+        ON flashcard (deck_id, due_day)
+        """)
+
+    def add_full_text_search_index(self, cursor) -> None:
+        """
+        Migration 5. Add the flashcard_fts full-text index over the question and answer of flashcards, used by
+        DatabaseManager.search(). It is an external content FTS5 table: it stores only the index, and the texts stay
+        in the flashcard table. Triggers keep it in sync with the flashcard table, and it is filled once from the
+        existing flashcards. Prefix indexes of 2 and 3 characters make search-as-you-type queries fast.
+        If the SQLite library has been compiled without FTS5, the index is not created, and search falls back to LIKE.
+        :param sqlite3.Cursor cursor: Cursor of the migration transaction
+        """
+        try:
+            cursor.execute("""
+            CREATE VIRTUAL TABLE flashcard_fts
+            USING fts5(question, answer, content='flashcard', content_rowid='flashcard_id', prefix='2 3')
+            """)
+        except sqlite3.OperationalError as error:
+            print("Full-text search is not available, search will be slower: ", error)
+            return
+
+        cursor.execute("""
+        CREATE TRIGGER flashcard_fts_after_insert AFTER INSERT ON flashcard BEGIN
+            INSERT INTO flashcard_fts (rowid, question, answer) VALUES (new.flashcard_id, new.question, new.answer);
+        END
+        """)
+        cursor.execute("""
+        CREATE TRIGGER flashcard_fts_after_delete AFTER DELETE ON flashcard BEGIN
+            INSERT INTO flashcard_fts (flashcard_fts, rowid, question, answer)
+            VALUES ('delete', old.flashcard_id, old.question, old.answer);
+        END
+        """)
+        # Reviews update only the scheduling columns. They do not touch the index.
+        cursor.execute("""
+        CREATE TRIGGER flashcard_fts_after_update AFTER UPDATE OF question, answer ON flashcard BEGIN
+            INSERT INTO flashcard_fts (flashcard_fts, rowid, question, answer)
+            VALUES ('delete', old.flashcard_id, old.question, old.answer);
+            INSERT INTO flashcard_fts (rowid, question, answer) VALUES (new.flashcard_id, new.question, new.answer);
+        END
+        """)
+
+        cursor.execute("INSERT INTO flashcard_fts (flashcard_fts) VALUES ('rebuild')")
+
+    def add_review_log(self, cursor) -> None:
+        """
+        Migration 6. Add the review_log table, which gets a row for every answer in a study session, next to the
+        update of the flashcard. It keeps the grade, the interval and easiness factor before and after the answer, and
+        how long the user took to answer in milliseconds (NULL if it is not known). Rows are only added, never
+        changed, except that the reviews of a flashcard are rolled up when the flashcard is deleted. review_id is
+        given by the ReviewWriter when it journals a review, so a review replayed from the journal is not logged twice.
+        Rows older than a retention period are rolled up into the review_day table, one row per day, by
+        DatabaseManager.roll_up_review_log(). day is a day number, see Flashcard.day_number().
+        :param sqlite3.Cursor cursor: Cursor of the migration transaction
+        """
+        cursor.execute("""
+        CREATE TABLE review_log (
+        review_id INTEGER PRIMARY KEY,
+        flashcard_id INTEGER NOT NULL,
+        reviewed_at timestamp NOT NULL,
+        grade INTEGER NOT NULL,
+        previous_interval REAL,
+        new_interval REAL,
+        previous_easiness_factor REAL,
+        new_easiness_factor REAL,
+        response_milliseconds INTEGER )
+        """)
+        # Time range queries and the roll-up scan this index.
+        cursor.execute("""
+        CREATE INDEX review_log_reviewed_at_index
+        ON review_log (reviewed_at)
+        """)
+        # Deleting a flashcard or a deck scans this index.
+        cursor.execute("""
+        CREATE INDEX review_log_flashcard_id_index
+        ON review_log (flashcard_id)
+        """)
+
+        cursor.execute("""
+        CREATE TABLE review_day (
+        day INTEGER PRIMARY KEY,
+        review_count INTEGER NOT NULL,
+        failed_count INTEGER NOT NULL,
+        grade_sum INTEGER NOT NULL,
+        response_count INTEGER NOT NULL,
+        response_milliseconds_sum INTEGER NOT NULL )
+        """)
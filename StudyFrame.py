@@ -25,6 +25,7 @@ import os
 import platform
 
 import random
+from typing import Optional
 
 from PIL import ImageTk
 # from PIL import Image, ImageTk
@@ -37,6 +38,7 @@ except ImportError:
     import tkFont as tkfont  # python 2
 
 from Flashcard import Flashcard
+from StudySession import StudySession
 
 
 class StudyFrame(tk.Frame):
@@ -65,9 +67,6 @@ class StudyFrame(tk.Frame):
         # Holds the current deck's index in the list of decks
         self.deck_index = int()
 
-        # Holds the current flashcard's index in the list of flashcards
-        self.flashcard_index = int()
-
         # Holds displayed flashcard object
         self.flashcard = None
 
@@ -78,9 +77,13 @@ class StudyFrame(tk.Frame):
         # False when user wants to go over all the flashcards, due or not due.
         self.show_only_due_flashcards = True
 
-        # Flashcards will be loaded from this list. It will be re-filled by self.randomize_deck() at the beginning of
-        # each study session, based on the preferences of the user.
-        self.randomized_flashcards: [Flashcard] = None
+        # Flashcards of the study session, in study order, with the label configurations of the next ones prepared.
+        # It is created by self.randomize_deck() at the beginning of each study session, based on the preferences of
+        # the user.
+        self.study_session: Optional[StudySession] = None
+
+        # Options that have been set on self.flashcard_label, so that only the ones that change are set again.
+        self.displayed_label_configuration = dict()
 
         # *** View attributes ***
 
@@ -134,6 +137,11 @@ class StudyFrame(tk.Frame):
                                         font=("Arial", 14, "bold"),
                                         image=self.index_card_image_for_question, compound=tk.CENTER)
         self.flashcard_label.grid(row=0, column=0)
+        self.displayed_label_configuration = {"text": "", "image": self.index_card_image_for_question}
+
+        # Label options of the two sides of a flashcard, besides their text. See StudySession.
+        self.question_style = {"fg": "red", "image": self.index_card_image_for_question}
+        self.answer_style = {"fg": "white", "image": self.index_card_image_for_answer}
 
         self.flashcard_label.grid_rowconfigure(0, weight=1)
         self.flashcard_label.grid_columnconfigure(0, weight=1)
@@ -184,7 +192,8 @@ class StudyFrame(tk.Frame):
         self.status_bar = tk.ttk.Label(self.status_frame, text=status_bar_text, border=1, relief=tk.SUNKEN)
         self.status_bar.pack(fill=tk.X)
 
-        self.prepare_view(show_only_due_flashcards=True)
+        # The view is prepared by Program.show_study_frame() every time it is shown, so that the current deck and its
+        # flashcards are not loaded before they are needed.
 
     def load_flashcard(self) -> None:
         """
@@ -192,23 +201,13 @@ class StudyFrame(tk.Frame):
         """
         deck = self.controller.database_manager.deck
         # print("load_flashcard")
-        # print("self.flashcard_index: ", self.flashcard_index)
 
         if deck is not None:
             # Safety check
-            if self.flashcard_index < len(self.randomized_flashcards):
-                flashcard = self.randomized_flashcards[self.flashcard_index]
-                self.flashcard = flashcard
-                if self.flipped:
-                    # Display the answer
-                    self.flashcard_label.config(fg="white")
-                    self.flashcard_label.config(image=self.index_card_image_for_answer)
-                    self.flashcard_label.config(text=flashcard.answer)
-                else:
-                    # Display the question
-                    self.flashcard_label.config(fg="red")
-                    self.flashcard_label.config(image=self.index_card_image_for_question)
-                    self.flashcard_label.config(text=flashcard.question)
+            if self.study_session is not None and self.study_session.current_flashcard() is not None:
+                self.flashcard = self.study_session.current_flashcard()
+                # Display the answer if flipped, the question otherwise. The configuration is prepared by the session.
+                self.configure_flashcard_label(self.study_session.label_configuration(self.flipped))
                 self.set_status_bar_text()
                 # Give focus to the middle button in all cases
                 self.normal_button.focus_set()
@@ -217,23 +216,61 @@ class StudyFrame(tk.Frame):
         else:
             print("Error: Deck is None in load_flashcard()")
 
+    def configure_flashcard_label(self, configuration) -> None:
+        """
+        Set the options of self.flashcard_label that differ from the displayed ones, with one configure call. Setting
+        an option costs a redraw, and the size of the label is computed again for text and image, even if the value
+        has not changed.
+        :param dict configuration: Label options, e.g. as prepared by StudySession
+        """
+        changed_options = {option: value for option, value in configuration.items()
+                           if self.displayed_label_configuration.get(option) != value}
+        if len(changed_options) > 0:
+            self.flashcard_label.config(**changed_options)
+            self.displayed_label_configuration.update(changed_options)
+
     def show_next_flashcard(self) -> None:
         """
         Displays next flashcard if there is one. Otherwise notifies user that study session is over.
         """
         deck = self.controller.database_manager.deck
+        session = self.study_session
         if deck is not None:
-            if self.flashcard_index < len(self.randomized_flashcards) - 1:
+            if session.has_next_flashcard():
                 self.flipped = False
-                self.flashcard_index += 1
+                session.next_flashcard()
                 self.load_flashcard()
                 self.configure_buttons()
+                # Idle callbacks run after Tk has redrawn the label, in the order they are added.
+                self.after_idle(self.flashcard_displayed, session)
+                self.after_idle(session.prepare)
             else:
+                # Run the answers that are waiting for idle time, and make sure every answer of the session is in the
+                # database before the session ends.
+                self.update_idletasks()
+                # The latency from every answer to its next flashcard is logged once per session.
+                print(session.statistics_text())
+                self.controller.database_manager.flush_pending_writes()
+                write_error = self.controller.database_manager.take_review_write_error()
+                if write_error is not None:
+                    tk.messagebox.showwarning("Error", "Some answers could not be saved yet. They will be saved "
+                                                       "again later.\n\n" + write_error)
                 tk.messagebox.showinfo("All done!", "All done! Congrats!")
                 self.controller.show_manage_decks_frame()
         else:
             print("Error: Deck is None in show_next_flashcard()")
 
+    def flashcard_displayed(self, session) -> None:
+        """
+        Record the latency from the answer of the user to the display of the next flashcard. It is kept in the session,
+        and also recorded by the instrumentation of the DatabaseManager if it is enabled.
+        :param StudySession session: Session of the displayed flashcard
+        """
+        seconds = session.flashcard_displayed()
+        instrumentation = self.controller.database_manager.instrumentation
+        if seconds is not None and instrumentation is not None:
+            instrumentation.record_call("StudyFrame.next_flashcard_latency", seconds)
+
     # Not used anymore.
     # def show_previous_flashcard(self):
     #     """
@@ -262,38 +299,50 @@ class StudyFrame(tk.Frame):
 
     def very_hard_button_clicked(self) -> None:
         """
-        Processes the answer of the user, and calls self.show_next_flashcard()
+        Processes the answer of the user, and shows the next flashcard.
         """
-        self.process_answer(grade=0)
-        self.show_next_flashcard()
+        self.answer(grade=0)
 
     def hard_button_clicked(self) -> None:
         """
-        Processes the answer of the user, and calls self.show_next_flashcard()
+        Processes the answer of the user, and shows the next flashcard.
         """
-        self.process_answer(grade=1)
-        self.show_next_flashcard()
+        self.answer(grade=1)
 
     def normal_button_clicked(self) -> None:
         """
-        Processes the answer of the user, and calls self.show_next_flashcard()
+        Processes the answer of the user, and shows the next flashcard.
         """
-        self.process_answer(grade=2)
-        self.show_next_flashcard()
+        self.answer(grade=2)
 
     def easy_button_clicked(self) -> None:
         """
-        Processes the answer of the user, and calls self.show_next_flashcard()
+        Processes the answer of the user, and shows the next flashcard.
         """
-        self.process_answer(grade=3)
-        self.show_next_flashcard()
+        self.answer(grade=3)
 
     def super_easy_button_clicked(self) -> None:
         """
-        Processes the answer of the user, and calls self.show_next_flashcard()
+        Processes the answer of the user, and shows the next flashcard.
         """
-        self.process_answer(grade=4)
-        self.show_next_flashcard()
+        self.answer(grade=4)
+
+    def answer(self, grade) -> None:
+        """
+        Show the next flashcard, and process the answer of the user to the current one. The answer is processed after
+        the next flashcard has been drawn, so that the user does not wait for it. The answer to the last flashcard is
+        processed before the session ends.
+        :param int grade: Between 0 and 4. Indicates the difficulty of the current flashcard.
+        """
+        response_time = self.study_session.answer_given()
+        deck = self.controller.database_manager.deck
+        flashcard = self.flashcard
+        if self.study_session.has_next_flashcard():
+            self.show_next_flashcard()
+            self.after_idle(self.process_answer, grade, deck, flashcard, response_time)
+        else:
+            self.process_answer(grade, deck, flashcard, response_time)
+            self.show_next_flashcard()
 
     def configure_buttons(self) -> None:
         """
@@ -326,36 +375,43 @@ class StudyFrame(tk.Frame):
         deck = self.controller.database_manager.deck
         if deck is None:
             return StudyFrame.NO_DECK_FOUND_STATUS_TEXT
-        elif len(deck.flashcards) == 0:
+        elif deck.get_flashcard_count() == 0:
             return StudyFrame.NO_DECK_FOUND_STATUS_TEXT
         else:
-            # Check if randomized_flashcards list is present, for safety. This list is required to create a status
-            # bar string.
-            if self.randomized_flashcards is not None:
-                flashcard_count = len(self.randomized_flashcards)
+            # Check if the study session is present, for safety. It is required to create a status bar string.
+            if self.study_session is not None:
+                flashcard_count = len(self.study_session)
                 text = "Deck: " + deck.get_truncated_title() + \
-                       " | Flashcard " + str(self.flashcard_index + 1) + " out of " + str(flashcard_count)
+                       " | Flashcard " + str(self.study_session.index + 1) + " out of " + str(flashcard_count)
             else:
-                # String will be empty if there is self.randomized_flashcards not set.
+                # String will be empty if self.study_session is not set.
                 text = ""
             return text
 
     def randomize_deck(self) -> None:
         """
-        Sets the self.randomized_flashcards list based on the status of the flag of self.show_only_due_flashcards.
+        Sets self.study_session with the flashcards of the deck in random order, based on the status of the flag of
+        self.show_only_due_flashcards.
         """
         deck = self.controller.database_manager.deck
-        # Include all frashcards as default
-        flashcards = deck.flashcards
-        if self.show_only_due_flashcards:
-            # Only include due flashcards
-            flashcards = deck.due_flashcards
         if deck is not None:
+            if self.show_only_due_flashcards:
+                # Only include due flashcards
+                flashcards = deck.due_flashcards
+            else:
+                # Include all frashcards. They are loaded here if they have not been loaded yet.
+                flashcards = deck.flashcards
             try:
                 # Set the current deck here
-                self.randomized_flashcards = flashcards
-                random.shuffle(self.randomized_flashcards)
-                # self.randomized_flashcards.shuffle()
+                # Shuffle a copy, so that the order of the deck's own list is kept.
+                randomized_flashcards = list(flashcards)
+                random.shuffle(randomized_flashcards)
+                # The session fetches the texts of upcoming flashcards with a few queries if they are not loaded.
+                text_cache = None
+                if self.controller.database_manager.defer_flashcard_text:
+                    text_cache = self.controller.database_manager.flashcard_text_cache
+                self.study_session = StudySession(randomized_flashcards, self.question_style, self.answer_style,
+                                                  text_cache=text_cache)
             except Exception as error:
                 print("Exception randomize_deck: ", error)
         else:
@@ -369,22 +425,22 @@ class StudyFrame(tk.Frame):
         """
         self.show_only_due_flashcards = show_only_due_flashcards
         deck = self.controller.database_manager.deck
-        self.flashcard_index = 0
+        self.study_session = None
         self.flipped = False
         if deck is None:
             self.normal_button.config(state="disabled")
             # Normally flashcard should not be displayed when there is no deck. This is set here for safety.
-            self.flashcard_label.config(text=StudyFrame.NO_DECK_FOUND_FLASHCARD_TEXT)
+            self.configure_flashcard_label({"text": StudyFrame.NO_DECK_FOUND_FLASHCARD_TEXT})
         else:
             # Set up due flashcards of the current deck
             deck.set_due_flashcards(self.controller.database_manager)
-            # Set up self.randomized_flashcards attribute based on the self.show_only_due_flashcards flag.
+            # Set up self.study_session attribute based on the self.show_only_due_flashcards flag.
             self.randomize_deck()
             # Check if there is a flashcard to be displayed for safety.
-            if len(self.randomized_flashcards) < 1:
+            if self.study_session is None or len(self.study_session) < 1:
                 self.normal_button.config(state="disabled")
                 # print("Flashcard cannot be loaded because there is no flashcard.")
-                self.flashcard_label.config(text=StudyFrame.NO_FLASHCARD_FOUND_TEXT)
+                self.configure_flashcard_label({"text": StudyFrame.NO_FLASHCARD_FOUND_TEXT})
             else:
                 # Load the first flashcard and set the "Show Answer" button enabled.
                 self.load_flashcard()
@@ -394,17 +450,20 @@ class StudyFrame(tk.Frame):
 
     def start_study_session(self) -> None:
         """
-        Update deck's last study attribute. Reset self.flipped and self_flashcard_index.
+        Update deck's last study attribute. Reset self.flipped.
         """
         deck = self.controller.database_manager.deck
         if deck is not None:
             deck.set_last_study_datetime(self.controller.database_manager)
             self.flipped = False
-            self.flashcard_index = 0
 
-    def process_answer(self, grade: int) -> None:
+    def process_answer(self, grade: int, deck, flashcard, response_time=None) -> None:
         """
-        Process the answer of the user by calling current flashcard's process_answer() method.
-        :param grade: int   Between 0 and 4. Indicates the difficulty of the current flashcard.
+        Process the answer of the user by calling the deck's process_answer() method.
+        :param grade: int   Between 0 and 4. Indicates the difficulty of the flashcard.
+        :param Deck deck: Deck that was studied when the user answered
+        :param Flashcard flashcard: Flashcard that the user answered
+        :param Optional[float] response_time: Seconds the user took to answer. It is kept in the review log.
         """
-        self.flashcard.process_answer(grade=grade, database_manager=self.controller.database_manager)
+        # The deck moves the flashcard in its due index, so due flashcards are not queried again.
+        deck.process_answer(flashcard, grade, self.controller.database_manager, response_time)
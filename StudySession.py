@@ -0,0 +1,192 @@
+#   Program FlashCards
+#
+#   Copyright 2020 Ertugrul Harman
+#
+#       E-mail  : harmancode@gmail.com
+#       Twitter : https://twitter.com/harmancode
+#       Web     : https://harman.page
+#
+#   This file is part of Flashcards.
+#
+#   Flashcards is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import time
+from typing import Optional
+
+from Flashcard import Flashcard
+from Instrumentation import LatencyStatistics
+
+
+class StudySession:
+    # Amount of flashcards after the current one whose label configurations are kept ready.
+    DEFAULT_PREPARED_FLASHCARD_COUNT = 3
+
+    # Texts of this many upcoming flashcards are fetched together when the texts are not kept in the flashcards.
+    TEXT_PREFETCH_COUNT = 100
+
+    def __init__(self, flashcards, question_style, answer_style, text_cache=None,
+                 prepared_flashcard_count=DEFAULT_PREPARED_FLASHCARD_COUNT):
+        """
+        StudySession holds the flashcards of one study session in the order they are studied, and keeps the label
+        configurations of the current flashcard and of the next few ones ready, so that showing the next flashcard does
+        not wait for the database or build anything. It also measures the latency from the answer of the user to the
+        display of the next flashcard, and how long the user takes to answer a flashcard.
+        A label configuration is a dict of tk.Label options: the style of the side, and its text.
+        :param [Flashcard] flashcards: Flashcards in study order
+        :param dict question_style: Label options of the question side other than text, e.g. fg and image
+        :param dict answer_style: Label options of the answer side other than text
+        :param Optional[FlashcardTextCache] text_cache: If it is given, texts of upcoming flashcards are prefetched
+        from it in batches. See DatabaseManager.defer_flashcard_text.
+        :param int prepared_flashcard_count: Amount of flashcards after the current one that are kept ready
+        """
+        self.flashcards: [Flashcard] = flashcards
+        self.question_style = question_style
+        self.answer_style = answer_style
+        self.text_cache = text_cache
+        self.prepared_flashcard_count = max(0, int(prepared_flashcard_count))
+
+        # Index of the current flashcard in self.flashcards
+        self.index = 0
+
+        # Label configurations of the prepared flashcards. {index: (question configuration, answer configuration)}
+        self.prepared_configurations = dict()
+
+        # Texts have been prefetched for the flashcards before this index
+        self._texts_prefetched_until = 0
+
+        # Latencies from the answer of the user to the display of the next flashcard
+        self.latency_statistics = LatencyStatistics()
+
+        # perf_counter() time of the last answer whose next flashcard has not been displayed yet
+        self._answer_time: Optional[float] = None
+
+        # perf_counter() time when the current flashcard was shown
+        self._shown_time = time.perf_counter()
+
+        self.prepare()
+
+    def __len__(self) -> int:
+        return len(self.flashcards)
+
+    def current_flashcard(self) -> Optional[Flashcard]:
+        """
+        :return: Flashcard being studied, or None if the session has no flashcards
+        :rtype: Optional[Flashcard]
+        """
+        if self.index < len(self.flashcards):
+            return self.flashcards[self.index]
+        return None
+
+    def has_next_flashcard(self) -> bool:
+        """
+        :return: True if there is a flashcard after the current one
+        :rtype: bool
+        """
+        return self.index < len(self.flashcards) - 1
+
+    def next_flashcard(self) -> Flashcard:
+        """
+        Make the next flashcard the current one. Its configurations are prepared already, unless prepare() has not
+        had the chance to run since the previous call.
+        :return: New current flashcard
+        :rtype: Flashcard
+        """
+        self.prepared_configurations.pop(self.index, None)
+        self.index += 1
+        self._shown_time = time.perf_counter()
+        return self.flashcards[self.index]
+
+    def label_configuration(self, flipped) -> dict:
+        """
+        :param bool flipped: True for the answer side, False for the question side
+        :return: Label options of the given side of the current flashcard
+        :rtype: dict
+        """
+        configurations = self.prepared_configurations.get(self.index)
+        if configurations is None:
+            configurations = self.prepare_flashcard(self.index)
+        return configurations[1] if flipped else configurations[0]
+
+    def prepare(self) -> None:
+        """
+        Prepare the label configurations of the current flashcard and of the next self.prepared_flashcard_count
+        flashcards. Texts are prefetched for many flashcards at once, so that the database is not queried for every
+        flashcard. Call it when the user is not waiting, e.g. after the next flashcard has been displayed.
+        """
+        last_index = min(self.index + self.prepared_flashcard_count, len(self.flashcards) - 1)
+        if self.text_cache is not None and last_index >= self._texts_prefetched_until:
+            end = max(last_index + 1, self.index + StudySession.TEXT_PREFETCH_COUNT)
+            self.text_cache.prefetch([flashcard.flashcard_id for flashcard in self.flashcards[self.index:end]])
+            self._texts_prefetched_until = min(end, len(self.flashcards))
+        for index in range(self.index, last_index + 1):
+            if index not in self.prepared_configurations:
+                self.prepare_flashcard(index)
+
+    def prepare_flashcard(self, index) -> (dict, dict):
+        """
+        Build and keep the label configurations of a flashcard.
+        :param int index: Index of the flashcard in self.flashcards
+        :return: (question configuration, answer configuration)
+        :rtype: (dict, dict)
+        """
+        flashcard = self.flashcards[index]
+        question_configuration = dict(self.question_style, text=flashcard.question)
+        answer_configuration = dict(self.answer_style, text=flashcard.answer)
+        configurations = (question_configuration, answer_configuration)
+        self.prepared_configurations[index] = configurations
+        return configurations
+
+    def answer_given(self) -> float:
+        """
+        Start measuring the latency of the next flashcard. Call it as soon as the user has answered.
+        :return: Seconds from showing the current flashcard to the answer
+        :rtype: float
+        """
+        self._answer_time = time.perf_counter()
+        return self._answer_time - self._shown_time
+
+    def flashcard_displayed(self) -> Optional[float]:
+        """
+        Finish measuring the latency started by answer_given(). Call it when the next flashcard has been drawn.
+        :return: Latency in seconds, or None if no answer is waiting for its next flashcard
+        :rtype: Optional[float]
+        """
+        if self._answer_time is None:
+            return None
+        self._shown_time = time.perf_counter()
+        seconds = self._shown_time - self._answer_time
+        self._answer_time = None
+        self.latency_statistics.add(seconds)
+        return seconds
+
+    def statistics(self) -> dict:
+        """
+        :return: Latencies from answer to next flashcard of this session, in milliseconds. See
+        LatencyStatistics.to_dict().
+        :rtype: dict
+        """
+        return self.latency_statistics.to_dict()
+
+    def statistics_text(self) -> str:
+        """
+        :return: Summary of self.statistics() in one line, e.g. to be logged when the session ends
+        :rtype: str
+        """
+        statistics = self.statistics()
+        return "Study session: next flashcard shown after {} answers in mean {:.2f} ms, p50 {} ms, p99 {} ms, " \
+               "maximum {:.2f} ms".format(statistics["count"], statistics["mean_milliseconds"],
+                                           LatencyStatistics.percentile_bound(statistics, 0.5),
+                                           LatencyStatistics.percentile_bound(statistics, 0.99),
+                                           statistics["maximum_milliseconds"])
@@ -0,0 +1,247 @@
+#   Program FlashCards
+#
+#   Copyright 2020 Ertugrul Harman
+#
+#       E-mail  : harmancode@gmail.com
+#       Twitter : https://twitter.com/harmancode
+#       Web     : https://harman.page
+#
+#   This file is part of Flashcards.
+#
+#   Flashcards is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+from KeyedTreeview import KeyedTreeview
+
+
+class VirtualTreeview:
+    # Amount of rows kept in the treeview above and below the visible rows.
+    DEFAULT_MARGIN = 50
+
+    def __init__(self, treeview, scrollbar, count_rows, fetch_rows, margin=DEFAULT_MARGIN):
+        """
+        VirtualTreeview displays a long list of rows in a ttk.Treeview without inserting all of them. Only the
+        visible rows, and a margin of rows above and below them, exist in the treeview. When the visible rows get close
+        to the edge of the margin, the window of rows is moved, and the rows are fetched again.
+        The scrollbar is driven by VirtualTreeview, so that it shows the position in the whole list.
+        Rows are identified by their iid, which must be unique and stable, e.g. the primary key of the row.
+        :param tkinter.ttk.Treeview treeview: Treeview that displays the rows
+        :param tkinter.ttk.Scrollbar scrollbar: Vertical scrollbar of the treeview
+        :param count_rows: Returns the amount of rows in the whole list
+        :type count_rows: Callable[[], int]
+        :param fetch_rows: Returns (iid, values) tuples of count rows starting from the row at index start
+        :type fetch_rows: Callable[[int, int], [(str, tuple)]]
+        :param int margin: Amount of rows kept above and below the visible rows
+        """
+        self.treeview = treeview
+        self.keyed_treeview = KeyedTreeview(treeview)
+        self.scrollbar = scrollbar
+        self.count_rows = count_rows
+        self.fetch_rows = fetch_rows
+        self.margin = margin
+
+        # Amount of rows in the whole list
+        self.row_count = 0
+
+        # Index of the first visible row in the whole list
+        self.offset = 0
+
+        # Index of the first row in the treeview in the whole list, and iids of the rows in the treeview, in order
+        self.window_start = 0
+        self.window_iids: [str] = []
+
+        # Amount of rows that fit in the treeview. It is updated when the treeview reports its scroll position.
+        self.visible_row_count = int(self.treeview.cget("height"))
+
+        # Selected iids. They are kept when their rows are scrolled out of the treeview, and selected again when
+        # they are scrolled back in.
+        self.selection: [str] = []
+        self.focus_iid = ""
+
+        # True while the rows of the treeview are being replaced
+        self._rendering = False
+
+        # True when moving the window has been scheduled
+        self._recenter_pending = False
+
+        self.treeview.configure(yscrollcommand=self._on_treeview_scrolled)
+        self.scrollbar.configure(command=self.yview)
+        self.treeview.bind("<ButtonRelease-1>", self._on_user_selection, add="+")
+        self.treeview.bind("<KeyRelease>", self._on_user_selection, add="+")
+
+    def refresh(self) -> None:
+        """
+        Count the rows again, and fetch and display the rows at the current position.
+        """
+        self.row_count = self.count_rows()
+        self.render(self.offset)
+
+    def clear(self) -> None:
+        """
+        Remove all rows from the treeview, and forget the row count and the selection.
+        """
+        self.keyed_treeview.clear()
+        self.window_iids = []
+        self.window_start = 0
+        self.offset = 0
+        self.row_count = 0
+        self.selection = []
+        self.focus_iid = ""
+        self._update_scrollbar()
+
+    def render(self, offset) -> None:
+        """
+        Put the rows around the row at index offset into the treeview, and display that row at the top.
+        :param int offset: Index of the row to be displayed at the top
+        """
+        offset = max(0, min(offset, self.row_count - self.visible_row_count))
+        start = max(0, offset - self.margin)
+        end = min(self.row_count, offset + self.visible_row_count + self.margin)
+        rows = self.fetch_rows(start, end - start) if end > start else []
+
+        self._rendering = True
+        try:
+            # Only the rows that enter or leave the window, or that have changed, cost Tk calls.
+            self.keyed_treeview.apply(rows)
+            self.window_iids = [iid for iid, values in rows]
+            self.window_start = start
+            self._restore_selection()
+            if len(rows) > 0:
+                self.treeview.yview_moveto((offset - start) / len(rows))
+        finally:
+            self._rendering = False
+
+        self.offset = offset
+        self._update_scrollbar()
+
+    def scroll_to(self, offset) -> None:
+        """
+        Display the row at index offset at the top. Rows are fetched only if the row is not in the treeview.
+        :param int offset: Index of the row in the whole list
+        """
+        offset = max(0, min(offset, self.row_count - self.visible_row_count))
+        window_length = len(self.window_iids)
+        if self.window_start <= offset and offset + self.visible_row_count <= self.window_start + window_length:
+            self.treeview.yview_moveto((offset - self.window_start) / window_length)
+        else:
+            self.render(offset)
+
+    def see(self, index) -> None:
+        """
+        Scroll, if necessary, so that the row at the given index is visible.
+        :param int index: Index of the row in the whole list
+        """
+        if index < self.offset:
+            self.scroll_to(index)
+        elif index >= self.offset + self.visible_row_count:
+            self.scroll_to(index - self.visible_row_count + 1)
+
+    def update_row(self, iid, values) -> None:
+        """
+        Change the values of one row without fetching the other rows. Nothing is done if the row is not in the
+        treeview; it will be fetched with its new values when it is scrolled in.
+        :param str iid: iid of the row
+        :param tuple values: New values of the row
+        """
+        self.keyed_treeview.update_row(iid, values)
+
+    def select(self, iids, focus_iid=None) -> None:
+        """
+        Select the given rows and give focus to one of them. Rows that are not in the treeview are selected when they
+        are scrolled in.
+        :param [str] iids: iids of the rows to be selected
+        :param Optional[str] focus_iid: iid of the row to get focus. The first one of iids if it is None.
+        """
+        self.selection = [str(iid) for iid in iids]
+        if focus_iid is None:
+            focus_iid = self.selection[0] if len(self.selection) > 0 else ""
+        self.focus_iid = str(focus_iid)
+        self._restore_selection()
+
+    def yview(self, *args) -> None:
+        """
+        Command of the scrollbar. Takes the same arguments as tkinter's yview methods: ("moveto", fraction) or
+        ("scroll", amount, "units" | "pages").
+        """
+        if len(args) == 0:
+            return
+        if args[0] == "moveto":
+            self.scroll_to(int(float(args[1]) * self.row_count))
+        elif args[0] == "scroll":
+            amount = int(args[1])
+            if args[2].startswith("page"):
+                amount *= max(1, self.visible_row_count - 1)
+            self.scroll_to(self.offset + amount)
+
+    def _restore_selection(self) -> None:
+        """
+        Select the rows of self.selection that are in the treeview, and give focus to self.focus_iid if its row is in
+        the treeview.
+        """
+        window_iids = set(self.window_iids)
+        self.treeview.selection_set([iid for iid in self.selection if iid in window_iids])
+        if self.focus_iid in window_iids:
+            self.treeview.focus(self.focus_iid)
+
+    def _on_user_selection(self, event=None) -> None:
+        """
+        Remember the selection after user has clicked on a row or used the keyboard.
+        """
+        if not self._rendering:
+            self.selection = list(self.treeview.selection())
+            self.focus_iid = self.treeview.focus()
+
+    def _on_treeview_scrolled(self, first, last) -> None:
+        """
+        yscrollcommand of the treeview. It is called with the fractions of the rows in the treeview that are visible,
+        whenever the treeview scrolls by itself, e.g. by mouse wheel or keyboard. It updates the position in the whole
+        list, and moves the window if the visible rows are close to its edges.
+        :param str first: Fraction of the treeview rows above the first visible row
+        :param str last: Fraction of the treeview rows above the row after the last visible row
+        """
+        window_length = len(self.window_iids)
+        if window_length == 0:
+            self._update_scrollbar()
+            return
+        first = float(first)
+        last = float(last)
+        local_offset = int(round(first * window_length))
+        self.visible_row_count = max(1, int(round((last - first) * window_length)))
+        self.offset = self.window_start + local_offset
+        self._update_scrollbar()
+
+        if not self._rendering and not self._recenter_pending:
+            near_top = self.window_start > 0 and local_offset < self.margin // 2
+            near_bottom = (self.window_start + window_length < self.row_count and
+                           local_offset + self.visible_row_count > window_length - self.margin // 2)
+            if near_top or near_bottom:
+                self._recenter_pending = True
+                self.treeview.after_idle(self._recenter)
+
+    def _recenter(self) -> None:
+        """
+        Move the window so that the visible rows are in its middle.
+        """
+        self._recenter_pending = False
+        self.render(self.offset)
+
+    def _update_scrollbar(self) -> None:
+        """
+        Set the scrollbar according to the position in the whole list.
+        """
+        if self.row_count <= 0:
+            self.scrollbar.set(0, 1)
+        else:
+            first = self.offset / self.row_count
+            last = min(1.0, (self.offset + self.visible_row_count) / self.row_count)
+            self.scrollbar.set(first, last)
@@ -0,0 +1,156 @@
+#   Program FlashCards
+#
+#   Copyright 2020 Ertugrul Harman
+#
+#       E-mail  : harmancode@gmail.com
+#       Twitter : https://twitter.com/harmancode
+#       Web     : https://harman.page
+#
+#   This file is part of Flashcards.
+#
+#   Flashcards is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+"""
+Generates a synthetic Flashcards.db for benchmarks.
+
+The collection has a configurable amount of decks, flashcards per deck, and reviews per flashcard. Reviews are
+simulated with the SM-2 methods of Flashcard over the past HISTORY_DAYS days with random grades, so the flashcards
+end up with realistic intervals, easiness factors, last study dates, and due dates spread around today. Every
+simulated review is written to the review log, with a random response time. A part of the
+flashcards is left new, as if it has never been studied. The same seed gives the same collection.
+
+Run from the root folder of the Program:
+    python -m benchmark.generate_collection OUTPUT [--decks 10] [--cards 1000] [--reviews 5] [--seed 1]
+"""
+
+import argparse
+import datetime
+import os
+import random
+import time
+
+from DatabaseManager import DatabaseManager
+from Deck import Deck
+from Flashcard import Flashcard
+
+# Lengths of the generated questions and answers
+QUESTION_LENGTH = 60
+ANSWER_LENGTH = 40
+
+# Reviews are simulated over this many days before today.
+HISTORY_DAYS = 180
+
+# Share of the flashcards that have never been studied
+NEW_FLASHCARD_RATIO = 0.2
+
+# Grades given in simulated reviews, and their weights. Most answers are right.
+GRADES = (0, 1, 2, 3, 4)
+GRADE_WEIGHTS = (5, 10, 20, 35, 30)
+
+# Mean and standard deviation of the response times of simulated reviews, in milliseconds
+RESPONSE_MILLISECONDS_MEAN = 6000
+RESPONSE_MILLISECONDS_DEVIATION = 3000
+MINIMUM_RESPONSE_MILLISECONDS = 500
+
+
+def simulate_reviews(flashcard, review_count, now, generator) -> [tuple]:
+    """
+    Answer a flashcard review_count times with random grades, each time when it was due, starting at a random moment
+    of the history. Reviews that would happen after now are not simulated.
+    :param Flashcard flashcard: New flashcard. Its SM-2 values, last study date and due date are set.
+    :param int review_count: Amount of reviews to simulate
+    :param datetime.datetime now: End of the history
+    :param random.Random generator: Source of random numbers
+    :return: Rows of the review log for the simulated reviews. See DatabaseManager.add_review_log_rows().
+    :rtype: [tuple]
+    """
+    log_rows = []
+    review_time = now - datetime.timedelta(days=generator.uniform(0, HISTORY_DAYS))
+    for review in range(review_count):
+        grade = generator.choices(GRADES, GRADE_WEIGHTS)[0]
+        previous_interval = flashcard.inter_repetition_interval
+        previous_easiness_factor = flashcard.easiness_factor
+        flashcard.set_inter_repetition_interval(grade)
+        flashcard.last_study_date = review_time
+        flashcard.due_day = Flashcard.day_number(review_time + datetime.timedelta(flashcard.inter_repetition_interval))
+        response_milliseconds = max(MINIMUM_RESPONSE_MILLISECONDS,
+                                    int(generator.gauss(RESPONSE_MILLISECONDS_MEAN, RESPONSE_MILLISECONDS_DEVIATION)))
+        log_rows.append((flashcard.flashcard_id, str(review_time), grade, previous_interval,
+                         flashcard.inter_repetition_interval, previous_easiness_factor, flashcard.easiness_factor,
+                         response_milliseconds))
+        review_time += datetime.timedelta(flashcard.inter_repetition_interval)
+        if review_time > now:
+            break
+    return log_rows
+
+
+def generate_collection(db_path, deck_count, cards_per_deck, reviews_per_card, seed=1) -> None:
+    """
+    Create a database with a synthetic collection. The database must not exist.
+    :param str db_path: Path of the new database
+    :param int deck_count: Amount of decks
+    :param int cards_per_deck: Amount of flashcards in every deck. At most Deck.MAXIMUM_AMOUNT_OF_FLASHCARDS.
+    :param int reviews_per_card: Amount of simulated reviews of every studied flashcard
+    :param int seed: Seed of the random numbers
+    """
+    if os.path.exists(db_path):
+        raise FileExistsError("{} already exists".format(db_path))
+    if cards_per_deck > Deck.MAXIMUM_AMOUNT_OF_FLASHCARDS:
+        raise ValueError("A deck may not contain more than {} flashcards".format(Deck.MAXIMUM_AMOUNT_OF_FLASHCARDS))
+
+    generator = random.Random(seed)
+    now = datetime.datetime.now()
+    database_manager = DatabaseManager(db_path)
+    try:
+        for deck_number in range(deck_count):
+            deck_id = database_manager.add_new_deck_to_db("Deck {}".format(deck_number))
+            rows = [("Question {} of deck {} ".format(index, deck_number).ljust(QUESTION_LENGTH, "q"),
+                     "Answer {} ".format(index).ljust(ANSWER_LENGTH, "a"))
+                    for index in range(cards_per_deck)]
+            flashcard_ids = database_manager.add_flashcards_bulk(deck_id, rows)
+
+            schedules = []
+            log_rows = []
+            for flashcard_id in flashcard_ids:
+                if reviews_per_card <= 0 or generator.random() < NEW_FLASHCARD_RATIO:
+                    continue
+                flashcard = Flashcard(flashcard_id, deck_id, None, None, easiness_factor=2.5)
+                log_rows.extend(simulate_reviews(flashcard, reviews_per_card, now, generator))
+                schedules.append((flashcard.last_study_date, flashcard.due_day, flashcard.inter_repetition_interval,
+                                  flashcard.easiness_factor, flashcard.repetition_number, flashcard_id))
+            database_manager.update_flashcard_schedules(schedules)
+            database_manager.add_review_log_rows(log_rows)
+    finally:
+        database_manager.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Generate a synthetic Flashcards database.")
+    parser.add_argument("output", help="path of the new database")
+    parser.add_argument("--decks", type=int, default=10, help="amount of decks")
+    parser.add_argument("--cards", type=int, default=1000, help="amount of flashcards per deck")
+    parser.add_argument("--reviews", type=int, default=5, help="amount of simulated reviews per studied flashcard")
+    parser.add_argument("--seed", type=int, default=1, help="seed of the random numbers")
+    arguments = parser.parse_args()
+
+    start_time = time.perf_counter()
+    generate_collection(arguments.output, arguments.decks, arguments.cards, arguments.reviews, arguments.seed)
+    print("Generated {} decks x {} flashcards in {:.1f} s: {}".format(arguments.decks, arguments.cards,
+                                                                     time.perf_counter() - start_time,
+                                                                     arguments.output))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+#   Program FlashCards
+#
+#   Copyright 2020 Ertugrul Harman
+#
+#       E-mail  : harmancode@gmail.com
+#       Twitter : https://twitter.com/harmancode
+#       Web     : https://harman.page
+#
+#   This file is part of Flashcards.
+#
+#   Flashcards is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+"""
+Measures the memory used by loaded flashcards.
+
+A temporary database with a collection of flashcards is created, then every deck is loaded, and its due flashcards
+are set, the same way as the Program does before a study session. Memory allocated by loading is measured with
+tracemalloc, and reported in bytes per flashcard.
+
+Run from the root folder of the Program:
+    python -m benchmark.memory_report [--cards 100000] [--defer-text]
+"""
+
+import argparse
+import os
+import tempfile
+import tracemalloc
+
+from DatabaseManager import DatabaseManager
+from Deck import Deck
+
+# Lengths of the generated questions and answers. Real flashcards are usually a short question and a short answer.
+QUESTION_LENGTH = 60
+ANSWER_LENGTH = 40
+
+
+def create_collection(db_path, card_count) -> None:
+    """
+    Create a database with card_count flashcards, split into decks of Deck.MAXIMUM_AMOUNT_OF_FLASHCARDS flashcards.
+    :param str db_path: Path of the new database
+    :param int card_count: Total amount of flashcards
+    """
+    database_manager = DatabaseManager(db_path)
+    deck_number = 0
+    remaining = card_count
+    while remaining > 0:
+        deck_size = min(remaining, Deck.MAXIMUM_AMOUNT_OF_FLASHCARDS)
+        deck_id = database_manager.add_new_deck_to_db("Deck {}".format(deck_number))
+        rows = [("Question {} of deck {} ".format(index, deck_number).ljust(QUESTION_LENGTH, "q"),
+                 "Answer {} ".format(index).ljust(ANSWER_LENGTH, "a"))
+                for index in range(deck_size)]
+        database_manager.add_flashcards_bulk(deck_id, rows)
+        remaining -= deck_size
+        deck_number += 1
+    database_manager.close()
+
+
+def measure(db_path, defer_text) -> (int, int):
+    """
+    Load every deck of the database, with its due flashcards, and measure the allocated memory.
+    :param str db_path: Path of the database
+    :param bool defer_text: Passed to DatabaseManager as defer_flashcard_text
+    :return: (allocated bytes, amount of loaded flashcards)
+    :rtype: (int, int)
+    """
+    database_manager = DatabaseManager(db_path, defer_flashcard_text=defer_text)
+
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    card_count = 0
+    for deck in database_manager.decks:
+        card_count += len(deck.flashcards)
+        database_manager.load_due_flashcards(deck)
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+
+    allocated = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+    database_manager.close()
+    return allocated, card_count
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Measure memory used by loaded flashcards.")
+    parser.add_argument("--cards", type=int, default=100000, help="amount of flashcards in the collection")
+    parser.add_argument("--defer-text", action="store_true", help="load flashcards without question and answer")
+    arguments = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        db_path = os.path.join(directory, "memory_report.db")
+        create_collection(db_path, arguments.cards)
+        allocated, card_count = measure(db_path, arguments.defer_text)
+
+    print("Flashcards loaded : {}".format(card_count))
+    print("Allocated memory  : {:.1f} MiB".format(allocated / (1024 * 1024)))
+    print("Bytes per flashcard: {:.0f}".format(allocated / max(1, card_count)))
+
+
+if __name__ == "__main__":
+    main()
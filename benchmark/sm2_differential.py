@@ -0,0 +1,205 @@
+#   Program FlashCards
+#
+#   Copyright 2020 Ertugrul Harman
+#
+#       E-mail  : harmancode@gmail.com
+#       Twitter : https://twitter.com/harmancode
+#       Web     : https://harman.page
+#
+#   This file is part of Flashcards.
+#
+#   Flashcards is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+"""
+Differential check of BatchScheduler against Flashcard.set_inter_repetition_interval() and Flashcard.set_due_date().
+
+Random flashcards are answered with random grades for several rounds, once one by one with the Flashcard methods and
+once with BatchScheduler, and every resulting value must be identical, including its type. Both implementations of
+BatchScheduler are checked; the NumPy one only if NumPy is installed. Also, the time of both ways is reported.
+
+Run from the root folder of the Program:
+    python -m benchmark.sm2_differential [--cards 100000] [--rounds 5] [--seed 1]
+    python -m benchmark.sm2_differential --quick
+
+--quick checks only a small fixed sample: every combination of a few repetition numbers, intervals and easiness
+factors answered with every grade, which reaches every branch of the SM-2 methods. It runs in well under a second, so
+it can be run after every change of the scheduling code.
+"""
+
+import argparse
+import datetime
+import random
+import sys
+import time
+
+from BatchScheduler import BatchScheduler
+from Flashcard import Flashcard
+
+
+def random_flashcards(card_count, generator) -> [Flashcard]:
+    """
+    Create flashcards with random SM-2 values, including the initial values of new flashcards.
+    :param int card_count: Amount of flashcards
+    :param random.Random generator: Source of random numbers
+    :rtype: [Flashcard]
+    """
+    flashcards = []
+    for flashcard_id in range(card_count):
+        if generator.random() < 0.2:
+            # New flashcard, as created by the Program
+            repetition_number, interval, easiness_factor = 0, 0, 0.0
+        else:
+            repetition_number = generator.randint(0, 12)
+            interval = generator.choice([generator.randint(0, 60), generator.uniform(0, 60)])
+            easiness_factor = generator.uniform(1.3, 2.5)
+        flashcards.append(Flashcard(flashcard_id=flashcard_id, deck_id=1, question="", answer="",
+                                    due_date_string="2020-01-01",
+                                    inter_repetition_interval=interval,
+                                    easiness_factor=easiness_factor,
+                                    repetition_number=repetition_number))
+    return flashcards
+
+
+def fixed_flashcards() -> [Flashcard]:
+    """
+    Create flashcards with every combination of a few SM-2 values, five of each: one per grade when they are answered
+    with fixed_grades() for the first time. Intervals are int and float, and easiness factors include values that
+    drop below the 1.3 limit.
+    :rtype: [Flashcard]
+    """
+    flashcards = []
+    for repetition_number in (0, 1, 2, 7):
+        for interval in (0, 1, 6, 2.5, 37):
+            for easiness_factor in (0.0, 1.3, 1.36, 2.5):
+                for _ in range(5):
+                    flashcards.append(Flashcard(flashcard_id=len(flashcards), deck_id=1, question="", answer="",
+                                                due_date_string="2020-01-01",
+                                                inter_repetition_interval=interval,
+                                                easiness_factor=easiness_factor,
+                                                repetition_number=repetition_number))
+    return flashcards
+
+
+def copy_flashcards(flashcards) -> [Flashcard]:
+    """
+    :return: New Flashcard objects with the same values
+    :rtype: [Flashcard]
+    """
+    return [Flashcard(flashcard_id=flashcard.flashcard_id, deck_id=flashcard.deck_id, question="", answer="",
+                      due_day=flashcard.due_day,
+                      inter_repetition_interval=flashcard.inter_repetition_interval,
+                      easiness_factor=flashcard.easiness_factor,
+                      repetition_number=flashcard.repetition_number)
+            for flashcard in flashcards]
+
+
+def values_of(flashcard) -> tuple:
+    """
+    :return: SM-2 values of the flashcard with their types, so that 6 and 6.0 are not taken as equal
+    :rtype: tuple
+    """
+    return ((flashcard.repetition_number, type(flashcard.repetition_number)),
+            (flashcard.inter_repetition_interval, type(flashcard.inter_repetition_interval)),
+            (flashcard.easiness_factor, type(flashcard.easiness_factor)),
+            flashcard.due_day)
+
+
+def check(scheduler, card_count, rounds, seed, quick=False) -> bool:
+    """
+    Compare the scheduler with the Flashcard methods.
+    :param BatchScheduler scheduler: Scheduler to be checked
+    :param int card_count: Amount of flashcards. Not used if quick is True.
+    :param int rounds: How many times every flashcard is answered
+    :param int seed: Seed of the random numbers
+    :param bool quick: True to check the flashcards of fixed_flashcards(). The grades of the first round cycle through
+    all grades, the next ones are random.
+    :return: True if all values are identical
+    :rtype: bool
+    """
+    generator = random.Random(seed)
+    if quick:
+        scalar_flashcards = fixed_flashcards()
+        card_count = len(scalar_flashcards)
+    else:
+        scalar_flashcards = random_flashcards(card_count, generator)
+    batch_flashcards = copy_flashcards(scalar_flashcards)
+    scalar_seconds = 0.0
+    batch_seconds = 0.0
+
+    for round_number in range(rounds):
+        if quick and round_number == 0:
+            grades = [index % 5 for index in range(card_count)]
+        else:
+            grades = [generator.randint(0, 4) for _ in range(card_count)]
+
+        # Flashcard.set_due_date() uses the current time of every call, BatchScheduler uses the moment the round
+        # starts. A due date of the Flashcard methods is also accepted if it is the one at the end of their loop.
+        now = datetime.datetime.now()
+
+        start = time.perf_counter()
+        for flashcard, grade in zip(scalar_flashcards, grades):
+            flashcard.set_inter_repetition_interval(grade)
+            flashcard.set_due_date()
+        scalar_seconds += time.perf_counter() - start
+        end = datetime.datetime.now()
+
+        start = time.perf_counter()
+        scheduler.schedule_flashcards(batch_flashcards, grades, now)
+        batch_seconds += time.perf_counter() - start
+
+        for scalar_flashcard, batch_flashcard in zip(scalar_flashcards, batch_flashcards):
+            scalar_values = values_of(scalar_flashcard)
+            batch_values = values_of(batch_flashcard)
+            if scalar_values[:3] == batch_values[:3] and scalar_values[3] != batch_values[3]:
+                due_day_at_end = scheduler.due_days([batch_flashcard.inter_repetition_interval], end)[0]
+                if scalar_values[3] == due_day_at_end:
+                    batch_flashcard.due_day = scalar_flashcard.due_day
+                    continue
+            if scalar_values != batch_values:
+                print("Difference in round {}, flashcard {}:".format(round_number, scalar_flashcard.flashcard_id))
+                print("  Flashcard method: ", values_of(scalar_flashcard))
+                print("  BatchScheduler  : ", values_of(batch_flashcard))
+                return False
+
+    implementation = "NumPy" if scheduler.use_numpy else "Python"
+    print("{}: {} flashcards x {} rounds identical. Flashcard methods {:.3f} s, BatchScheduler {:.3f} s".format(
+        implementation, card_count, rounds, scalar_seconds, batch_seconds))
+    return True
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare BatchScheduler with the Flashcard SM-2 methods.")
+    parser.add_argument("--cards", type=int, default=100000, help="amount of flashcards")
+    # Intervals grow quickly with every round. Due dates go beyond the year 9999 after about 8 rounds.
+    parser.add_argument("--rounds", type=int, default=5, help="how many times every flashcard is answered")
+    parser.add_argument("--seed", type=int, default=1, help="seed of the random numbers")
+    parser.add_argument("--quick", action="store_true", help="check only a small fixed sample of flashcards")
+    arguments = parser.parse_args()
+
+    passed = check(BatchScheduler(use_numpy=False), arguments.cards, arguments.rounds, arguments.seed,
+                   arguments.quick)
+    try:
+        numpy_scheduler = BatchScheduler(use_numpy=True)
+    except ImportError:
+        print("NumPy: not installed, skipped")
+    else:
+        passed = check(numpy_scheduler, arguments.cards, arguments.rounds, arguments.seed,
+                       arguments.quick) and passed
+
+    sys.exit(0 if passed else 1)
+
+
+if __name__ == "__main__":
+    main()
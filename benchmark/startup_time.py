@@ -0,0 +1,106 @@
+#   Program FlashCards
+#
+#   Copyright 2020 Ertugrul Harman
+#
+#       E-mail  : harmancode@gmail.com
+#       Twitter : https://twitter.com/harmancode
+#       Web     : https://harman.page
+#
+#   This file is part of Flashcards.
+#
+#   Flashcards is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+"""
+Compares the time to the first paint of the Program window with lazy frames (the default) and with all frames built
+up front (FLASHCARDS_EAGER_FRAMES=1).
+
+The Program is started several times in a new process for each mode, on a temporary database with one deck, with
+FLASHCARDS_STARTUP_TIMING=exit, so that it prints its startup times and quits after the first paint. It needs a
+display.
+
+Run from the root folder of the Program:
+    python -m benchmark.startup_time [--runs 5]
+"""
+
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+
+from DatabaseManager import DatabaseManager
+
+# Root folder of the Program, where main.py is
+PROGRAM_DIRECTORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Matches the line printed by Program.report_startup_time()
+FIRST_PAINT_PATTERN = re.compile(r"first paint after ([0-9.]+) ms")
+
+
+def create_database(directory) -> None:
+    """
+    Create Flashcards.db with one small deck in the directory, so that the Program does not show its welcome message.
+    :param str directory: Working directory of the Program processes
+    """
+    database_manager = DatabaseManager(os.path.join(directory, DatabaseManager.DB_PATH))
+    deck_id = database_manager.add_new_deck_to_db("Startup benchmark")
+    database_manager.add_flashcards_bulk(deck_id, [("Question {}".format(index), "Answer {}".format(index))
+                                                   for index in range(100)])
+    database_manager.close()
+
+
+def time_startup(directory, eager) -> (float, str):
+    """
+    Start the Program once and read its startup time.
+    :param str directory: Working directory of the Program, with its database
+    :param bool eager: True to build all frames up front
+    :return: (time to first paint in milliseconds, line printed by the Program)
+    :rtype: (float, str)
+    """
+    environment = dict(os.environ)
+    environment["FLASHCARDS_STARTUP_TIMING"] = "exit"
+    environment["FLASHCARDS_EAGER_FRAMES"] = "1" if eager else "0"
+    completed = subprocess.run([sys.executable, os.path.join(PROGRAM_DIRECTORY, "main.py")], cwd=directory,
+                               env=environment, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                               universal_newlines=True, timeout=60)
+    for line in completed.stdout.splitlines():
+        match = FIRST_PAINT_PATTERN.search(line)
+        if match is not None:
+            return float(match.group(1)), line
+    raise RuntimeError("The Program did not report its startup time:\n" + completed.stdout)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare time to first paint with lazy and eager frames.")
+    parser.add_argument("--runs", type=int, default=5, help="amount of Program starts per mode")
+    arguments = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        create_database(directory)
+        for eager in (True, False):
+            times = []
+            line = ""
+            for run in range(arguments.runs):
+                milliseconds, line = time_startup(directory, eager)
+                times.append(milliseconds)
+            print("{:5} frames: median first paint {:.1f} ms (min {:.1f} ms)".format(
+                "eager" if eager else "lazy", statistics.median(times), min(times)))
+            print("    last run: {}".format(line))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,277 @@
+#   Program FlashCards
+#
+#   Copyright 2020 Ertugrul Harman
+#
+#       E-mail  : harmancode@gmail.com
+#       Twitter : https://twitter.com/harmancode
+#       Web     : https://harman.page
+#
+#   This file is part of Flashcards.
+#
+#   Flashcards is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+"""
+Benchmark suite of the data layer.
+
+A synthetic collection is generated once (see benchmark.generate_collection), and every benchmark runs several times
+on a fresh copy of it, so that runs do not affect each other. Copying is not timed. The benchmarks are:
+
+    open                  DatabaseManager(), which migrates the schema and loads all decks
+    load_all_decks        DatabaseManager.load_all_decks() on an open database
+    load_due_flashcards   DatabaseManager.load_due_flashcards() of every deck
+    import_csv_file       ImportExportManager.import_csv_file() of a deck exported as csv
+    export_csv_file       ImportExportManager.export_csv_file() of a deck
+    delete_deck           DatabaseManager.delete_deck_from_db() of a deck with all its flashcards
+    study_session         K answers with Deck.process_answer(), until they have been written to the database
+
+Results are written as JSON with the commit, the machine and the parameters, so that runs on the same machine can be
+compared across commits.
+
+Run from the root folder of the Program:
+    python -m benchmark.suite [--decks 10] [--cards 1000] [--reviews 5] [--answers 500] [--repeat 5]
+                              [--output results.json]
+"""
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import random
+import shutil
+import sqlite3
+import statistics
+import subprocess
+import tempfile
+import time
+
+from DatabaseManager import DatabaseManager
+from ImportExportManager import ImportExportManager
+from benchmark.generate_collection import generate_collection
+
+
+def open_database(db_path) -> float:
+    """
+    Time DatabaseManager(), which migrates the schema and loads all decks.
+    :param str db_path: Path of the copy of the collection
+    :return: Elapsed seconds
+    :rtype: float
+    """
+    start_time = time.perf_counter()
+    database_manager = DatabaseManager(db_path)
+    elapsed = time.perf_counter() - start_time
+    database_manager.close()
+    return elapsed
+
+
+def load_all_decks(db_path) -> float:
+    """
+    Time DatabaseManager.load_all_decks() on an open database.
+    :param str db_path: Path of the copy of the collection
+    :return: Elapsed seconds
+    :rtype: float
+    """
+    database_manager = DatabaseManager(db_path)
+    start_time = time.perf_counter()
+    database_manager.load_all_decks()
+    elapsed = time.perf_counter() - start_time
+    database_manager.close()
+    return elapsed
+
+
+def load_due_flashcards(db_path) -> float:
+    """
+    Time DatabaseManager.load_due_flashcards() of every deck.
+    :param str db_path: Path of the copy of the collection
+    :return: Elapsed seconds
+    :rtype: float
+    """
+    database_manager = DatabaseManager(db_path)
+    start_time = time.perf_counter()
+    for deck in database_manager.decks:
+        database_manager.load_due_flashcards(deck)
+    elapsed = time.perf_counter() - start_time
+    database_manager.close()
+    return elapsed
+
+
+def import_csv_file(db_path) -> float:
+    """
+    Time the import of the first deck, exported as csv, as a new deck.
+    :param str db_path: Path of the copy of the collection
+    :return: Elapsed seconds
+    :rtype: float
+    """
+    database_manager = DatabaseManager(db_path)
+    import_export_manager = ImportExportManager(database_manager)
+    csv_path = db_path + ".csv"
+    import_export_manager.export_csv_file(csv_path, database_manager.decks[0])
+    start_time = time.perf_counter()
+    result = import_export_manager.import_csv_file(csv_path)
+    elapsed = time.perf_counter() - start_time
+    database_manager.close()
+    if not result:
+        raise RuntimeError(result.summary())
+    return elapsed
+
+
+def export_csv_file(db_path) -> float:
+    """
+    Time the export of the first deck, whose flashcards are not loaded yet.
+    :param str db_path: Path of the copy of the collection
+    :return: Elapsed seconds
+    :rtype: float
+    """
+    database_manager = DatabaseManager(db_path)
+    import_export_manager = ImportExportManager(database_manager)
+    start_time = time.perf_counter()
+    result = import_export_manager.export_csv_file(db_path + ".csv", database_manager.decks[0])
+    elapsed = time.perf_counter() - start_time
+    database_manager.close()
+    if not result:
+        raise RuntimeError(result.summary())
+    return elapsed
+
+
+def delete_deck(db_path) -> float:
+    """
+    Time the deletion of the first deck with all its flashcards.
+    :param str db_path: Path of the copy of the collection
+    :return: Elapsed seconds
+    :rtype: float
+    """
+    database_manager = DatabaseManager(db_path)
+    start_time = time.perf_counter()
+    database_manager.delete_deck_from_db(database_manager.decks[0].deck_id)
+    elapsed = time.perf_counter() - start_time
+    database_manager.close()
+    return elapsed
+
+
+def study_session(db_path, answer_count, seed=1) -> float:
+    """
+    Answer answer_count flashcards of the first deck with random grades, due flashcards first, like the Program does
+    in study sessions. Timing ends when all answers have been written to the database.
+    :param str db_path: Path of the copy of the collection
+    :param int answer_count: Amount of answers
+    :param int seed: Seed of the random grades
+    :return: Elapsed seconds
+    :rtype: float
+    """
+    generator = random.Random(seed)
+    database_manager = DatabaseManager(db_path)
+    deck = database_manager.decks[0]
+    database_manager.deck = deck
+    start_time = time.perf_counter()
+    deck.set_due_flashcards(database_manager)
+    flashcards = deck.due_flashcards if len(deck.due_flashcards) > 0 else deck.flashcards
+    for answer in range(answer_count):
+        deck.process_answer(flashcards[answer % len(flashcards)], generator.randint(0, 4), database_manager)
+    database_manager.flush_pending_writes()
+    elapsed = time.perf_counter() - start_time
+    database_manager.close()
+    return elapsed
+
+
+def current_commit() -> str:
+    """
+    :return: Hash of the checked out git commit, with "-dirty" added if there are uncommitted changes. Empty if git
+    is not available.
+    :rtype: str
+    """
+    program_directory = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], cwd=program_directory, stdout=subprocess.PIPE,
+                                stderr=subprocess.DEVNULL, universal_newlines=True, check=True).stdout.strip()
+        status = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=program_directory,
+                                stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, universal_newlines=True,
+                                check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+    return commit + "-dirty" if status != "" else commit
+
+
+def run_suite(decks, cards, reviews, answers, repeat, seed=1) -> dict:
+    """
+    Generate a collection and run every benchmark repeat times on a fresh copy of it.
+    :param int decks: Amount of decks
+    :param int cards: Amount of flashcards per deck
+    :param int reviews: Amount of simulated reviews per studied flashcard
+    :param int answers: Amount of answers in the study session
+    :param int repeat: Amount of runs of every benchmark
+    :param int seed: Seed of the random numbers
+    :return: Results and the context they have been measured in, ready to be written as JSON
+    :rtype: dict
+    """
+    benchmarks = [("open", open_database),
+                  ("load_all_decks", load_all_decks),
+                  ("load_due_flashcards", load_due_flashcards),
+                  ("import_csv_file", import_csv_file),
+                  ("export_csv_file", export_csv_file),
+                  ("delete_deck", delete_deck),
+                  ("study_session", lambda db_path: study_session(db_path, answers, seed))]
+    results = dict()
+    with tempfile.TemporaryDirectory() as directory:
+        template_path = os.path.join(directory, "template.db")
+        generate_collection(template_path, decks, cards, reviews, seed)
+        db_path = os.path.join(directory, "Flashcards.db")
+        for name, benchmark in benchmarks:
+            times = []
+            for run in range(repeat):
+                for path in (db_path, db_path + "-wal", db_path + "-shm", db_path + ".csv"):
+                    if os.path.exists(path):
+                        os.remove(path)
+                shutil.copyfile(template_path, db_path)
+                times.append(benchmark(db_path))
+            results[name] = {"median_seconds": statistics.median(times),
+                             "minimum_seconds": min(times),
+                             "runs": times}
+    return {"commit": current_commit(),
+            "date": datetime.datetime.now().isoformat(timespec="seconds"),
+            "machine": {"node": platform.node(),
+                        "platform": platform.platform(),
+                        "processor": platform.processor(),
+                        "python": platform.python_version(),
+                        "sqlite": sqlite3.sqlite_version},
+            "parameters": {"decks": decks, "cards_per_deck": cards, "reviews_per_card": reviews,
+                           "answers": answers, "repeat": repeat, "seed": seed},
+            "results": results}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Time the data layer on a synthetic collection.")
+    parser.add_argument("--decks", type=int, default=10, help="amount of decks")
+    parser.add_argument("--cards", type=int, default=1000, help="amount of flashcards per deck")
+    parser.add_argument("--reviews", type=int, default=5, help="amount of simulated reviews per studied flashcard")
+    parser.add_argument("--answers", type=int, default=500, help="amount of answers in the study session")
+    parser.add_argument("--repeat", type=int, default=5, help="amount of runs of every benchmark")
+    parser.add_argument("--seed", type=int, default=1, help="seed of the random numbers")
+    parser.add_argument("--output", default=None, help="write the results to this JSON file")
+    arguments = parser.parse_args()
+
+    report = run_suite(arguments.decks, arguments.cards, arguments.reviews, arguments.answers, arguments.repeat,
+                       arguments.seed)
+
+    for name, result in report["results"].items():
+        print("{:20} median {:9.2f} ms   min {:9.2f} ms".format(name, result["median_seconds"] * 1000,
+                                                               result["minimum_seconds"] * 1000))
+    if arguments.output is not None:
+        with open(arguments.output, "w", encoding="utf-8") as output_file:
+            json.dump(report, output_file, indent=2)
+        print("Results written to {}".format(arguments.output))
+
+
+if __name__ == "__main__":
+    main()
@@ -21,7 +21,501 @@
 #   You should have received a copy of the GNU General Public License
 #   along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
-from main import main
+
+"""
+Command-line interface of Flashcards for batch operations without a display.
+
+Usage:
+    python cli.py                                   Start the Program with its window
+    python cli.py decks                             List decks with due and total flashcard counts
+    python cli.py import FILE [FILE ...]            Import csv files as new decks
+    python cli.py export DECK FILE                  Export a deck to a csv file
+    python cli.py stats                             Show statistics of the database
+    python cli.py reviews [--days N]                Show the amount of reviews per day
+    python cli.py reschedule (DECK | --all) (--shift DAYS | --reset)
+    python cli.py vacuum                            Compact the database file
+    python cli.py report FILE                       Show an instrumentation report written as JSON
+
+DECK is a deck_id or a deck title. Use --database PATH before the command to work on another database file.
+Use --instrument before the command to print the latency of DatabaseManager methods and SQL statements after it.
+Use --max-deck-size N before the command to allow up to N flashcards per deck (FLASHCARDS_MAXIMUM_DECK_SIZE).
+tkinter is never imported unless the Program window is started, and the data layer is imported only after the
+arguments have been parsed, so the commands start quickly.
+"""
+
+import argparse
+import json
+import os
+import sys
+
+
+def print_error(message) -> None:
+    """
+    Print an error message to the standard error stream.
+    :param str message: Error message
+    """
+    print("Error: {}".format(message), file=sys.stderr)
+
+
+def find_deck(database_manager, deck_argument):
+    """
+    Find a deck by its deck_id or by its title.
+    :param DatabaseManager database_manager: DatabaseManager with its decks loaded
+    :param str deck_argument: deck_id or title given on the command line
+    :return: Matching deck, or None if there is not any
+    :rtype: Optional[Deck]
+    """
+    for deck in database_manager.decks:
+        if str(deck.deck_id) == deck_argument:
+            return deck
+    for deck in database_manager.decks:
+        if deck.title == deck_argument:
+            return deck
+    return None
+
+
+def list_decks(database_manager, arguments) -> int:
+    """
+    Print deck_id, due flashcard count, flashcard count and title of every deck, separated by tabs.
+    :return: Exit status
+    :rtype: int
+    """
+    if arguments.json:
+        decks = [{"deck_id": deck.deck_id,
+                  "title": deck.title,
+                  "due_count": deck.get_due_flashcard_count(),
+                  "total_count": deck.get_flashcard_count()} for deck in database_manager.decks]
+        print(json.dumps(decks, indent=2))
+        return 0
+    print("deck_id\tdue\ttotal\ttitle")
+    for deck in database_manager.decks:
+        print("{}\t{}\t{}\t{}".format(deck.deck_id, deck.get_due_flashcard_count(), deck.get_flashcard_count(),
+                                      deck.title))
+    return 0
+
+
+def import_files(database_manager, arguments) -> int:
+    """
+    Import every given csv file as a new deck.
+    :return: Exit status. 1 if any file could not be imported.
+    :rtype: int
+    """
+    # Imported only by the commands that need it.
+    from ImportExportManager import ImportExportManager
+
+    import_export_manager = ImportExportManager(database_manager)
+    exit_status = 0
+    for filepath in arguments.files:
+        result = import_export_manager.import_csv_file(filepath)
+        for title, message in result.warnings:
+            print_error(message)
+        for line_number, row in result.rejected_rows:
+            print_error("{}, line {}: not a flashcard: {}".format(filepath, line_number, row))
+        if result:
+            print("{} deck_id: {}".format(result.summary(), result.deck.deck_id))
+        else:
+            print_error(result.summary() if result.error is None else "{} {}".format(result.summary(), result.error))
+            exit_status = 1
+    return exit_status
+
+
+def import_directory(database_manager, arguments) -> int:
+    """
+    Import every csv file in a directory as a new deck, and print a report of every file, separated by tabs.
+    :return: Exit status. 1 if any file could not be imported.
+    :rtype: int
+    """
+    from ImportExportManager import ImportExportManager
+
+    import_export_manager = ImportExportManager(database_manager)
+    results = import_export_manager.import_csv_directory(arguments.directory, max_workers=arguments.workers)
+    print("imported\tduplicates\trejected\tdeck_id\tfile")
+    exit_status = 0
+    for result in results:
+        deck_id = result.deck.deck_id if result else "-"
+        print("{}\t{}\t{}\t{}\t{}".format(result.imported_count, result.duplicate_count, result.rejected_count,
+                                          deck_id, result.filepath))
+        if not result:
+            for title, message in result.warnings:
+                print_error("{}: {}".format(result.filepath, message))
+            if result.error is not None:
+                print_error("{}: {}".format(result.filepath, result.error))
+            exit_status = 1
+    print("Imported {} of {} files, {} flashcards".format(sum(1 for result in results if result), len(results),
+                                                          sum(result.imported_count for result in results)))
+    return exit_status
+
+
+def export_deck(database_manager, arguments) -> int:
+    """
+    Export a deck to a csv file.
+    :return: Exit status
+    :rtype: int
+    """
+    from ImportExportManager import ImportExportManager
+
+    deck = find_deck(database_manager, arguments.deck)
+    if deck is None:
+        print_error("There is not any deck named {}.".format(arguments.deck))
+        return 1
+    import_export_manager = ImportExportManager(database_manager)
+    result = import_export_manager.export_csv_file(arguments.file, deck, include_schedule=arguments.schedule)
+    if not result:
+        print_error(result.summary() if result.error is None else "{} {}".format(result.summary(), result.error))
+        return 1
+    print(result.summary())
+    return 0
+
+
+def search(database_manager, arguments) -> int:
+    """
+    Print deck_id, flashcard_id, question and answer of the flashcards that match the query, best match first,
+    separated by tabs.
+    :return: Exit status
+    :rtype: int
+    """
+    deck_id = None
+    if arguments.deck is not None:
+        deck = find_deck(database_manager, arguments.deck)
+        if deck is None:
+            print_error("There is not any deck named {}.".format(arguments.deck))
+            return 1
+        deck_id = deck.deck_id
+    flashcards = database_manager.search(arguments.query, deck_id, limit=arguments.limit)
+    if arguments.json:
+        results = [{"deck_id": flashcard.deck_id,
+                    "flashcard_id": flashcard.flashcard_id,
+                    "question": flashcard.question,
+                    "answer": flashcard.answer} for flashcard in flashcards]
+        print(json.dumps(results, indent=2))
+        return 0
+    print("deck_id\tflashcard_id\tquestion\tanswer")
+    for flashcard in flashcards:
+        print("{}\t{}\t{}\t{}".format(flashcard.deck_id, flashcard.flashcard_id, flashcard.question,
+                                      flashcard.answer))
+    return 0
+
+
+def show_statistics(database_manager, arguments) -> int:
+    """
+    Print statistics of the database.
+    :return: Exit status
+    :rtype: int
+    """
+    statistics = database_manager.collection_statistics()
+    if arguments.json:
+        print(json.dumps(statistics._asdict(), indent=2))
+        return 0
+    print("Decks                      : {}".format(statistics.deck_count))
+    print("Flashcards                 : {}".format(statistics.flashcard_count))
+    print("Due today                  : {}".format(statistics.due_count))
+    print("Due within a week          : {}".format(statistics.due_within_a_week_count))
+    print("Studied at least once      : {}".format(statistics.studied_count))
+    print("Database size (bytes)      : {}".format(statistics.database_size))
+    return 0
+
+
+def show_reviews(database_manager, arguments) -> int:
+    """
+    Print the amount of reviews, failed reviews, average grade and average response time of every day with reviews.
+    With --roll-up, roll up old reviews into daily totals first.
+    :return: Exit status
+    :rtype: int
+    """
+    from Flashcard import Flashcard
+
+    if arguments.roll_up:
+        if arguments.keep_days < 0:
+            print_error("--keep-days must not be negative")
+            return 2
+        rolled_up_count = database_manager.roll_up_review_log(arguments.keep_days)
+        print("Rolled up {} reviews into daily totals".format(rolled_up_count), file=sys.stderr)
+    first_day = None
+    if arguments.days is not None:
+        first_day = Flashcard.today_day_number() - max(1, arguments.days) + 1
+    review_days = database_manager.daily_review_statistics(first_day)
+    if arguments.json:
+        print(json.dumps([dict(review_day._asdict(), date=Flashcard.date_string_from_day_number(review_day.day))
+                          for review_day in review_days], indent=2))
+        return 0
+    print("Date\tReviews\tFailed\tAverage grade\tAverage response (s)")
+    for review_day in review_days:
+        print("{}\t{}\t{}\t{}\t{}".format(
+            Flashcard.date_string_from_day_number(review_day.day), review_day.review_count, review_day.failed_count,
+            "{:.2f}".format(review_day.average_grade) if review_day.average_grade is not None else "",
+            "{:.1f}".format(review_day.average_response_milliseconds / 1000)
+            if review_day.average_response_milliseconds is not None else ""))
+    return 0
+
+
+def reschedule(database_manager, arguments) -> int:
+    """
+    Shift the due dates of the flashcards of a deck, or of all decks, or reset their schedules.
+    :return: Exit status
+    :rtype: int
+    """
+    deck_id = None
+    deck_description = "all decks"
+    if not arguments.all:
+        deck = find_deck(database_manager, arguments.deck)
+        if deck is None:
+            print_error("There is not any deck named {}.".format(arguments.deck))
+            return 1
+        deck_id = deck.deck_id
+        deck_description = "deck {} ({})".format(deck.deck_id, deck.title)
+    if arguments.reset:
+        count = database_manager.reset_flashcard_schedules(deck_id)
+        print("Reset the schedules of {} flashcards of {}".format(count, deck_description))
+    else:
+        count = database_manager.shift_due_days(arguments.shift, deck_id)
+        print("Shifted the due dates of {} flashcards of {} by {} days".format(count, deck_description,
+                                                                              arguments.shift))
+    return 0
+
+
+def vacuum(database_manager, arguments) -> int:
+    """
+    Compact the database file.
+    :return: Exit status
+    :rtype: int
+    """
+    size_before = database_manager.collection_statistics().database_size
+    database_manager.vacuum()
+    size_after = database_manager.collection_statistics().database_size
+    print("Database size: {} bytes before, {} bytes after".format(size_before, size_after))
+    return 0
+
+
+def backup(database_manager, arguments) -> int:
+    """
+    Back up the database to a compressed file, and delete the oldest backups.
+    :return: Exit status
+    :rtype: int
+    """
+    from BackupManager import BackupManager
+
+    backup_manager = BackupManager(database_manager, arguments.directory, arguments.keep)
+    database_manager.flush_pending_writes()
+    result = backup_manager.create_backup()
+    if not result:
+        print_error(result.summary())
+        return 1
+    print(result.summary())
+    return 0
+
+
+def list_backups(database_manager, arguments) -> int:
+    """
+    Print the path and size of every backup, newest first.
+    :return: Exit status
+    :rtype: int
+    """
+    from BackupManager import BackupManager
+
+    backup_manager = BackupManager(database_manager, arguments.directory)
+    for path in backup_manager.backup_paths():
+        print("{}\t{}".format(path, os.path.getsize(path)))
+    return 0
+
+
+def restore(database_manager, arguments) -> int:
+    """
+    Verify a backup, and replace the database with it unless --check is given.
+    :return: Exit status
+    :rtype: int
+    """
+    from BackupManager import BackupManager
+
+    backup_manager = BackupManager(database_manager, arguments.directory)
+    result = backup_manager.restore_backup(arguments.file, check_only=arguments.check)
+    if not result:
+        print_error(result.summary())
+        return 1
+    print(result.summary())
+    return 0
+
+
+def show_report(arguments) -> int:
+    """
+    Print an instrumentation report that has been written as JSON, e.g. by the Program with
+    FLASHCARDS_INSTRUMENTATION=1, or by --instrument-output.
+    :return: Exit status
+    :rtype: int
+    """
+    from Instrumentation import Instrumentation
+
+    try:
+        with open(arguments.file, encoding="utf-8") as report_file:
+            report = json.load(report_file)
+    except (OSError, ValueError) as error:
+        print_error("Report {} could not be read: {}".format(arguments.file, error))
+        return 1
+    print(Instrumentation.format_report(report))
+    return 0
+
+
+def create_argument_parser() -> argparse.ArgumentParser:
+    """
+    :return: Parser of the command-line arguments
+    :rtype: argparse.ArgumentParser
+    """
+    parser = argparse.ArgumentParser(prog="cli.py",
+                                     description="Flashcards command-line interface. Starts the Program window if "
+                                                 "no command is given.")
+    parser.add_argument("--database", metavar="PATH", default=None,
+                        help="Database file. Flashcards.db in the working directory by default.")
+    parser.add_argument("--instrument", action="store_true",
+                        help="Time DatabaseManager methods and SQL statements, and print a report to the standard "
+                             "error stream after the command")
+    parser.add_argument("--slow-sql-ms", metavar="MS", type=float, default=None,
+                        help="Log SQL statements slower than MS milliseconds with their query plan. Implies "
+                             "--instrument.")
+    parser.add_argument("--instrument-output", metavar="FILE", default=None,
+                        help="Write the instrumentation report to FILE as JSON. Implies --instrument.")
+    parser.add_argument("--max-deck-size", metavar="N", type=int, default=None,
+                        help="Maximum amount of flashcards per deck, for importing and adding flashcards. "
+                             "FLASHCARDS_MAXIMUM_DECK_SIZE, or 10000 by default.")
+    subparsers = parser.add_subparsers(dest="command", metavar="COMMAND")
+
+    decks_parser = subparsers.add_parser("decks", help="List decks with due and total flashcard counts")
+    decks_parser.add_argument("--json", action="store_true", help="Print as JSON")
+    decks_parser.set_defaults(function=list_decks)
+
+    import_parser = subparsers.add_parser("import", help="Import csv files as new decks")
+    import_parser.add_argument("files", metavar="FILE", nargs="+")
+    import_parser.set_defaults(function=import_files)
+
+    import_directory_parser = subparsers.add_parser("import-dir", help="Import every csv file in a directory as a "
+                                                                       "new deck, parsing files in parallel")
+    import_directory_parser.add_argument("directory", metavar="DIR")
+    import_directory_parser.add_argument("--workers", metavar="N", type=int, default=None,
+                                         help="Amount of parser processes. The amount of CPUs by default.")
+    import_directory_parser.set_defaults(function=import_directory)
+
+    export_parser = subparsers.add_parser("export", help="Export a deck to a csv file")
+    export_parser.add_argument("deck", metavar="DECK", help="deck_id or title")
+    export_parser.add_argument("file", metavar="FILE")
+    export_parser.add_argument("--schedule", action="store_true",
+                               help="Also export the study progress of every flashcard, so that importing the file "
+                                    "restores it")
+    export_parser.set_defaults(function=export_deck)
+
+    search_parser = subparsers.add_parser("search", help="Search the questions and answers of flashcards")
+    search_parser.add_argument("query", metavar="QUERY",
+                               help="Words to search for. The last word also matches words that start with it.")
+    search_parser.add_argument("--deck", metavar="DECK", default=None, help="Search only this deck (deck_id or title)")
+    search_parser.add_argument("--limit", metavar="N", type=int, default=50, help="Print at most N results")
+    search_parser.add_argument("--json", action="store_true", help="Print as JSON")
+    search_parser.set_defaults(function=search)
+
+    stats_parser = subparsers.add_parser("stats", help="Show statistics of the database")
+    stats_parser.add_argument("--json", action="store_true", help="Print as JSON")
+    stats_parser.set_defaults(function=show_statistics)
+
+    reviews_parser = subparsers.add_parser("reviews", help="Show the amount of reviews per day")
+    reviews_parser.add_argument("--days", metavar="N", type=int, default=None,
+                                help="Show only the last N days, today included")
+    reviews_parser.add_argument("--roll-up", action="store_true",
+                                help="Roll up reviews older than --keep-days into daily totals first")
+    reviews_parser.add_argument("--keep-days", metavar="N", type=int, default=365,
+                                help="Days of reviews that --roll-up keeps one by one (default: 365)")
+    reviews_parser.add_argument("--json", action="store_true", help="Print as JSON")
+    reviews_parser.set_defaults(function=show_reviews)
+
+    reschedule_parser = subparsers.add_parser("reschedule", help="Shift due dates, or reset schedules")
+    deck_group = reschedule_parser.add_mutually_exclusive_group(required=True)
+    deck_group.add_argument("deck", metavar="DECK", nargs="?", help="deck_id or title")
+    deck_group.add_argument("--all", action="store_true", help="Reschedule the flashcards of all decks")
+    action_group = reschedule_parser.add_mutually_exclusive_group(required=True)
+    action_group.add_argument("--shift", metavar="DAYS", type=int,
+                              help="Add DAYS to the due dates. Negative values make flashcards due earlier.")
+    action_group.add_argument("--reset", action="store_true",
+                              help="Forget the study history; flashcards become due today")
+    reschedule_parser.set_defaults(function=reschedule)
+
+    vacuum_parser = subparsers.add_parser("vacuum", help="Compact the database file")
+    vacuum_parser.set_defaults(function=vacuum)
+
+    backup_parser = subparsers.add_parser("backup", help="Back up the database to a compressed file")
+    backup_parser.add_argument("--directory", metavar="DIR", default=None,
+                               help="Directory of the backups. The backups directory next to the database by "
+                                    "default.")
+    backup_parser.add_argument("--keep", metavar="N", type=int, default=10,
+                               help="Delete the oldest backups so that N of them remain")
+    backup_parser.set_defaults(function=backup)
+
+    backups_parser = subparsers.add_parser("backups", help="List backups, newest first")
+    backups_parser.add_argument("--directory", metavar="DIR", default=None, help="Directory of the backups")
+    backups_parser.set_defaults(function=list_backups)
+
+    restore_parser = subparsers.add_parser("restore", help="Replace the database with a backup, after verifying it")
+    restore_parser.add_argument("file", metavar="FILE")
+    restore_parser.add_argument("--check", action="store_true", help="Only verify the backup")
+    restore_parser.add_argument("--directory", metavar="DIR", default=None,
+                                help="Directory where the current database is backed up before it is replaced")
+    restore_parser.set_defaults(function=restore)
+
+    report_parser = subparsers.add_parser("report", help="Show an instrumentation report written as JSON")
+    report_parser.add_argument("file", metavar="FILE")
+    report_parser.set_defaults(function=None)
+
+    return parser
+
+
+def run(argv=None) -> int:
+    """
+    Run the command given on the command line.
+    :param Optional[[str]] argv: Command-line arguments without the program name. sys.argv is used if it is None.
+    :return: Exit status
+    :rtype: int
+    """
+    parser = create_argument_parser()
+    arguments = parser.parse_args(argv)
+
+    if arguments.max_deck_size is not None:
+        from Deck import Deck
+
+        try:
+            Deck.set_maximum_amount_of_flashcards(arguments.max_deck_size)
+        except ValueError as error:
+            parser.error(str(error))
+
+    if arguments.command is None:
+        # No command: start the Program with its window, as before.
+        from main import main
+        main()
+        return 0
+
+    if arguments.command == "report":
+        # It does not open the database.
+        return show_report(arguments)
+
+    from DatabaseManager import DatabaseManager
+
+    instrumentation = None
+    if arguments.instrument or arguments.slow_sql_ms is not None or arguments.instrument_output is not None:
+        from Instrumentation import Instrumentation
+
+        threshold = Instrumentation.DEFAULT_SLOW_STATEMENT_THRESHOLD
+        if arguments.slow_sql_ms is not None:
+            threshold = arguments.slow_sql_ms / 1000
+        instrumentation = Instrumentation(threshold, arguments.instrument_output)
+
+    database_manager = DatabaseManager(db_path=arguments.database, instrumentation=instrumentation)
+    try:
+        return arguments.function(database_manager, arguments)
+    finally:
+        # Commit pending changes and close the pooled database connections. The instrumentation report is written
+        # to its output file, if there is one.
+        database_manager.close()
+        if instrumentation is not None:
+            print(Instrumentation.format_report(instrumentation.report()), file=sys.stderr)
+
 
 if __name__ == '__main__':
-    main()
+    # Needed by the parser processes of import-dir in a frozen executable. multiprocessing is slow to import, so it is
+    # imported only there.
+    if getattr(sys, "frozen", False):
+        import multiprocessing
+        multiprocessing.freeze_support()
+    sys.exit(run())
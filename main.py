@@ -21,12 +21,18 @@
 #   You should have received a copy of the GNU General Public License
 #   along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
+import multiprocessing
+
 from Program import Program
 
 def main():
     program = Program()
     program.mainloop()
+    # Commit pending changes, roll up old reviews, and close the pooled database connections.
+    program.database_manager.close(roll_up=True)
 
 # Call the main function
 if __name__ == "__main__":
+    # Needed by the parser processes of directory imports in a frozen executable
+    multiprocessing.freeze_support()
     main()
\ No newline at end of file
@@ -0,0 +1,62 @@
+#   Program FlashCards
+#
+#   Copyright 2020 Ertugrul Harman
+#
+#       E-mail  : harmancode@gmail.com
+#       Twitter : https://twitter.com/harmancode
+#       Web     : https://harman.page
+#
+#   This file is part of Flashcards.
+#
+#   Flashcards is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+
+"""
+Fixtures shared by the tests. Every test gets its own database file in a temporary directory.
+"""
+
+import pytest
+
+from DatabaseManager import DatabaseManager
+from Deck import Deck
+
+
+@pytest.fixture
+def database_path(tmp_path) -> str:
+    """
+    :return: Path of a database file that does not exist yet
+    :rtype: str
+    """
+    return str(tmp_path / "Flashcards.db")
+
+
+@pytest.fixture
+def database_manager(database_path):
+    """
+    :return: DatabaseManager of a new database. It is closed after the test.
+    :rtype: DatabaseManager
+    """
+    database_manager = DatabaseManager(db_path=database_path)
+    yield database_manager
+    database_manager.close()
+
+
+@pytest.fixture
+def deck_size_limit():
+    """
+    Restore the deck size limit after a test that changes it.
+    """
+    yield
+    Deck.set_maximum_amount_of_flashcards(Deck.DEFAULT_MAXIMUM_AMOUNT_OF_FLASHCARDS)
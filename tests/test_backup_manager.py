@@ -0,0 +1,212 @@
+#   Program FlashCards
+#
+#   Copyright 2020 Ertugrul Harman
+#
+#       E-mail  : harmancode@gmail.com
+#       Twitter : https://twitter.com/harmancode
+#       Web     : https://harman.page
+#
+#   This file is part of Flashcards.
+#
+#   Flashcards is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+
+"""
+Tests of BackupManager: backups, restores, and rotation of the backup files.
+"""
+
+import gzip
+import os
+import sqlite3
+
+import pytest
+
+from BackupManager import BackupManager
+
+
+def deck_titles(database_manager) -> [str]:
+    return sorted(deck.title for deck in database_manager.decks)
+
+
+def touch(path) -> None:
+    with open(path, "wb"):
+        pass
+
+
+def test_backup_and_restore(database_manager):
+    database_manager.add_new_deck_to_db("Before")
+    backup_manager = BackupManager(database_manager)
+    backup = backup_manager.create_backup()
+    assert backup
+    assert backup_manager.backup_paths() == [backup.filepath]
+
+    database_manager.add_new_deck_to_db("After")
+    result = backup_manager.restore_backup(backup.filepath)
+    assert result
+    assert deck_titles(database_manager) == ["Before"]
+
+    # The database as it was before the restore has been backed up, so the restore can be undone.
+    assert result.previous_database_backup is not None
+    assert backup_manager.restore_backup(result.previous_database_backup)
+    assert deck_titles(database_manager) == ["After", "Before"]
+    database_manager.load_all_decks()
+    assert deck_titles(database_manager) == ["After", "Before"]
+
+
+def test_restore_is_not_cancelled_after_its_last_step(database_manager):
+    database_manager.add_new_deck_to_db("Before")
+    backup_manager = BackupManager(database_manager)
+    backup = backup_manager.create_backup()
+    database_manager.add_new_deck_to_db("After")
+    reports = []
+
+    def cancel_restoring(phase, done, total) -> bool:
+        if phase == BackupManager.RESTORING:
+            reports.append((done, total))
+            return False
+        return True
+
+    # The database is small enough to be copied in one step, which commits the copy before it is reported.
+    result = backup_manager.restore_backup(backup.filepath, progress_callback=cancel_restoring)
+    assert result
+    assert len(reports) == 1 and reports[0][0] == reports[0][1]
+    assert deck_titles(database_manager) == ["Before"]
+
+
+def test_restore_keeps_the_restored_backup(database_manager):
+    backup_manager = BackupManager(database_manager, keep_count=2)
+    database_manager.add_new_deck_to_db("Oldest")
+    oldest = backup_manager.create_backup().filepath
+    database_manager.add_new_deck_to_db("Newest")
+    newest = backup_manager.create_backup().filepath
+
+    result = backup_manager.restore_backup(oldest)
+    assert result
+    assert deck_titles(database_manager) == ["Oldest"]
+    assert backup_manager.backup_paths() == [result.previous_database_backup, newest, oldest]
+
+    # The next backup rotates them.
+    backup = backup_manager.create_backup()
+    assert backup.removed_paths == [newest, oldest]
+    assert backup_manager.backup_paths() == [backup.filepath, result.previous_database_backup]
+
+
+def test_backups_are_listed_in_creation_order(tmp_path, database_manager):
+    directory = tmp_path / "backups"
+    directory.mkdir()
+    names = ["Flashcards-2024-01-31_18-30-01.db.gz",
+             "Flashcards-2024-01-31_18-30-00-10.db.gz",
+             "Flashcards-2024-01-31_18-30-00-2.db.gz",
+             "Flashcards-2024-01-31_18-30-00-1.db.gz",
+             "Flashcards-2024-01-31_18-30-00.db.gz",
+             "Flashcards-2023-12-31_23-59-59.db.gz"]
+    other_names = ["Flashcards-old-2024-01-31_18-30-00.db.gz",
+                   "Flashcards-old.db.gz",
+                   "Flashcards-2024-01-31_18-30-00-x.db.gz",
+                   "Flashcards-2024-01-31_18-30-00.db.gz.part",
+                   "Other-2024-01-31_18-30-00.db.gz"]
+    for name in names + other_names:
+        touch(directory / name)
+
+    backup_manager = BackupManager(database_manager, directory=str(directory), keep_count=3)
+    assert backup_manager.backup_paths() == [str(directory / name) for name in names]
+    assert backup_manager.rotate() == [str(directory / name) for name in names[3:]]
+    assert sorted(os.listdir(directory)) == sorted(names[:3] + other_names)
+
+
+def test_new_backup_of_the_same_second_is_newest(database_manager):
+    backup_manager = BackupManager(database_manager)
+    paths = [backup_manager.create_backup().filepath for _ in range(3)]
+    assert backup_manager.backup_paths() == paths[::-1]
+
+
+def test_cancelled_restore_keeps_the_database(database_manager, monkeypatch):
+    monkeypatch.setattr(BackupManager, "PAGES_PER_STEP", 1)
+    database_manager.add_new_deck_to_db("Before")
+    backup_manager = BackupManager(database_manager)
+    backup = backup_manager.create_backup()
+    database_manager.add_new_deck_to_db("After")
+
+    def cancel_restoring(phase, done, total) -> bool:
+        return phase != BackupManager.RESTORING
+
+    result = backup_manager.restore_backup(backup.filepath, progress_callback=cancel_restoring)
+    assert not result
+    assert result.cancelled
+    assert not os.path.exists(database_manager.db_path + ".restoring")
+    database_manager.load_all_decks()
+    assert deck_titles(database_manager) == ["After", "Before"]
+
+
+def write_backup_of_database(path, sql) -> str:
+    """
+    Write a backup file of a database that is created by sql.
+    :return: Path of the backup file
+    :rtype: str
+    """
+    database_path = str(path) + ".db"
+    connection = sqlite3.connect(database_path)
+    connection.executescript(sql)
+    connection.close()
+    with open(database_path, "rb") as database_file, gzip.open(str(path), "wb") as backup_file:
+        backup_file.write(database_file.read())
+    return str(path)
+
+
+@pytest.mark.parametrize("sql, error", [
+    ("CREATE TABLE other(x);", "not a Flashcards database"),
+    ("CREATE TABLE deck(x); CREATE TABLE flashcard(x); PRAGMA user_version = 1000;", "newer version"),
+])
+def test_foreign_backup_is_rejected(tmp_path, database_manager, sql, error):
+    backup_path = write_backup_of_database(tmp_path / "foreign.db.gz", sql)
+    backup_manager = BackupManager(database_manager)
+    for check_only in (True, False):
+        result = backup_manager.restore_backup(backup_path, check_only=check_only)
+        assert not result
+        assert error in result.error
+    assert backup_manager.backup_paths() == []
+
+
+@pytest.mark.parametrize("damage", ["truncate", "corrupt", "not gzip"])
+def test_damaged_backup_is_rejected(tmp_path, database_manager, damage):
+    database_manager.add_new_deck_to_db("Kept")
+    for index in range(200):
+        database_manager.add_new_deck_to_db("Deck {}".format(index))
+    backup_manager = BackupManager(database_manager, directory=str(tmp_path / "backups"))
+    backup_path = backup_manager.create_backup().filepath
+    with gzip.open(backup_path, "rb") as backup_file:
+        data = backup_file.read()
+    if damage == "truncate":
+        with open(backup_path, "rb") as backup_file:
+            compressed = backup_file.read()
+        with open(backup_path, "wb") as backup_file:
+            backup_file.write(compressed[:len(compressed) // 2])
+    elif damage == "corrupt":
+        # Overwrite the second page of the database
+        page_size = int.from_bytes(data[16:18], "big")
+        data = data[:page_size] + b"\xff" * page_size + data[2 * page_size:]
+        with gzip.open(backup_path, "wb") as backup_file:
+            backup_file.write(data)
+    else:
+        with open(backup_path, "wb") as backup_file:
+            backup_file.write(data)
+
+    result = backup_manager.restore_backup(backup_path, check_only=True)
+    assert not result
+    assert result.error is not None
+    assert backup_manager.restore_backup(backup_path).error is not None
+    database_manager.load_all_decks()
+    assert "Kept" in deck_titles(database_manager)
+    assert len(backup_manager.backup_paths()) == 1
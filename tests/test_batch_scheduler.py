@@ -0,0 +1,69 @@
+#   Program FlashCards
+#
+#   Copyright 2020 Ertugrul Harman
+#
+#       E-mail  : harmancode@gmail.com
+#       Twitter : https://twitter.com/harmancode
+#       Web     : https://harman.page
+#
+#   This file is part of Flashcards.
+#
+#   Flashcards is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+
+"""
+Differential tests of BatchScheduler against the SM-2 methods of Flashcard, for both of its implementations.
+"""
+
+import datetime
+
+import pytest
+
+from BatchScheduler import BatchScheduler
+from benchmark import sm2_differential
+
+
+def scheduler(use_numpy) -> BatchScheduler:
+    """
+    :return: BatchScheduler with the given implementation. The test is skipped if NumPy is needed but not installed.
+    :rtype: BatchScheduler
+    """
+    if use_numpy:
+        pytest.importorskip("numpy")
+    return BatchScheduler(use_numpy=use_numpy)
+
+
+@pytest.mark.parametrize("use_numpy", [False, True])
+def test_schedule_matches_flashcard_methods(use_numpy):
+    assert sm2_differential.check(scheduler(use_numpy), card_count=0, rounds=5, seed=1, quick=True)
+
+
+@pytest.mark.parametrize("use_numpy", [False, True])
+def test_due_days_near_midnight_match_datetime(use_numpy):
+    # The due moments of these intervals are on a midnight or within a microsecond of it.
+    now = datetime.datetime(2024, 3, 30, 18, 0, 0, 250000)
+    to_midnight = (datetime.datetime(2024, 3, 31) - now) / datetime.timedelta(days=1)
+    intervals = [0, 1, 6, 2.5, to_midnight, to_midnight + 1e-12, to_midnight - 1e-12, to_midnight + 3.0,
+                 to_midnight + 1.2e-11, to_midnight - 1.2e-11]
+    expected = [(now + datetime.timedelta(interval)).date().toordinal() - datetime.date(1970, 1, 1).toordinal()
+                for interval in intervals]
+    assert scheduler(use_numpy).due_days(intervals, now) == expected
+
+
+@pytest.mark.parametrize("use_numpy", [False, True])
+def test_due_days_beyond_year_9999_fail_like_datetime(use_numpy):
+    now = datetime.datetime(2024, 3, 30, 18, 0, 0)
+    with pytest.raises(OverflowError):
+        scheduler(use_numpy).due_days([1.5, 4000000.5], now)
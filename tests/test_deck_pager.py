@@ -0,0 +1,133 @@
+#   Program FlashCards
+#
+#   Copyright 2020 Ertugrul Harman
+#
+#       E-mail  : harmancode@gmail.com
+#       Twitter : https://twitter.com/harmancode
+#       Web     : https://harman.page
+#
+#   This file is part of Flashcards.
+#
+#   Flashcards is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+
+"""
+Tests of DeckPager: keyset paging of a deck, random access, and decks larger than the deck size limit.
+"""
+
+import pytest
+
+from Deck import Deck
+from DeckPager import DeckPager
+
+FLASHCARD_COUNT = 25
+PAGE_SIZE = 4
+
+
+@pytest.fixture
+def deck_ids(database_manager) -> (int, [int]):
+    """
+    Add two decks whose flashcards are interleaved, so that the flashcard_ids of a deck are not consecutive.
+    :return: deck_id of the first deck and the flashcard_ids of its flashcards
+    :rtype: (int, [int])
+    """
+    deck_id = database_manager.add_new_deck_to_db("Paged")
+    other_deck_id = database_manager.add_new_deck_to_db("Other")
+    flashcard_ids = []
+    for index in range(FLASHCARD_COUNT):
+        flashcard_ids.extend(database_manager.add_flashcards_bulk(
+            deck_id, [("question {}".format(index), "answer {}".format(index))]))
+        database_manager.add_flashcards_bulk(other_deck_id, [("other question", "other answer")])
+    return deck_id, flashcard_ids
+
+
+def page_ids(page) -> [int]:
+    return [flashcard.flashcard_id for flashcard in page]
+
+
+def test_pages_are_read_in_order(database_manager, deck_ids):
+    deck_id, flashcard_ids = deck_ids
+    pager = DeckPager(database_manager, deck_id, page_size=PAGE_SIZE, maximum_amount_of_cached_pages=2)
+    assert pager.count() == FLASHCARD_COUNT
+    assert pager.page_count() == 7
+    # Scrolling down through the whole deck keeps only the most recently used pages.
+    flashcards = []
+    for page_number in range(pager.page_count()):
+        flashcards.extend(pager.get_page(page_number))
+        assert len(pager.pages) <= 2
+        assert len(pager.flashcards_by_id) <= 2 * PAGE_SIZE
+    assert page_ids(flashcards) == flashcard_ids
+    assert pager.get_page(pager.page_count()) == []
+
+
+@pytest.mark.parametrize("page_number", [0, 3, 6])
+def test_jumping_and_scrolling_up(database_manager, deck_ids, page_number):
+    deck_id, flashcard_ids = deck_ids
+    pager = DeckPager(database_manager, deck_id, page_size=PAGE_SIZE)
+    for number in range(page_number, -1, -1):
+        assert page_ids(pager.get_page(number)) == flashcard_ids[number * PAGE_SIZE:(number + 1) * PAGE_SIZE]
+
+
+def test_get_range_across_pages(database_manager, deck_ids):
+    deck_id, flashcard_ids = deck_ids
+    pager = DeckPager(database_manager, deck_id, page_size=PAGE_SIZE, maximum_amount_of_cached_pages=1)
+    assert page_ids(pager.get_range(3, 10)) == flashcard_ids[3:13]
+    assert page_ids(pager.get_range(22, 10)) == flashcard_ids[22:]
+    assert pager.get_range(5, 0) == []
+
+
+def test_random_access_and_position(database_manager, deck_ids):
+    deck_id, flashcard_ids = deck_ids
+    pager = DeckPager(database_manager, deck_id, page_size=PAGE_SIZE)
+    # Not cached: read from the database alone
+    assert pager.get_cached_flashcard(flashcard_ids[17]) is None
+    assert pager.get_flashcard(flashcard_ids[17]).question == "question 17"
+    assert pager.position(flashcard_ids[17]) == 17
+    # Cached
+    pager.get_page(4)
+    assert pager.get_cached_flashcard(flashcard_ids[17]).answer == "answer 17"
+    assert pager.position(flashcard_ids[17]) == 17
+    # A flashcard of another deck is not found.
+    assert pager.get_flashcard(flashcard_ids[0] + 1) is None
+
+
+def test_invalidate_after_changing_the_deck(database_manager, deck_ids):
+    deck_id, flashcard_ids = deck_ids
+    pager = DeckPager(database_manager, deck_id, page_size=PAGE_SIZE)
+    pager.get_page(0)
+    database_manager.delete_flashcard_from_db(flashcard_ids[0])
+    new_flashcard_id = database_manager.add_new_flashcard_to_db(deck_id, "new question", "new answer", None, 0)
+    pager.invalidate()
+    assert pager.count() == FLASHCARD_COUNT
+    assert page_ids(pager.get_page(0)) == flashcard_ids[1:1 + PAGE_SIZE]
+    assert page_ids(pager.get_page(6)) == [new_flashcard_id]
+    assert pager.position(new_flashcard_id) == FLASHCARD_COUNT - 1
+
+
+def test_search_results_are_paged(database_manager, deck_ids):
+    deck_id, flashcard_ids = deck_ids
+    pager = DeckPager(database_manager, deck_id, page_size=PAGE_SIZE, search_query="question")
+    assert pager.count() == FLASHCARD_COUNT
+    assert sorted(page_ids(pager.get_range(0, FLASHCARD_COUNT))) == flashcard_ids
+    assert pager.position(flashcard_ids[0] + 1) is None
+
+
+def test_deck_larger_than_the_limit_is_not_truncated(database_manager, deck_ids, deck_size_limit):
+    deck_id, flashcard_ids = deck_ids
+    Deck.set_maximum_amount_of_flashcards(10)
+    database_manager.load_all_decks()
+    deck = next(deck for deck in database_manager.decks if deck.deck_id == deck_id)
+    assert page_ids(deck.flashcards) == flashcard_ids
+    assert len(DeckPager(database_manager, deck_id).get_range(0, FLASHCARD_COUNT)) == FLASHCARD_COUNT
@@ -0,0 +1,105 @@
+#   Program FlashCards
+#
+#   Copyright 2020 Ertugrul Harman
+#
+#       E-mail  : harmancode@gmail.com
+#       Twitter : https://twitter.com/harmancode
+#       Web     : https://harman.page
+#
+#   This file is part of Flashcards.
+#
+#   Flashcards is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+
+"""
+Tests of the streaming CSV export, and of importing exported files again.
+"""
+
+import csv
+import sqlite3
+from datetime import datetime
+
+from ImportExportManager import ImportExportManager
+
+SCHEDULED_ROWS = [
+    ("What is the capital of Japan?", "Tokyo", datetime(2024, 3, 1, 10, 30, 0), 19800, 6, 2.5, 2),
+    ("Quoted \"question\", with a comma", "Line one\nline two", datetime(2024, 2, 11, 8, 0, 0), 19790, 15.6, 2.36, 3),
+    ("What is the capital of Japan?", "Kyoto, until 1869", None, 19700, 0, 0, 0),
+    ("Ünïcödé", "答え", datetime(2023, 12, 31, 23, 59, 59), 20100, 1, 1.3, 1),
+]
+
+
+def deck_rows(database_path, deck_id) -> [tuple]:
+    """
+    :return: Question, answer and scheduling values of the flashcards of a deck, in the order of the deck
+    :rtype: [tuple]
+    """
+    connection = sqlite3.connect(database_path)
+    try:
+        return connection.execute("SELECT question, answer, last_study_date, due_day, inter_repetition_interval, "
+                                  "easiness_factor, repetition_number FROM flashcard WHERE deck_id = ? "
+                                  "ORDER BY flashcard_id", (deck_id,)).fetchall()
+    finally:
+        connection.close()
+
+
+def exported_deck(database_manager):
+    """
+    :return: Deck with the flashcards of SCHEDULED_ROWS. Its flashcards are not loaded.
+    :rtype: Deck
+    """
+    deck_id = database_manager.add_new_deck_to_db("Capitals")
+    database_manager.add_flashcards_bulk(deck_id, SCHEDULED_ROWS)
+    database_manager.load_all_decks()
+    return database_manager.decks[0]
+
+
+def test_export_with_schedule_round_trip(tmp_path, database_path, database_manager):
+    deck = exported_deck(database_manager)
+    filepath = str(tmp_path / "Capitals.csv")
+    import_export_manager = ImportExportManager(database_manager)
+
+    result = import_export_manager.export_csv_file(filepath, deck, include_schedule=True, batch_size=3)
+    assert result
+    assert result.exported_count == len(SCHEDULED_ROWS)
+    assert result.duplicate_count == 1
+    assert not deck.is_loaded()
+
+    # Every flashcard is imported with its schedule, including the one whose question appeared before.
+    import_result = import_export_manager.import_csv_file(filepath, chunk_size=3)
+    assert import_result
+    assert import_result.imported_count == len(SCHEDULED_ROWS)
+    assert import_result.deck.title == "Capitals"
+    assert deck_rows(database_path, import_result.deck.deck_id) == deck_rows(database_path, deck.deck_id)
+
+
+def test_export_without_schedule(tmp_path, database_path, database_manager):
+    deck = exported_deck(database_manager)
+    filepath = str(tmp_path / "Capitals.csv")
+    import_export_manager = ImportExportManager(database_manager)
+
+    result = import_export_manager.export_csv_file(filepath, deck, batch_size=3)
+    assert result
+    assert result.duplicate_count == 1
+    with open(filepath, newline="", encoding="utf-8") as csv_file:
+        assert list(csv.reader(csv_file)) == [["decktitle", "Capitals"]] + [[row[0], row[1]]
+                                                                            for row in SCHEDULED_ROWS]
+
+    # The file has questions and answers only, so the repeated question is imported once, as a new flashcard.
+    import_result = import_export_manager.import_csv_file(filepath)
+    assert import_result
+    imported_rows = deck_rows(database_path, import_result.deck.deck_id)
+    assert [row[:2] for row in imported_rows] == [row[:2] for row in SCHEDULED_ROWS[:2] + SCHEDULED_ROWS[3:]]
+    assert all(row[2] is None and row[4:] == (0, 0, 0) for row in imported_rows)
@@ -0,0 +1,111 @@
+#   Program FlashCards
+#
+#   Copyright 2020 Ertugrul Harman
+#
+#       E-mail  : harmancode@gmail.com
+#       Twitter : https://twitter.com/harmancode
+#       Web     : https://harman.page
+#
+#   This file is part of Flashcards.
+#
+#   Flashcards is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+
+"""
+Tests of the streaming CSV import: imported decks, and the clean-up after a cancelled or failed import.
+"""
+
+import sqlite3
+
+from Deck import Deck
+from ImportExportManager import ImportExportManager
+
+
+def write_csv(path, row_count, title="Imported") -> str:
+    """
+    Write a csv file of the Program with a deck title row and row_count flashcards.
+    :return: Path of the file
+    :rtype: str
+    """
+    with open(path, "w", encoding="utf-8", newline="") as csv_file:
+        csv_file.write("decktitle,{}\n".format(title))
+        for index in range(row_count):
+            csv_file.write("question {0},answer {0}\n".format(index))
+    return str(path)
+
+
+def table_counts(database_path) -> (int, int):
+    """
+    :return: Amount of rows of the deck and flashcard tables
+    :rtype: (int, int)
+    """
+    connection = sqlite3.connect(database_path)
+    try:
+        return (connection.execute("SELECT COUNT(*) FROM deck").fetchone()[0],
+                connection.execute("SELECT COUNT(*) FROM flashcard").fetchone()[0])
+    finally:
+        connection.close()
+
+
+def test_import_keeps_the_deck_unloaded(tmp_path, database_path, database_manager):
+    filepath = write_csv(tmp_path / "deck.csv", 250)
+    result = ImportExportManager(database_manager).import_csv_file(filepath, chunk_size=100)
+    assert result
+    assert result.imported_count == 250
+    assert result.deck in database_manager.decks
+    assert result.deck.title == "Imported"
+    assert not result.deck.is_loaded()
+    assert result.deck.get_flashcard_count() == 250
+    assert result.deck.get_due_flashcard_count() == 250
+    assert table_counts(database_path) == (1, 250)
+
+
+def test_cancelled_import_leaves_nothing_behind(tmp_path, database_path, database_manager):
+    filepath = write_csv(tmp_path / "deck.csv", 1000)
+    progress = []
+
+    def cancel_after_two_chunks(imported_count, bytes_read, total_bytes) -> bool:
+        progress.append(imported_count)
+        return len(progress) < 2
+
+    result = ImportExportManager(database_manager).import_csv_file(filepath, progress_callback=cancel_after_two_chunks,
+                                                                    chunk_size=100)
+    assert not result
+    assert result.cancelled
+    assert progress == [100, 200]
+    assert database_manager.decks == []
+    assert table_counts(database_path) == (0, 0)
+
+
+def test_too_large_file_leaves_nothing_behind(tmp_path, database_path, database_manager, deck_size_limit):
+    Deck.set_maximum_amount_of_flashcards(150)
+    filepath = write_csv(tmp_path / "deck.csv", 400)
+    result = ImportExportManager(database_manager).import_csv_file(filepath, chunk_size=100)
+    assert not result
+    assert [title for title, message in result.warnings] == ["Too many flashcards"]
+    assert database_manager.decks == []
+    assert table_counts(database_path) == (0, 0)
+
+
+def test_unreadable_file_leaves_nothing_behind(tmp_path, database_path, database_manager):
+    filepath = tmp_path / "deck.csv"
+    write_csv(filepath, 300)
+    with open(filepath, "ab") as csv_file:
+        csv_file.write(b"caf\xe9,not utf-8\n")
+    result = ImportExportManager(database_manager).import_csv_file(str(filepath), chunk_size=100)
+    assert not result
+    assert result.error is not None
+    assert database_manager.decks == []
+    assert table_counts(database_path) == (0, 0)
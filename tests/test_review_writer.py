@@ -0,0 +1,191 @@
+#   Program FlashCards
+#
+#   Copyright 2020 Ertugrul Harman
+#
+#       E-mail  : harmancode@gmail.com
+#       Twitter : https://twitter.com/harmancode
+#       Web     : https://harman.page
+#
+#   This file is part of Flashcards.
+#
+#   Flashcards is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+
+"""
+Tests of ReviewWriter: group commit, replay of the journal after a crash, and reviews that could not be written.
+"""
+
+import datetime
+import os
+import shutil
+import sqlite3
+import time
+
+import pytest
+
+from DatabaseManager import DatabaseManager
+from ReviewWriter import ReviewWriter
+
+REVIEW_TIME = datetime.datetime(2024, 3, 1, 10, 30, 0)
+
+
+def add_flashcard(database_manager) -> int:
+    """
+    :return: flashcard_id of a new flashcard in a new deck
+    :rtype: int
+    """
+    deck_id = database_manager.add_new_deck_to_db("Deck")
+    return database_manager.add_new_flashcard_to_db(deck_id, "question", "answer", None, 0)
+
+
+def queue_review(database_manager, flashcard_id, due_day, grade=4) -> None:
+    database_manager.queue_flashcard_review(flashcard_id, REVIEW_TIME, due_day, 6, 2.5, 2, grade=grade,
+                                            previous_interval=1, previous_easiness_factor=2.5, response_time=1.5)
+
+
+def query(database_path, sql) -> list:
+    """
+    :return: Rows of a query, read with a connection of its own
+    :rtype: list
+    """
+    connection = sqlite3.connect(database_path)
+    try:
+        return connection.execute(sql).fetchall()
+    finally:
+        connection.close()
+
+
+def crash(database_manager) -> None:
+    """
+    Keep the reviews writer of the database manager from writing anything from now on, as if the Program had crashed
+    before its reviews were committed. Its journal is kept.
+    """
+    database_manager.review_writer._write_batch = lambda batch: None
+    database_manager.review_writer._empty_journal_if_idle = lambda: None
+
+
+def stop_after_crash(database_manager) -> None:
+    """
+    Stop the writer thread and close the connections of a crashed database manager without emptying its journal.
+    """
+    review_writer = database_manager.review_writer
+    review_writer.queue.put(ReviewWriter._STOP)
+    review_writer._thread.join()
+    review_writer._journal_file.close()
+    database_manager.connection_manager.close_all()
+
+
+def test_reviews_are_written_and_logged(database_path, database_manager):
+    flashcard_id = add_flashcard(database_manager)
+    queue_review(database_manager, flashcard_id, due_day=100, grade=3)
+    queue_review(database_manager, flashcard_id, due_day=200, grade=4)
+    database_manager.flush_pending_writes()
+    # Both reviews are logged, and the flashcard has the values of the last one.
+    assert query(database_path, "SELECT due_day FROM flashcard") == [(200,)]
+    assert query(database_path, "SELECT flashcard_id, reviewed_at, grade, response_milliseconds FROM review_log "
+                                "ORDER BY review_id") == [(flashcard_id, str(REVIEW_TIME), 3, 1500),
+                                                          (flashcard_id, str(REVIEW_TIME), 4, 1500)]
+    assert database_manager.take_review_write_error() is None
+
+
+def test_journal_is_replayed_once(database_path, tmp_path):
+    database_manager = DatabaseManager(db_path=database_path)
+    flashcard_id = add_flashcard(database_manager)
+    crash(database_manager)
+    queue_review(database_manager, flashcard_id, due_day=100)
+    queue_review(database_manager, flashcard_id, due_day=200)
+    database_manager.flush_pending_writes()
+    journal_path = database_manager.review_writer.journal_path
+    journal_copy = str(tmp_path / "journal-copy")
+    shutil.copy(journal_path, journal_copy)
+    stop_after_crash(database_manager)
+    assert query(database_path, "SELECT COUNT(*) FROM review_log") == [(0,)]
+
+    # The next start replays the journal. Reviews with the same flashcard and time are all logged.
+    database_manager = DatabaseManager(db_path=database_path)
+    assert not os.path.exists(journal_path)
+    assert query(database_path, "SELECT due_day FROM flashcard") == [(200,)]
+    assert query(database_path, "SELECT COUNT(*) FROM review_log") == [(2,)]
+
+    # Replaying reviews that have already been committed does not log them again.
+    shutil.copy(journal_copy, journal_path)
+    assert database_manager.review_writer.replay_journal() == 2
+    assert query(database_path, "SELECT COUNT(*) FROM review_log") == [(2,)]
+
+    # New reviews get larger review_id values than the replayed ones.
+    queue_review(database_manager, flashcard_id, due_day=300)
+    database_manager.flush_pending_writes()
+    assert query(database_path, "SELECT due_day FROM flashcard") == [(300,)]
+    assert query(database_path, "SELECT COUNT(*) FROM review_log") == [(3,)]
+    database_manager.close()
+
+
+def test_incomplete_last_line_of_the_journal_is_skipped(database_path):
+    database_manager = DatabaseManager(db_path=database_path)
+    flashcard_id = add_flashcard(database_manager)
+    crash(database_manager)
+    queue_review(database_manager, flashcard_id, due_day=100)
+    database_manager.flush_pending_writes()
+    journal_path = database_manager.review_writer.journal_path
+    stop_after_crash(database_manager)
+    with open(journal_path, "a", encoding="utf-8") as journal_file:
+        journal_file.write('["2024-03-01 10:31:00", 200, 6')
+
+    database_manager = DatabaseManager(db_path=database_path)
+    assert query(database_path, "SELECT due_day FROM flashcard") == [(100,)]
+    database_manager.close()
+
+
+def test_failed_batch_is_written_again(database_path, database_manager, monkeypatch):
+    monkeypatch.setattr(ReviewWriter, "RETRY_INTERVAL", 0.05)
+    flashcard_id = add_flashcard(database_manager)
+    connection = sqlite3.connect(database_path)
+    connection.execute("CREATE TRIGGER block_reviews BEFORE UPDATE ON flashcard "
+                       "BEGIN SELECT RAISE(ABORT, 'blocked'); END")
+    connection.commit()
+
+    queue_review(database_manager, flashcard_id, due_day=100)
+    # Readers wait for the writer without failing. The failure is reported once.
+    database_manager.flush_pending_writes()
+    database_manager.load_all_decks()
+    write_error = database_manager.take_review_write_error()
+    assert write_error is not None and "blocked" in write_error
+    assert database_manager.take_review_write_error() is None
+    assert os.path.getsize(database_manager.review_writer.journal_path) > 0
+
+    connection.execute("DROP TRIGGER block_reviews")
+    connection.commit()
+    connection.close()
+    deadline = time.monotonic() + 5
+    while query(database_path, "SELECT due_day FROM flashcard") != [(100,)] and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert query(database_path, "SELECT due_day FROM flashcard") == [(100,)]
+    assert query(database_path, "SELECT COUNT(*) FROM review_log") == [(1,)]
+
+
+@pytest.mark.parametrize("close_with_failed_reviews", [False, True])
+def test_journal_is_kept_only_for_unwritten_reviews(database_path, close_with_failed_reviews):
+    database_manager = DatabaseManager(db_path=database_path)
+    flashcard_id = add_flashcard(database_manager)
+    if close_with_failed_reviews:
+        connection = sqlite3.connect(database_path)
+        connection.execute("CREATE TRIGGER block_reviews BEFORE UPDATE ON flashcard "
+                           "BEGIN SELECT RAISE(ABORT, 'blocked'); END")
+        connection.commit()
+        connection.close()
+    queue_review(database_manager, flashcard_id, due_day=100)
+    journal_path = database_manager.review_writer.journal_path
+    database_manager.close()
+    assert os.path.exists(journal_path) == close_with_failed_reviews
@@ -0,0 +1,152 @@
+#   Program FlashCards
+#
+#   Copyright 2020 Ertugrul Harman
+#
+#       E-mail  : harmancode@gmail.com
+#       Twitter : https://twitter.com/harmancode
+#       Web     : https://harman.page
+#
+#   This file is part of Flashcards.
+#
+#   Flashcards is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+
+"""
+Tests of SchemaMigrator: new databases, databases created before migrations, and failing migration steps.
+"""
+
+import sqlite3
+
+import pytest
+
+from ConnectionManager import ConnectionManager
+from DatabaseManager import DatabaseManager
+from Flashcard import Flashcard
+from SchemaMigrator import SchemaMigrator
+
+# Schema of the databases created before migrations were introduced
+LEGACY_SCHEMA = """
+    CREATE TABLE deck (
+    deck_id INTEGER PRIMARY KEY,
+    title TEXT NOT NULL,
+    last_study_datetime timestamp );
+    CREATE TABLE flashcard (
+    flashcard_id INTEGER PRIMARY KEY,
+    deck_id INTEGER NOT NULL,
+    question TEXT NOT NULL,
+    answer TEXT NOT NULL,
+    last_study_date timestamp,
+    due_date_string TEXT,
+    inter_repetition_interval INTEGER,
+    easiness_factor REAL,
+    repetition_number INTEGER,
+    FOREIGN KEY (deck_id) REFERENCES deck (deck_id) );
+    """
+
+
+def schema_names(database_path, object_type) -> {str}:
+    """
+    :return: Names of the tables or indexes of the database
+    :rtype: {str}
+    """
+    connection = sqlite3.connect(database_path)
+    try:
+        return {row[0] for row in connection.execute("SELECT name FROM sqlite_master WHERE type = ?",
+                                                     (object_type,))}
+    finally:
+        connection.close()
+
+
+def user_version(database_path) -> int:
+    """
+    :return: Schema version of the database
+    :rtype: int
+    """
+    connection = sqlite3.connect(database_path)
+    try:
+        return connection.execute("PRAGMA user_version").fetchone()[0]
+    finally:
+        connection.close()
+
+
+@pytest.fixture
+def connection_manager(database_path):
+    connection_manager = ConnectionManager(database_path)
+    yield connection_manager
+    connection_manager.close_all()
+
+
+def test_new_database_gets_every_migration(database_path, connection_manager):
+    migrator = SchemaMigrator(connection_manager)
+    assert migrator.migrate() == migrator.latest_version()
+    assert user_version(database_path) == migrator.latest_version()
+    assert {"deck", "flashcard", "review_log", "review_day"} <= schema_names(database_path, "table")
+    assert {"flashcard_deck_id_index", "flashcard_deck_id_due_day_index", "review_log_reviewed_at_index",
+            "review_log_flashcard_id_index"} <= schema_names(database_path, "index")
+    # A migrated database is not migrated again.
+    assert migrator.migrate() == 0
+
+
+def test_legacy_database_keeps_its_flashcards(database_path):
+    connection = sqlite3.connect(database_path)
+    connection.executescript(LEGACY_SCHEMA)
+    connection.execute("INSERT INTO deck VALUES (1, 'Capitals', NULL)")
+    connection.executemany("INSERT INTO flashcard VALUES (?, 1, ?, ?, NULL, ?, 6, 2.5, 2)",
+                           [(1, "France", "Paris", "2024-03-01"),
+                            (2, "Japan", "Tokyo", "2024-03-01 00:00:00"),
+                            (3, "Peru", "Lima", None),
+                            (4, "Chile", "Santiago", "not a date")])
+    connection.commit()
+    connection.close()
+
+    database_manager = DatabaseManager(db_path=database_path)
+    try:
+        assert user_version(database_path) == database_manager.schema_migrator.latest_version()
+        deck = database_manager.decks[0]
+        due_days = {flashcard.question: flashcard.due_day for flashcard in deck.flashcards}
+        march_first = Flashcard.day_number_from_string("2024-03-01")
+        assert due_days["France"] == march_first
+        assert due_days["Japan"] == march_first
+        # Missing and unreadable due dates become today.
+        assert due_days["Peru"] == Flashcard.today_day_number()
+        assert due_days["Chile"] == Flashcard.today_day_number()
+        assert [flashcard.answer for flashcard in database_manager.search("japan")] == ["Tokyo"]
+    finally:
+        database_manager.close()
+
+
+def test_failing_migration_is_rolled_back(database_path, connection_manager):
+    migrator = SchemaMigrator(connection_manager)
+    migrator.migrate()
+    latest_version = migrator.latest_version()
+
+    def failing_migration(cursor):
+        cursor.execute("CREATE TABLE half_done (value INTEGER)")
+        cursor.execute("INSERT INTO missing_table VALUES (1)")
+
+    migrator.migrations.append((latest_version + 1, "Failing step", failing_migration))
+    with pytest.raises(sqlite3.Error):
+        migrator.migrate()
+    assert user_version(database_path) == latest_version
+    assert "half_done" not in schema_names(database_path, "table")
+
+
+def test_newer_database_is_not_migrated(database_path, connection_manager):
+    migrator = SchemaMigrator(connection_manager)
+    migrator.migrate()
+    with connection_manager.transaction() as cursor:
+        cursor.execute("PRAGMA user_version = {}".format(migrator.latest_version() + 1))
+    assert migrator.migrate() == 0
+    assert user_version(database_path) == migrator.latest_version() + 1